@@ -1,50 +1,148 @@
-from flask import Flask, render_template, redirect, url_for, request, flash, jsonify
-from utils.json_handler import JSONHandler
-from utils.offboarding_tracker import OffboardingTracker
-from modules.enhanced_workflow import EnhancedOffboardingWorkflow, TeamResponsibility, WorkflowStatus, ReasonForLeaving
+from flask import Flask, current_app, render_template, redirect, url_for, request, flash, jsonify, Response, stream_with_context
+from werkzeug.local import LocalProxy
+from utils import profiling, template_cache
+from utils import tenants as tenants_module
+from utils.upload_store import UploadRejected, DEFAULT_MAX_FILE_SIZE
+import gc
 import os
-from werkzeug.utils import secure_filename
-from datetime import datetime
-
-app = Flask(__name__)
-app.secret_key = 'your-secret-key-here'  # Change this in production
 
 # Path to employee data
 DATA_PATH = os.path.join('data', 'employees.json')
 UPLOAD_FOLDER = os.path.join('static', 'uploads')
 ALLOWED_EXTENSIONS = {'pdf', 'doc', 'docx'}
+# Employee field that holds each uploadable document type
+DOCUMENT_FIELDS = {'resignation': 'resignation_letter', 'exit_interview': 'exit_interview'}
+
+# The app's tenants (see utils.tenants); each tenant's services are created on first use
+tenants = LocalProxy(lambda: current_app.extensions['tenants'])
+json_handler = LocalProxy(lambda: tenants.current().json_handler)
+upload_store = LocalProxy(lambda: tenants.current().upload_store)
+# Slow side effects run in `python -m utils.job_queue work` processes
+job_queue = LocalProxy(lambda: tenants.current().job_queue)
+# Workflows live in the shared storage so every worker process sees the same state
+enhanced_workflow = LocalProxy(lambda: tenants.current().engine)
+# Offboarding requests of the legacy pages, kept as engine workflows (see utils.legacy_requests)
+legacy_requests = LocalProxy(lambda: tenants.current().legacy_requests)
+# Full-text search over workflows, notes and exit interview feedback
+search_index = LocalProxy(lambda: tenants.current().search_index)
+
+# Routes below are registered on every app create_app() builds
+_routes = []
+
+
+def route(rule: str, **options):
+    """Like app.route(), for the apps built by create_app()."""
+    def decorator(view):
+        _routes.append((rule, options, view))
+        return view
+    return decorator
+
+
+def create_app(config: dict = None) -> Flask:
+    """
+    Build the web app.
+
+    Nothing is loaded or created here: storage, workflow engines and the other
+    services of each tenant are created when a request first needs them, and
+    modules only some routes use are imported by those routes, so a worker
+    process boots fast. A pre-forking server should call preload() before
+    forking instead (OFFBOARDING_PRELOAD=1 or PRELOAD app config does so
+    here), so the workers share the loaded state.
+
+    Args:
+        config: Settings applied over the defaults (e.g. DATA_DIR, UPLOAD_FOLDER)
+    """
+    app = Flask(__name__)
+    app.secret_key = 'your-secret-key-here'  # Change this in production
+    app.config['DATA_DIR'] = os.path.dirname(DATA_PATH)
+    # Created by the upload store when the first document is stored
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    # Reject oversized requests before the body is read (forms are small; documents are capped per file)
+    app.config['MAX_CONTENT_LENGTH'] = DEFAULT_MAX_FILE_SIZE + 64 * 1024
+    app.config.update(config or {})
+
+    # Every legal entity (tenant) has its own data partition; requests pick one with ?tenant=<id>
+    registry = tenants_module.init_app(
+        app, tenants_module.get_tenants(app.config['DATA_DIR'], app.config['UPLOAD_FOLDER'])
+    )
+
+    # Opt-in per-request profiling and /metrics (PROFILING config or OFFBOARDING_PROFILING=1)
+    if profiling.init_app(app) is not None and profiling.instrument_workflow_engine not in registry.engine_hooks:
+        registry.engine_hooks.append(profiling.instrument_workflow_engine)
+
+    # Cached table rows ({% cache %}) and compiled templates kept across restarts
+    template_cache.init_app(app)
 
-# Ensure upload directory exists
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    for rule, options, view in _routes:
+        app.add_url_rule(rule, view_func=view, **options)
+    app.register_error_handler(413, upload_too_large)
+
+    if app.config.get('PRELOAD', os.environ.get('OFFBOARDING_PRELOAD', '').lower() in ('1', 'true', 'yes')):
+        preload(app)
+    return app
+
+
+def preload(app):
+    """
+    Load what every worker reads before a pre-forking server forks them.
+
+    Imports the modules routes import lazily, compiles the templates and
+    loads each tenant's employees, workflows and legacy request views, then
+    freezes the loaded objects out of garbage collection. Forked workers share these pages
+    copy-on-write; a worker only reads its own copy of a record once that
+    record changes. Run it in the server's master process, e.g.
+    ``OFFBOARDING_PRELOAD=1 gunicorn --preload -w 4 app:app``.
+    """
+    import modules.enhanced_workflow
+    import utils.exporter
+    import utils.feedback_analytics
+    import utils.job_queue
+    import utils.search
+
+    from jinja2 import TemplateSyntaxError
+    for name in app.jinja_env.list_templates():
+        try:
+            app.jinja_env.get_template(name)
+        except TemplateSyntaxError:
+            # Still reported when the page that renders it is requested
+            continue
+    for tenant in app.extensions['tenants'].tenants.values():
+        tenant.storage.employees.records()
+        tenant.engine.active_workflows
+        tenant.legacy_requests.all()
+    # Collections would otherwise touch (and so copy) every object's header in each worker
+    gc.freeze()
 
-json_handler = JSONHandler(DATA_PATH)
-offboarding_tracker = OffboardingTracker()
-enhanced_workflow = EnhancedOffboardingWorkflow()
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-@app.route('/')
+def upload_too_large(e):
+    flash('File exceeds the upload size limit', 'error')
+    return redirect(request.referrer or url_for('dashboard'))
+
+@route('/')
 def home():
     return redirect(url_for('dashboard'))
 
-@app.route('/dashboard')
+@route('/dashboard')
 def dashboard():
-    employees = json_handler.get_all_employees()
-    offboarding_requests = json_handler.get_offboarding_requests()
+    employees = json_handler.get_all_employees(copy=False)
+    offboarding_requests = legacy_requests.all()
     return render_template('dashboard.html', 
                          active_item='dashboard', 
                          employees=employees,
                          offboarding_requests=offboarding_requests)
 
-@app.route('/employees')
+@route('/employees')
 def all_employees():
-    employees = json_handler.get_all_employees()
+    employees = json_handler.get_all_employees(copy=False)
     return render_template('employees/all_employees.html', 
                          active_item='all_employees', 
-                         employees=employees)
+                         employees=employees,
+                         versions=json_handler.collection.versions())
 
-@app.route('/employees/add', methods=['GET', 'POST'])
+@route('/employees/add', methods=['GET', 'POST'])
 def add_employee():
     if request.method == 'POST':
         try:
@@ -62,7 +160,7 @@ def add_employee():
     
     return render_template('employees/add_employee.html', active_item='add_employee')
 
-@app.route('/offboarding/new', methods=['GET', 'POST'])
+@route('/offboarding/new', methods=['GET', 'POST'])
 def new_request():
     if request.method == 'POST':
         try:
@@ -72,7 +170,7 @@ def new_request():
                 'reason': request.form['reason'],
                 'notice_period': int(request.form['notice_period'])
             }
-            request_id = json_handler.create_offboarding_request(
+            request_id = legacy_requests.create(
                 request_data['employee_id'], 
                 request_data
             )
@@ -81,19 +179,20 @@ def new_request():
         except Exception as e:
             flash(f'Error creating request: {str(e)}', 'error')
     
-    employees = json_handler.get_all_employees()
+    employees = json_handler.get_all_employees(copy=False)
     return render_template('offboarding/new_request.html', 
                          active_item='new_request',
                          employees=employees)
 
-@app.route('/offboarding/status')
+@route('/offboarding/status')
 def status_tracker():
-    offboarding_requests = json_handler.get_offboarding_requests()
+    offboarding_requests = legacy_requests.all()
     return render_template('offboarding/status_tracker.html', 
                          active_item='status_tracker',
-                         offboarding_requests=offboarding_requests)
+                         offboarding_requests=offboarding_requests,
+                         versions=legacy_requests.versions())
 
-@app.route('/offboarding/interviews', methods=['GET', 'POST'])
+@route('/offboarding/interviews', methods=['GET', 'POST'])
 def exit_interviews():
     if request.method == 'POST':
         try:
@@ -107,21 +206,30 @@ def exit_interviews():
                 interview_data['employee_id'],
                 interview_data
             )
-            flash('Exit interview scheduled successfully!', 'success')
-            return redirect(url_for('exit_interviews'))
         except Exception as e:
             flash(f'Error scheduling interview: {str(e)}', 'error')
+        else:
+            if interview_data['feedback'].strip():
+                # Feedback is analysed by a job worker; /reports shows it once analysed. The
+                # interview is saved either way, so a failed enqueue must not ask for a resubmit
+                try:
+                    job_queue.enqueue("feedback.refresh", {}, priority=-1,
+                                      idempotency_key=f"feedback.refresh:{interview_id}")
+                except Exception:
+                    current_app.logger.exception(f"Could not queue feedback analysis of interview {interview_id}")
+            flash('Exit interview scheduled successfully!', 'success')
+            return redirect(url_for('exit_interviews'))
     
-    exit_interviews = json_handler.get_exit_interviews()
+    exit_interviews = json_handler.get_exit_interviews(copy=False)
     return render_template('offboarding/exit_interviews.html', 
                          active_item='exit_interviews',
                          exit_interviews=exit_interviews)
 
-@app.route('/reports')
+@route('/reports')
 def reports():
-    employees = json_handler.get_all_employees()
-    offboarding_requests = json_handler.get_offboarding_requests()
-    exit_interviews = json_handler.get_exit_interviews()
+    employees = json_handler.get_all_employees(copy=False)
+    offboarding_requests = legacy_requests.all()
+    exit_interviews = json_handler.get_exit_interviews(copy=False)
     
     # Calculate statistics
     total_employees = len(employees)
@@ -129,14 +237,19 @@ def reports():
     pending_offboarding = len([r for r in offboarding_requests if r['status'] == 'Pending'])
     completed_offboarding = len([r for r in offboarding_requests if r['status'] == 'Completed'])
     
+    # Exit interview themes from the cached analyses (refreshed by the feedback.refresh job)
+    from utils import feedback_analytics
+    feedback_themes = feedback_analytics.themes(json_handler.storage, analyse=False)
+    
     return render_template('reports.html', 
                          active_item='reports',
                          total_employees=total_employees,
                          active_employees=active_employees,
                          pending_offboarding=pending_offboarding,
-                         completed_offboarding=completed_offboarding)
+                         completed_offboarding=completed_offboarding,
+                         feedback_themes=feedback_themes)
 
-@app.route('/settings', methods=['GET', 'POST'])
+@route('/settings', methods=['GET', 'POST'])
 def settings():
     if request.method == 'POST':
         # Handle settings update
@@ -145,7 +258,7 @@ def settings():
     
     return render_template('settings.html', active_item='settings')
 
-@app.route('/contact', methods=['GET', 'POST'])
+@route('/contact', methods=['GET', 'POST'])
 def contact():
     if request.method == 'POST':
         # Handle contact form submission
@@ -154,7 +267,7 @@ def contact():
     
     return render_template('contact.html', active_item='contact')
 
-@app.route('/employee/<employee_id>')
+@route('/employee/<employee_id>')
 def employee_detail(employee_id):
     employee = json_handler.get_employee_by_id(employee_id)
     if not employee:
@@ -162,17 +275,13 @@ def employee_detail(employee_id):
         return redirect(url_for('all_employees'))
     
     # Get offboarding request if exists
-    offboarding_requests = json_handler.get_offboarding_requests()
-    offboarding_request = next(
-        (r for r in offboarding_requests if r['employee_id'] == employee_id),
-        None
-    )
+    offboarding_request = legacy_requests.for_employee(employee_id)
     
     return render_template('employee_detail.html', 
                          employee=employee,
                          offboarding_request=offboarding_request)
 
-@app.route('/employee/<employee_id>/update_status', methods=['POST'])
+@route('/employee/<employee_id>/update_status', methods=['POST'])
 def update_status(employee_id):
     new_status = request.form.get('status')
     if new_status in ['Active', 'Resigned']:
@@ -183,7 +292,7 @@ def update_status(employee_id):
             flash(f'Status updated to {new_status}', 'success')
     return redirect(url_for('employee_detail', employee_id=employee_id))
 
-@app.route('/employee/<employee_id>/upload_document', methods=['POST'])
+@route('/employee/<employee_id>/upload_document', methods=['POST'])
 def upload_document(employee_id):
     if 'file' not in request.files:
         flash('No file selected', 'error')
@@ -192,47 +301,33 @@ def upload_document(employee_id):
     file = request.files['file']
     doc_type = request.form.get('document_type')
     
-    if file and allowed_file(file.filename):
-        filename = secure_filename(f"{employee_id}_{doc_type}_{file.filename}")
-        file_path = os.path.join(UPLOAD_FOLDER, filename)
-        file.save(file_path)
-        
-        # Update employee record
-        employee = json_handler.get_employee_by_id(employee_id)
-        if employee:
-            if doc_type == 'resignation':
-                employee['resignation_letter'] = filename
-            elif doc_type == 'exit_interview':
-                employee['exit_interview'] = filename
-            json_handler.update_employee(employee_id, employee)
+    if file and allowed_file(file.filename) and doc_type in DOCUMENT_FIELDS:
+        try:
+            # Stored by content hash; the employee record is updated in the same write
+            employee = upload_store.attach(json_handler.collection, employee_id, DOCUMENT_FIELDS[doc_type], file)
+            sha256 = os.path.splitext(os.path.basename(employee[DOCUMENT_FIELDS[doc_type]]))[0]
+            job_queue.enqueue("documents.verify", {"sha256": sha256}, priority=-1,
+                              idempotency_key=f"documents.verify:{sha256}")
             flash('Document uploaded successfully', 'success')
+        except UploadRejected as e:
+            flash(str(e), 'error')
     else:
         flash('Invalid file type', 'error')
     
     return redirect(url_for('employee_detail', employee_id=employee_id))
 
-@app.route('/offboarding/<request_id>/update_task', methods=['POST'])
+@route('/offboarding/<request_id>/update_task', methods=['POST'])
 def update_task(request_id):
     department = request.form.get('department')
     task = request.form.get('task')
     status = request.form.get('status')
     
-    request_data = json_handler.get_offboarding_request(request_id)
-    if request_data:
-        if department in request_data['departments']:
-            request_data['departments'][department]['status'] = status
-            if task:
-                request_data['departments'][department]['tasks'].append({
-                    'task': task,
-                    'status': status,
-                    'updated_at': datetime.now().isoformat()
-                })
-            json_handler.update_offboarding_request(request_id, request_data)
-            flash('Task status updated', 'success')
+    if legacy_requests.update_task(request_id, department, task, status):
+        flash('Task status updated', 'success')
     
     return redirect(url_for('status_tracker'))
 
-@app.route('/enhanced-offboarding/new', methods=['GET', 'POST'])
+@route('/enhanced-offboarding/new', methods=['GET', 'POST'])
 def new_enhanced_request():
     """Create a new enhanced offboarding request."""
     if request.method == 'POST':
@@ -253,11 +348,20 @@ def new_enhanced_request():
                 'reason_for_leaving': request.form['reason_for_leaving'],
                 'line_manager': request.form.get('line_manager', ''),
                 'department': request.form.get('department', ''),
-                'position': request.form.get('position', '')
+                'position': request.form.get('position', ''),
+                'location': request.form.get('location') or enhanced_workflow.calendar.default_location
             }
             
             # Create enhanced workflow
             request_id = enhanced_workflow.create_offboarding_request(employee_data)
+            job_queue.enqueue(
+                "it.raise_ticket",
+                {"request_id": request_id, "employee_id": employee_data['employee_id'],
+                 "name": employee_data['name'], "last_working_day": employee_data['last_working_day']},
+                priority=5,
+                idempotency_key=f"it.raise_ticket:{request_id}",
+                workflow_task=(request_id, "step_2_people_ops_review", "raise_it_ticket")
+            )
             
             flash(f'Enhanced offboarding request created successfully! Request ID: {request_id}', 'success')
             return redirect(url_for('enhanced_status_tracker'))
@@ -266,20 +370,25 @@ def new_enhanced_request():
             flash(f'Error creating enhanced request: {str(e)}', 'error')
     
     # Get reason for leaving options
+    from modules.enhanced_workflow import ReasonForLeaving
     reasons = [reason.value for reason in ReasonForLeaving]
     
     return render_template('enhanced_offboarding/new_request.html', 
                          active_item='new_enhanced_request',
-                         reasons=reasons)
+                         reasons=reasons,
+                         locations=enhanced_workflow.calendar.location_names(),
+                         default_location=enhanced_workflow.calendar.default_location)
 
-@app.route('/enhanced-offboarding/status')
+@route('/enhanced-offboarding/status')
 def enhanced_status_tracker():
     """Enhanced workflow status tracker."""
     # Get all active workflows
     workflows = []
+    versions = enhanced_workflow.workflow_versions()
     for request_id, workflow_data in enhanced_workflow.active_workflows.items():
         workflows.append({
             'request_id': request_id,
+            'version': versions.get(request_id),
             'employee_data': workflow_data['employee_data'],
             'status': workflow_data['status'],
             'overall_progress': workflow_data['overall_progress'],
@@ -291,7 +400,7 @@ def enhanced_status_tracker():
                          active_item='enhanced_status_tracker',
                          workflows=workflows)
 
-@app.route('/enhanced-offboarding/<request_id>')
+@route('/enhanced-offboarding/<request_id>')
 def enhanced_workflow_detail(request_id):
     """Detailed view of an enhanced workflow."""
     try:
@@ -303,7 +412,7 @@ def enhanced_workflow_detail(request_id):
         flash(str(e), 'error')
         return redirect(url_for('enhanced_status_tracker'))
 
-@app.route('/enhanced-offboarding/<request_id>/update-task', methods=['POST'])
+@route('/enhanced-offboarding/<request_id>/update-task', methods=['POST'])
 def update_enhanced_task(request_id):
     """Update a task status in the enhanced workflow."""
     try:
@@ -318,6 +427,7 @@ def update_enhanced_task(request_id):
             return redirect(url_for('enhanced_workflow_detail', request_id=request_id))
         
         # Convert status string to enum
+        from modules.enhanced_workflow import WorkflowStatus
         status_enum = WorkflowStatus(status)
         
         # Update task
@@ -335,7 +445,7 @@ def update_enhanced_task(request_id):
     
     return redirect(url_for('enhanced_workflow_detail', request_id=request_id))
 
-@app.route('/enhanced-offboarding/<request_id>/add-note', methods=['POST'])
+@route('/enhanced-offboarding/<request_id>/add-note', methods=['POST'])
 def add_workflow_note(request_id):
     """Add a note to the workflow."""
     try:
@@ -358,11 +468,27 @@ def add_workflow_note(request_id):
     
     return redirect(url_for('enhanced_workflow_detail', request_id=request_id))
 
-@app.route('/enhanced-offboarding/team/<team_name>')
+@route('/enhanced-offboarding/<request_id>/reschedule', methods=['POST'])
+def reschedule_workflow(request_id):
+    """Move the last working day of a workflow and recompute its due dates."""
+    new_lwd = request.form.get('last_working_day')
+    changed_by = request.form.get('changed_by', 'Unknown')
+    
+    if not new_lwd:
+        flash('New last working day is required', 'error')
+    elif enhanced_workflow.reschedule(request_id, new_lwd, changed_by):
+        flash('Workflow rescheduled successfully!', 'success')
+    else:
+        flash('Failed to reschedule workflow', 'error')
+    
+    return redirect(url_for('enhanced_workflow_detail', request_id=request_id))
+
+@route('/enhanced-offboarding/team/<team_name>')
 def team_tasks(team_name):
     """View tasks assigned to a specific team."""
     try:
         # Convert team name to enum
+        from modules.enhanced_workflow import TeamResponsibility
         team_enum = TeamResponsibility(team_name)
         tasks = enhanced_workflow.get_tasks_by_team(team_enum)
         
@@ -374,16 +500,17 @@ def team_tasks(team_name):
         flash('Invalid team name', 'error')
         return redirect(url_for('enhanced_status_tracker'))
 
-@app.route('/enhanced-offboarding/overdue')
+@route('/enhanced-offboarding/overdue')
 def overdue_tasks():
     """View all overdue tasks."""
     overdue = enhanced_workflow.get_overdue_tasks()
     
     return render_template('enhanced_offboarding/overdue_tasks.html',
                          active_item='overdue_tasks',
-                         overdue_tasks=overdue)
+                         overdue_tasks=overdue,
+                         versions=enhanced_workflow.workflow_versions())
 
-@app.route('/enhanced-offboarding/<request_id>/export')
+@route('/enhanced-offboarding/<request_id>/export')
 def export_workflow_report(request_id):
     """Export workflow report as JSON."""
     try:
@@ -392,5 +519,65 @@ def export_workflow_report(request_id):
     except ValueError as e:
         return jsonify({'error': str(e)}), 404
 
+@route('/export/<kind>.csv')
+def bulk_export(kind):
+    """Stream a bulk CSV export of employees, workflows, tasks or transitions."""
+    from utils import exporter
+    if kind not in exporter.EXPORT_KINDS:
+        return jsonify({'error': f'Unknown export: {kind}'}), 404
+    
+    if kind == 'employees':
+        rows = exporter.iter_export_rows(kind, employees=json_handler.get_all_employees(copy=False))
+    else:
+        # Snapshot the workflow list so concurrent creates don't break iteration
+        rows = exporter.iter_export_rows(kind, workflows=list(enhanced_workflow.active_workflows.values()))
+    
+    return Response(stream_with_context(exporter.stream_csv(rows, exporter.EXPORT_KINDS[kind])),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={kind}.csv'})
+
+@route('/jobs')
+def list_jobs():
+    """Background job counts and the most recent jobs (optionally ?status=queued|running|succeeded|failed)."""
+    from utils.job_queue import JOB_STATUSES
+    status = request.args.get('status')
+    if status and status not in JOB_STATUSES:
+        return jsonify({'error': f'Unknown status: {status}'}), 400
+    return jsonify({'counts': job_queue.counts(), 'jobs': job_queue.list_jobs(status)})
+
+@route('/jobs/<int:job_id>')
+def job_detail(job_id):
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job)
+
+@route('/search')
+def search():
+    """Full-text search (?q=..., optional &kind=workflow|note|task_note|feedback and &limit=N)."""
+    from utils.search import KINDS as SEARCH_KINDS
+    query = request.args.get('q', '').strip()
+    kinds = request.args.getlist('kind')
+    unknown = [kind for kind in kinds if kind not in SEARCH_KINDS]
+    if unknown:
+        return jsonify({'error': f'Unknown kind: {unknown[0]}'}), 400
+    limit = min(request.args.get('limit', 20, type=int), 100)
+    results = search_index.search(query, limit=limit, kinds=kinds)
+    for result in results:
+        if 'request_id' in result:
+            result['url'] = url_for('enhanced_workflow_detail', request_id=result['request_id'])
+        elif 'employee_id' in result:
+            result['url'] = url_for('employee_detail', employee_id=result['employee_id'])
+    return jsonify({'query': query, 'results': results})
+
+@route('/tenants/rollup')
+def tenant_rollup():
+    """Employee, request, workflow and overdue-step counts of every tenant, and their total."""
+    return jsonify(tenants.rollup())
+
+app = create_app()
+
 if __name__ == '__main__':
+    import logging
+    logging.basicConfig(level=logging.INFO)
     app.run(debug=True) 
\ No newline at end of file
@@ -1,28 +1,30 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-from app.utils.data import load_employees, save_employees
-import os
+from app.utils.data import get_employee, update_employee, attach_document
+from utils.upload_store import UploadRejected
 
 finance_bp = Blueprint('finance', __name__, template_folder='../../templates/finance')
 
-@finance_bp.route('/<int:emp_id>', methods=['GET', 'POST'])
+@finance_bp.route('/<emp_id>', methods=['GET', 'POST'])
 def finance_dashboard(emp_id):
-    employees = load_employees()
-    emp = next((e for e in employees if e['id'] == emp_id), None)
+    emp = get_employee(emp_id)
     if not emp:
         flash('Employee not found', 'danger')
         return redirect(url_for('dashboard'))
     if request.method == 'POST':
+        changes = {}
         if 'final_salary' in request.form:
-            emp['final_salary'] = request.form.get('final_salary')
+            changes['final_salary'] = request.form.get('final_salary')
         if 'loan_balance' in request.form:
-            emp['loan_balance'] = request.form.get('loan_balance')
+            changes['loan_balance'] = request.form.get('loan_balance')
         file = request.files.get('payslip')
         if file and file.filename:
-            filename = f"payslip_{emp_id}.pdf"
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            emp['payslip'] = filename
-            flash('Payslip uploaded', 'success')
-        save_employees(employees)
+            try:
+                emp = attach_document(current_app.extensions['upload_store'], emp_id, 'payslip', file, changes)
+                flash('Payslip uploaded', 'success')
+            except UploadRejected as e:
+                flash(str(e), 'danger')
+                emp = update_employee(emp_id, changes)
+        else:
+            emp = update_employee(emp_id, changes)
         flash('Finance info updated', 'success')
     return render_template('finance/finance_dashboard.html', emp=emp) 
\ No newline at end of file
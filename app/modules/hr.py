@@ -1,34 +1,37 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
-from app.utils.data import load_employees, save_employees
-import os
+from app.utils.data import get_employee, update_employee, attach_document
+from utils.upload_store import UploadRejected
 
 hr_bp = Blueprint('hr', __name__, template_folder='../../templates/hr')
 
-@hr_bp.route('/<int:emp_id>', methods=['GET', 'POST'])
+@hr_bp.route('/<emp_id>', methods=['GET', 'POST'])
 def hr_dashboard(emp_id):
-    employees = load_employees()
-    emp = next((e for e in employees if e['id'] == emp_id), None)
+    emp = get_employee(emp_id)
     if not emp:
         flash('Employee not found', 'danger')
         return redirect(url_for('dashboard'))
     if request.method == 'POST':
+        changes = {}
         # Handle status update
         status = request.form.get('status')
         if status:
-            emp['status'] = status
-        # Handle resignation letter upload
-        file = request.files.get('resignation_letter')
-        if file and file.filename:
-            filename = f"resignation_{emp_id}.pdf"
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            emp['resignation_letter'] = filename
-            flash('Resignation letter uploaded', 'success')
+            changes['status'] = status
         # Handle exit interview date
         exit_interview = request.form.get('exit_interview')
         if exit_interview:
-            emp['exit_interview'] = exit_interview
+            changes['exit_interview'] = exit_interview
             flash('Exit interview scheduled', 'success')
-        save_employees(employees)
+        # Handle resignation letter upload, saved together with the other changes
+        file = request.files.get('resignation_letter')
+        if file and file.filename:
+            try:
+                emp = attach_document(current_app.extensions['upload_store'], emp_id,
+                                      'resignation_letter', file, changes)
+                flash('Resignation letter uploaded', 'success')
+            except UploadRejected as e:
+                flash(str(e), 'danger')
+                emp = update_employee(emp_id, changes)
+        else:
+            emp = update_employee(emp_id, changes)
         flash('HR info updated', 'success')
     return render_template('hr/hr_dashboard.html', emp=emp) 
\ No newline at end of file
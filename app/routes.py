@@ -1,18 +1,28 @@
 import os
 from flask import Flask, render_template
+from werkzeug.local import LocalProxy
 from app.modules.hr import hr_bp
 from app.modules.it import it_bp
 from app.modules.finance import finance_bp
 from app.modules.legal import legal_bp
 from app.modules.admin import admin_bp
 from app.modules.manager import manager_bp
-from app.utils.data import load_employees
+from app.utils.data import load_employees, DATA_DIR, UPLOAD_FOLDER
+from utils import tenants as tenants_module
+from utils import template_cache
+from utils.upload_store import DEFAULT_MAX_FILE_SIZE
 
 def create_app():
     app = Flask(__name__, template_folder='../templates')
-    app.config['UPLOAD_FOLDER'] = os.path.join('static', 'uploads')
+    app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
+    app.config['MAX_CONTENT_LENGTH'] = DEFAULT_MAX_FILE_SIZE + 64 * 1024
     app.secret_key = 'supersecretkey'  # For session, flash, etc.
 
+    # Each request works on one tenant's partition (?tenant=<id>, see utils.tenants)
+    tenants = tenants_module.init_app(app, tenants_module.get_tenants(DATA_DIR, UPLOAD_FOLDER))
+    app.extensions['upload_store'] = LocalProxy(lambda: tenants.current().upload_store)
+    template_cache.init_app(app)
+
     # Register blueprints
     app.register_blueprint(hr_bp, url_prefix='/hr')
     app.register_blueprint(it_bp, url_prefix='/it')
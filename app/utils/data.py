@@ -1,14 +1,85 @@
-import json
 import os
 
-DATA_FILE = os.path.join(os.path.dirname(__file__), '../../data/employees.json')
+from werkzeug.local import LocalProxy
+
+from utils.tenants import get_tenants
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '../../data')
+UPLOAD_FOLDER = os.path.join('static', 'uploads')
+
+# The active tenant's employees: the same collection (and cache and lock) that app.py's JSONHandler uses
+employees = LocalProxy(lambda: get_tenants(DATA_DIR, UPLOAD_FOLDER).current().storage.employees)
+
+
+class EmployeeRepository:
+    """
+    Employee lookups and single-record updates for the department blueprints.
+
+    Records live in a shared storage collection (utils/storage.py), which
+    keeps the parsed file cached and indexed and journals each update, so a
+    lookup is an index access and an update writes one record. Employees are
+    keyed by employee_id; the legacy integer ids the blueprints use are
+    resolved through the collection's 'id' index.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def _resolve_key(self, emp_id):
+        """Map an employee_id, or a legacy integer id, to the employee_id key."""
+        if self.collection.get(emp_id, copy=False) is not None:
+            return emp_id
+        if isinstance(emp_id, int) or str(emp_id).isdigit():
+            matches = self.collection.find('id', int(emp_id))
+            if matches:
+                return matches[0]['employee_id']
+        return None
+
+    def all(self):
+        """Return every employee (the cached records; do not mutate)."""
+        return self.collection.all()
+
+    def get(self, emp_id):
+        """Return a copy of the employee with this id, or None."""
+        key = self._resolve_key(emp_id)
+        return self.collection.get(key) if key is not None else None
+
+    def update(self, emp_id, changes):
+        """Apply changes to one employee and persist; returns the updated copy or None."""
+        key = self._resolve_key(emp_id)
+        return self.collection.patch(key, changes) if key is not None else None
+
+    def attach_document(self, upload_store, emp_id, field, file, changes):
+        """Store an uploaded document and update the employee (field plus changes) in one write."""
+        key = self._resolve_key(emp_id)
+        if key is None:
+            return None
+        return upload_store.attach(self.collection, key, field, file, changes)
+
+    def replace_all(self, records):
+        """Replace the whole data set."""
+        self.collection.replace_all(records)
+
+
+repository = EmployeeRepository(employees)
+
 
 def load_employees():
-    if not os.path.exists(DATA_FILE):
-        return []
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
-
-def save_employees(employees):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(employees, f, indent=4) 
\ No newline at end of file
+    return repository.all()
+
+
+def save_employees(records):
+    repository.replace_all(records)
+
+
+def get_employee(emp_id):
+    return repository.get(emp_id)
+
+
+def update_employee(emp_id, changes):
+    return repository.update(emp_id, changes)
+
+
+def attach_document(upload_store, emp_id, field, file, changes):
+    """Store an uploaded document and update the employee (field plus changes) in one write."""
+    return repository.attach_document(upload_store, emp_id, field, file, changes)
@@ -0,0 +1,302 @@
+"""
+Load-testing harness for the Flask app.
+
+Starts app.py in a separate server process against a synthetic data set,
+replays a scenario file with a pool of client threads and reports latency
+percentiles, error rate and lost updates per scenario and storage backend.
+
+A scenario (see benchmarks/scenarios/) lists weighted request steps. Paths and
+form values may use the placeholders {request_id}, {employee_id},
+{active_employee_id}, {legacy_request_id} and {seq}. Steps with a "track"
+counter are write operations whose successful responses are compared with
+the persisted state after the run; the difference is reported as lost updates.
+
+Usage:
+    python -m benchmarks.load_test benchmarks/scenarios/mixed_read_write.json
+    python -m benchmarks.load_test benchmarks/scenarios/*.json --output load.json
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Any
+
+from utils import synthetic_data
+from utils.storage import get_storage
+
+STORAGE_BACKENDS = ["json"]
+SERVER_START_TIMEOUT = 120
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Report redirects as responses; every POST in the app redirects on success."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+_opener = urllib.request.build_opener(_NoRedirect)
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values))) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {
+        "p50_ms": percentile(values, 50) * 1000,
+        "p95_ms": percentile(values, 95) * 1000,
+        "p99_ms": percentile(values, 99) * 1000,
+        "max_ms": (values[-1] if values else 0.0) * 1000,
+    }
+
+
+# Server process
+
+def serve(data_dir: str, backend: str):
+    """Run app.py on a free port against data_dir (child process entry point)."""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('modules.enhanced_workflow').setLevel(logging.WARNING)
+
+    server = make_server('127.0.0.1', 0, create_app({'DATA_DIR': data_dir}), threaded=True)
+    print(f"LISTENING {server.server_port}", flush=True)
+    server.serve_forever()
+
+
+def _start_server(data_dir: str, backend: str):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'benchmarks.load_test', '--serve', data_dir, '--backend', backend],
+        stdout=subprocess.PIPE, text=True
+    )
+    deadline = time.time() + SERVER_START_TIMEOUT
+    while time.time() < deadline:
+        line = process.stdout.readline()
+        if line.startswith("LISTENING"):
+            return process, f"http://127.0.0.1:{int(line.split()[1])}"
+        if not line and process.poll() is not None:
+            break
+    process.kill()
+    raise RuntimeError("Load test server failed to start")
+
+
+# Persisted-state counters used for lost-update detection
+
+def _load(data_dir: str, name: str) -> List[Dict[str, Any]]:
+    """Read a collection the way the server persisted it (snapshot plus journal)."""
+    return get_storage(data_dir).collection(name).all()
+
+
+COUNTERS = {
+    "employees": lambda data_dir: len(_load(data_dir, 'employees.json')),
+    "legacy_requests": lambda data_dir: len(_load(data_dir, 'offboarding_requests.json')),
+    "legacy_task_updates": lambda data_dir: sum(
+        len(department.get("tasks", []))
+        for request in _load(data_dir, 'offboarding_requests.json')
+        for department in request.get("departments", {}).values()
+    ),
+    "workflows": lambda data_dir: len(_load(data_dir, 'enhanced_workflows.json')),
+    "workflow_notes": lambda data_dir: sum(
+        len(workflow.get("notes", [])) for workflow in _load(data_dir, 'enhanced_workflows.json')
+    ),
+}
+
+
+# Traffic replay
+
+class ScenarioRun:
+    """Replays one scenario against a running server."""
+
+    def __init__(self, scenario: Dict[str, Any], base_url: str, data_dir: str, seed: int):
+        self.scenario = scenario
+        self.base_url = base_url
+        self.seed = seed
+        self.steps = scenario["steps"]
+        self.weights = [step.get("weight", 1) for step in self.steps]
+
+        employees = _load(data_dir, 'employees.json')
+        self.placeholders = {
+            "employee_id": [e["employee_id"] for e in employees],
+            "active_employee_id": [e["employee_id"] for e in employees if e["status"] == "Active"],
+            "legacy_request_id": [r["request_id"] for r in _load(data_dir, 'offboarding_requests.json')],
+            "request_id": [w["request_id"] for w in _load(data_dir, 'enhanced_workflows.json')],
+        }
+        self._seq = itertools.count(1)
+        self._lock = threading.Lock()
+        self.results = []
+
+    def _fill(self, template: str, rng: random.Random, seq: int) -> str:
+        values = {"seq": seq}
+        for name, choices in self.placeholders.items():
+            if "{" + name + "}" in template:
+                values[name] = rng.choice(choices) if choices else ""
+        return template.format(**values)
+
+    def _send(self, step: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+        seq = next(self._seq)
+        path = self._fill(step["path"], rng, seq)
+        data = None
+        if step.get("form"):
+            form = {key: self._fill(value, rng, seq) for key, value in step["form"].items()}
+            data = urllib.parse.urlencode(form).encode()
+
+        request = urllib.request.Request(self.base_url + path, data=data, method=step["method"])
+        start = time.perf_counter()
+        try:
+            with _opener.open(request) as response:
+                response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            status = e.code
+        except OSError:
+            status = 0
+        return {"step": f"{step['method']} {step['path']}", "track": step.get("track"),
+                "status": status, "latency": time.perf_counter() - start}
+
+    def _worker(self, worker_id: int, count: int):
+        rng = random.Random(self.seed * 1000 + worker_id)
+        results = []
+        for _ in range(count):
+            step = rng.choices(self.steps, weights=self.weights)[0]
+            results.append(self._send(step, rng))
+        with self._lock:
+            self.results.extend(results)
+
+    def run(self, total_requests: int, concurrency: int) -> float:
+        """Send total_requests spread over concurrency threads; return wall time."""
+        share, extra = divmod(total_requests, concurrency)
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for worker_id in range(concurrency):
+                pool.submit(self._worker, worker_id, share + (1 if worker_id < extra else 0))
+        return time.perf_counter() - start
+
+
+def _is_success(status: int) -> bool:
+    return 200 <= status < 400
+
+
+def run_scenario(scenario: Dict[str, Any], backend: str, seed: int = 0,
+                 requests: int = None, concurrency: int = None) -> Dict[str, Any]:
+    """Generate the scenario's data set, start a server and replay the scenario."""
+    dataset = scenario.get("dataset", {})
+    total_requests = requests or scenario.get("requests", 1000)
+    concurrency = concurrency or scenario.get("concurrency", 8)
+    tracked = {step["track"] for step in scenario["steps"] if step.get("track")}
+
+    logging.getLogger('modules.enhanced_workflow').setLevel(logging.WARNING)
+    data_dir = tempfile.mkdtemp(prefix="offboarding-load-")
+    process = None
+    try:
+        synthetic_data.STORAGE_BACKENDS[backend](
+            data_dir, dataset.get("employees", 1000), dataset.get("workflows", 100), seed
+        )
+        process, base_url = _start_server(data_dir, backend)
+
+        before = {name: COUNTERS[name](data_dir) for name in tracked}
+        replay = ScenarioRun(scenario, base_url, data_dir, seed)
+        elapsed = replay.run(total_requests, concurrency)
+        after = {name: COUNTERS[name](data_dir) for name in tracked}
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        shutil.rmtree(data_dir, ignore_errors=True)
+
+    results = replay.results
+    errors = [r for r in results if not _is_success(r["status"])]
+    report = {
+        "scenario": scenario["name"],
+        "backend": backend,
+        "requests": len(results),
+        "concurrency": concurrency,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": len(results) / elapsed if elapsed else 0.0,
+        "error_rate": len(errors) / len(results) if results else 0.0,
+        "latency": _latency_summary([r["latency"] for r in results]),
+        "steps": {},
+        "lost_updates": {},
+    }
+
+    for step_name in sorted({r["step"] for r in results}):
+        step_results = [r for r in results if r["step"] == step_name]
+        report["steps"][step_name] = dict(
+            _latency_summary([r["latency"] for r in step_results]),
+            requests=len(step_results),
+            errors=sum(1 for r in step_results if not _is_success(r["status"]))
+        )
+
+    for name in sorted(tracked):
+        acknowledged = sum(1 for r in results if r["track"] == name and _is_success(r["status"]))
+        persisted = after[name] - before[name]
+        report["lost_updates"][name] = {
+            "acknowledged": acknowledged,
+            "persisted": persisted,
+            "lost": acknowledged - persisted,
+        }
+
+    return report
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Replay load-test scenarios against the Flask app")
+    parser.add_argument("scenarios", nargs="*", help="Scenario JSON files")
+    parser.add_argument("--backend", nargs="+", choices=STORAGE_BACKENDS, default=STORAGE_BACKENDS)
+    parser.add_argument("--requests", type=int, help="Override the scenario's request count")
+    parser.add_argument("--concurrency", type=int, help="Override the scenario's client threads")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--serve", metavar="DATA_DIR", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        serve(args.serve, args.backend[0])
+        return 0
+    if not args.scenarios:
+        parser.error("at least one scenario file is required")
+
+    reports = []
+    for path in args.scenarios:
+        with open(path, 'r') as f:
+            scenario = json.load(f)
+        for backend in args.backend:
+            report = run_scenario(scenario, backend, args.seed, args.requests, args.concurrency)
+            reports.append(report)
+            lost = sum(entry["lost"] for entry in report["lost_updates"].values())
+            print(f"{report['scenario']:<25} {backend:<6} {report['throughput_rps']:8.1f} req/s  "
+                  f"p50={report['latency']['p50_ms']:.1f}ms p95={report['latency']['p95_ms']:.1f}ms "
+                  f"p99={report['latency']['p99_ms']:.1f}ms errors={report['error_rate']:.1%} lost={lost}",
+                  file=sys.stderr)
+
+    output = json.dumps({"reports": reports}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
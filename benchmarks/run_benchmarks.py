@@ -0,0 +1,428 @@
+"""
+Benchmark suite for storage, the workflow engine, the tracker, HTTP routes and
+start-up (imports).
+
+Each benchmark runs against a synthetic data set (see utils.synthetic_data)
+in a temporary data directory, so results are reproducible and never touch
+data/. Results are written as JSON; when a baseline file (a previous results file) is given, every
+benchmark is compared against it and the run fails if any median is slower
+than the baseline by more than the threshold.
+
+The startup group imports the web entry points in fresh interpreters under
+``python -X importtime``; besides the timings it records the slowest imports
+and flags modules a web worker should never load (e.g. tkinter).
+
+Usage:
+    python -m benchmarks.run_benchmarks --sizes 1000 10000 --output results.json
+    python -m benchmarks.run_benchmarks --baseline benchmarks/baseline.json
+    python -m benchmarks.run_benchmarks --groups startup
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Callable
+
+from utils.json_handler import JSONHandler
+from utils.offboarding_tracker import OffboardingTracker, TrackingColumns
+from utils import synthetic_data
+from modules.enhanced_workflow import EnhancedOffboardingWorkflow, TeamResponsibility, WorkflowStatus
+
+DEFAULT_SIZES = [1000]
+DEFAULT_REPEAT = 5
+DEFAULT_THRESHOLD = 1.25
+# Workflows are held in memory, so very large sizes are capped for the engine
+DEFAULT_MAX_WORKFLOWS = 10000
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Modules imported by the startup benchmarks, and modules they must not pull in
+STARTUP_MODULES = ("app", "utils.tenants", "modules.enhanced_workflow")
+STARTUP_UNWANTED = ("tkinter", "yaml", "pyarrow")
+STARTUP_TOP = 10
+
+BENCHMARKS = []
+
+
+def benchmark(name: str, group: str):
+    """Register a benchmark; the decorated function returns the callable to time."""
+    def decorator(func):
+        BENCHMARKS.append({"name": name, "group": group, "setup": func})
+        return func
+    return decorator
+
+
+class BenchmarkEnvironment:
+    """Synthetic data set, storage and workflow engine for one benchmark size."""
+
+    def __init__(self, size: int, max_workflows: int, seed: int = 0):
+        self.size = size
+        self.seed = seed
+        self.data_dir = tempfile.mkdtemp(prefix="offboarding-bench-")
+        self.data_path = os.path.join(self.data_dir, 'employees.json')
+
+        self.employees = synthetic_data.generate_employees(size, seed=seed)
+        self.json_handler = JSONHandler(self.data_path)
+        self.json_handler.save_data(self.employees)
+        synthetic_data.write_json_array(
+            os.path.join(self.data_dir, 'offboarding_requests.json'),
+            synthetic_data.generate_offboarding_requests(self.employees, seed=seed)
+        )
+        synthetic_data.write_json_array(
+            os.path.join(self.data_dir, 'exit_interviews.json'),
+            synthetic_data.generate_exit_interviews(self.employees, seed=seed)
+        )
+
+        self.workflow_count = min(size, max_workflows)
+        self.enhanced_workflow = EnhancedOffboardingWorkflow()
+        workflow_requests = synthetic_data.generate_workflow_requests(
+            self.employees[:self.workflow_count], seed=seed
+        )
+        self.request_ids = synthetic_data.populate_workflows(self.enhanced_workflow, workflow_requests, seed=seed)
+
+        self.offboarding_tracker = OffboardingTracker()
+        self.import_profiles = {}
+        self._counter = 0
+
+    def next_index(self) -> int:
+        """Return a rotating index so repeated runs touch different records."""
+        self._counter += 1
+        return self._counter
+
+    def cleanup(self):
+        shutil.rmtree(self.data_dir, ignore_errors=True)
+
+
+# Storage
+
+@benchmark("storage.get_all_employees", "storage")
+def bench_get_all_employees(env: BenchmarkEnvironment) -> Callable:
+    return env.json_handler.get_all_employees
+
+
+@benchmark("storage.get_employee_by_id", "storage")
+def bench_get_employee_by_id(env: BenchmarkEnvironment) -> Callable:
+    def run():
+        employee = env.employees[(env.next_index() * 7919) % env.size]
+        env.json_handler.get_employee_by_id(employee["employee_id"])
+    return run
+
+
+@benchmark("storage.update_employee", "storage")
+def bench_update_employee(env: BenchmarkEnvironment) -> Callable:
+    def run():
+        employee = env.employees[(env.next_index() * 7919) % env.size]
+        env.json_handler.update_employee(employee["employee_id"], {"loan_balance": "0"})
+    return run
+
+
+@benchmark("storage.add_employee", "storage")
+def bench_add_employee(env: BenchmarkEnvironment) -> Callable:
+    def run():
+        env.json_handler.add_employee({
+            "name": "Bench Mark",
+            "email": "bench.mark@company.com",
+            "department": "Engineering",
+            "position": "Software Engineer"
+        })
+    return run
+
+
+# Workflow engine
+
+@benchmark("workflow.create_offboarding_request", "workflow")
+def bench_create_workflow(env: BenchmarkEnvironment) -> Callable:
+    engine = EnhancedOffboardingWorkflow()
+    employee_data = synthetic_data.generate_workflow_requests(env.employees[:1], seed=env.seed)[0]
+
+    def run():
+        data = dict(employee_data, employee_id=f"BENCH{env.next_index()}")
+        engine.create_offboarding_request(data)
+    return run
+
+
+@benchmark("workflow.update_task_status", "workflow")
+def bench_update_task_status(env: BenchmarkEnvironment) -> Callable:
+    def run():
+        request_id = env.request_ids[env.next_index() % env.workflow_count]
+        env.enhanced_workflow.update_task_status(
+            request_id, "step_4_lwd_it_facilities", "revoke_system_access",
+            WorkflowStatus.IN_PROGRESS, "bench"
+        )
+    return run
+
+
+@benchmark("workflow.get_tasks_by_team", "workflow")
+def bench_get_tasks_by_team(env: BenchmarkEnvironment) -> Callable:
+    return lambda: env.enhanced_workflow.get_tasks_by_team(TeamResponsibility.IT)
+
+
+@benchmark("workflow.get_overdue_tasks", "workflow")
+def bench_get_overdue_tasks(env: BenchmarkEnvironment) -> Callable:
+    return env.enhanced_workflow.get_overdue_tasks
+
+
+@benchmark("workflow.export_workflow_report", "workflow")
+def bench_export_workflow_report(env: BenchmarkEnvironment) -> Callable:
+    def run():
+        request_id = env.request_ids[env.next_index() % env.workflow_count]
+        env.enhanced_workflow.export_workflow_report(request_id)
+    return run
+
+
+# Offboarding tracker
+
+@benchmark("tracker.update_and_progress", "tracker")
+def bench_tracker_progress(env: BenchmarkEnvironment) -> Callable:
+    tracker = env.offboarding_tracker
+    states = [tracker.initialize_employee_tracking(e["employee_id"]) for e in env.employees[:env.workflow_count]]
+
+    def run():
+        for state in states:
+            tracker.update_task_status(state, "IT", "Backup Files")
+            tracker.get_overall_progress(state)
+    return run
+
+
+@benchmark("tracker.completion_many", "tracker")
+def bench_tracker_completion(env: BenchmarkEnvironment) -> Callable:
+    tracker = env.offboarding_tracker
+    states = [tracker.initialize_employee_tracking(e["employee_id"]) for e in env.employees[:env.workflow_count]]
+
+    def run():
+        # A dashboard row per employee
+        for state in states:
+            tracker.get_completion(state)
+    return run
+
+
+@benchmark("tracker.bulk_progress", "tracker")
+def bench_tracker_bulk_progress(env: BenchmarkEnvironment) -> Callable:
+    tracker = env.offboarding_tracker
+    columns = TrackingColumns(
+        tracker.departments,
+        (tracker.initialize_employee_tracking(e["employee_id"]) for e in env.employees[:env.workflow_count])
+    )
+
+    def run():
+        # "Who is blocked on IT" over every leaver
+        tracker.blocked_on(tracker.get_bulk_progress(columns), "IT")
+    return run
+
+
+# HTTP routes through the Flask test client
+
+def _route_client(env: BenchmarkEnvironment):
+    """Point app.py's module-level services at the benchmark data."""
+    import app as app_module
+
+    app_module.json_handler = env.json_handler
+    app_module.enhanced_workflow = env.enhanced_workflow
+    return app_module.app.test_client()
+
+
+def _route_benchmark(name: str, path: str):
+    @benchmark(name, "routes")
+    def bench(env: BenchmarkEnvironment) -> Callable:
+        client = _route_client(env)
+
+        def run():
+            response = client.get(path)
+            if response.status_code >= 400:
+                raise RuntimeError(f"GET {path} returned {response.status_code}")
+        return run
+    return bench
+
+
+_route_benchmark("routes.GET /employees", "/employees")
+_route_benchmark("routes.GET /offboarding/status", "/offboarding/status")
+_route_benchmark("routes.GET /reports", "/reports")
+_route_benchmark("routes.GET /enhanced-offboarding/status", "/enhanced-offboarding/status")
+_route_benchmark("routes.GET /enhanced-offboarding/overdue", "/enhanced-offboarding/overdue")
+_route_benchmark("routes.GET /enhanced-offboarding/team/it", "/enhanced-offboarding/team/it")
+
+
+@benchmark("routes.POST /enhanced-offboarding/<id>/update-task", "routes")
+def bench_route_update_task(env: BenchmarkEnvironment) -> Callable:
+    client = _route_client(env)
+
+    def run():
+        request_id = env.request_ids[env.next_index() % env.workflow_count]
+        client.post(f"/enhanced-offboarding/{request_id}/update-task", data={
+            "step_id": "step_5_exit_interview",
+            "task_id": "conduct_exit_interview",
+            "status": "in_progress",
+            "completed_by": "bench"
+        })
+    return run
+
+
+# Start-up
+
+def import_profile(module: str) -> Dict[str, Any]:
+    """
+    Import module in a fresh interpreter under -X importtime.
+
+    Returns the total import time, the number of modules loaded, the
+    slowest modules by cumulative time and which unwanted modules were loaded.
+    """
+    completed = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    imports = []
+    for line in completed.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        imports.append((name.strip(), int(cumulative), len(name) - len(name.lstrip())))
+    # Top-level imports are the least indented; their cumulative times add up to the total
+    depth = min(indent for _, _, indent in imports)
+    loaded = {name for name, _, _ in imports}
+    return {
+        "total_ms": sum(cumulative for _, cumulative, indent in imports if indent == depth) / 1000,
+        "modules": len(imports),
+        "slowest": [{"module": name, "cumulative_ms": cumulative / 1000}
+                    for name, cumulative, _ in sorted(imports, key=lambda entry: -entry[1])[:STARTUP_TOP]],
+        "unwanted": [name for name in STARTUP_UNWANTED if name in loaded],
+    }
+
+
+def _startup_benchmark(module: str):
+    @benchmark(f"startup.import {module}", "startup")
+    def bench(env: BenchmarkEnvironment) -> Callable:
+        def run():
+            env.import_profiles[module] = import_profile(module)
+        return run
+    return bench
+
+
+for _module in STARTUP_MODULES:
+    _startup_benchmark(_module)
+
+
+def measure(func: Callable, repeat: int) -> Dict[str, Any]:
+    """Time func repeat times and summarise the durations in seconds."""
+    func()  # warm-up
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+
+    return {
+        "repeat": repeat,
+        "min": min(durations),
+        "median": statistics.median(durations),
+        "mean": statistics.mean(durations),
+        "max": max(durations),
+    }
+
+
+def compare_to_baseline(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[Dict[str, Any]]:
+    """Annotate results with baseline ratios and return the regressions."""
+    regressions = []
+    for name, by_size in results["results"].items():
+        for size, stats in by_size.items():
+            base = baseline.get("results", {}).get(name, {}).get(size)
+            if not base or not base.get("median"):
+                continue
+            ratio = stats["median"] / base["median"]
+            stats["baseline_median"] = base["median"]
+            stats["ratio"] = ratio
+            stats["regressed"] = ratio > threshold
+            if stats["regressed"]:
+                regressions.append({"name": name, "size": size, "ratio": ratio})
+    return regressions
+
+
+def run_benchmarks(sizes: List[int], repeat: int = DEFAULT_REPEAT, groups: List[str] = None,
+                   max_workflows: int = DEFAULT_MAX_WORKFLOWS, seed: int = 0) -> Dict[str, Any]:
+    """Run the selected benchmark groups at every size."""
+    # The engine logs every create/update at INFO, which would dominate timings
+    logging.getLogger('modules.enhanced_workflow').setLevel(logging.WARNING)
+
+    results = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "sizes": sizes,
+            "repeat": repeat,
+            "seed": seed,
+            "max_workflows": max_workflows,
+        },
+        "results": {}
+    }
+
+    for size in sizes:
+        env = BenchmarkEnvironment(size, max_workflows, seed=seed)
+        try:
+            for bench in BENCHMARKS:
+                if groups and bench["group"] not in groups:
+                    continue
+                stats = measure(bench["setup"](env), repeat)
+                stats["workflows"] = env.workflow_count
+                results["results"].setdefault(bench["name"], {})[str(size)] = stats
+                print(f"{bench['name']:<55} n={size:<8} median={stats['median'] * 1000:10.3f} ms",
+                      file=sys.stderr)
+            for module, profile in env.import_profiles.items():
+                # Imports do not depend on the data size; the last run's profile is kept
+                results.setdefault("imports", {})[module] = profile
+                if profile["unwanted"]:
+                    print(f"startup: import {module} loads {', '.join(profile['unwanted'])}", file=sys.stderr)
+        finally:
+            env.cleanup()
+
+    return results
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Run the offboarding benchmark suite")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES,
+                        help="Roster sizes to benchmark (e.g. 1000 100000 1000000)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--groups", nargs="*", choices=["storage", "workflow", "tracker", "routes", "startup"])
+    parser.add_argument("--max-workflows", type=int, default=DEFAULT_MAX_WORKFLOWS)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous results JSON to compare against")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed median slowdown versus baseline (1.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.sizes, args.repeat, args.groups, args.max_workflows, args.seed)
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(results, baseline, args.threshold)
+        results["meta"]["baseline"] = args.baseline
+    results["meta"]["threshold"] = args.threshold
+    results["regressions"] = regressions
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    else:
+        print(output)
+
+    for regression in regressions:
+        print(f"REGRESSION {regression['name']} n={regression['size']}: "
+              f"{regression['ratio']:.2f}x baseline", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
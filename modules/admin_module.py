@@ -14,8 +14,7 @@ class AdminModule(BaseModule):
 
         # Only show actions if employee is resigned
         if self.selected_employee["status"] != "Resigned":
-            ttk.Label(
-                self.actions_frame,
+            self.create_action_label(
                 text="Employee must be marked as Resigned to perform Admin offboarding tasks",
                 wraplength=300
             ).pack(padx=5, pady=5)
@@ -85,23 +84,16 @@ class AdminModule(BaseModule):
                 return
 
             # Update employee data
-            self.json_handler.update_employee(
-                self.selected_employee["employee_id"],
+            self.save_employee(
                 {
                     "access_items_returned": returned,
                     "access_return_date": return_date.get()
-                }
-            )
-
-            self.show_message(
-                "Success",
+                },
                 f"Access items processed for {self.selected_employee['name']}\n" +
                 "Returned items:\n" +
                 "\n".join(f"- {item}" for item in returned)
             )
             dialog.destroy()
-            self.update_progress()
-            self.update_details()
 
         ttk.Button(
             dialog,
@@ -164,24 +156,17 @@ class AdminModule(BaseModule):
                 return
 
             # Update employee data
-            self.json_handler.update_employee(
-                self.selected_employee["employee_id"],
+            self.save_employee(
                 {
                     "facility_areas_cleared": cleared,
                     "facility_clearance_date": clearance_date.get(),
                     "facility_clearance_notes": notes.get("1.0", tk.END).strip()
-                }
-            )
-
-            self.show_message(
-                "Success",
+                },
                 f"Facility clearance processed for {self.selected_employee['name']}\n" +
                 "Cleared areas:\n" +
                 "\n".join(f"- {area}" for area in cleared)
             )
             dialog.destroy()
-            self.update_progress()
-            self.update_details()
 
         ttk.Button(
             dialog,
@@ -0,0 +1,156 @@
+import logging
+import queue
+import threading
+from typing import Dict, Any, List, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# How often the Tk side collects finished work while something is running
+POLL_INTERVAL_MS = 50
+
+
+class _Task:
+    def __init__(self, func: Callable, args: tuple, key, description: str, merge: Optional[Callable]):
+        self.func = func
+        self.args = args
+        self.key = key
+        self.description = description
+        self.merge = merge
+        self.on_done = None
+        self.on_error = None
+
+
+class BackgroundExecutor:
+    """
+    Runs storage work for the desktop modules off the Tk event loop.
+
+    Work runs in order on one worker thread, so writes stay in the order the
+    user made them. Results are handed back to the Tk thread by polling with
+    after(), so completion callbacks may touch widgets. Work submitted with
+    the key of work that has not started yet is coalesced into it (by
+    default the newest arguments win; merge can combine them) and its
+    outcome goes to the callbacks of the last caller only, so one save
+    reports once however often it was requested. A callback that raises is
+    logged and does not stop later results from being delivered.
+
+    Args:
+        widget: Any widget of the Tk application (used for after())
+    """
+
+    def __init__(self, widget):
+        self.widget = widget
+        self._queue = queue.Queue()
+        self._done = queue.Queue()
+        self._pending: Dict[Any, _Task] = {}  # key -> queued task not started yet
+        self._lock = threading.Lock()
+        self._running: Optional[_Task] = None
+        self._outstanding = 0
+        self._polling = False
+        self._listeners: List[Callable[[int, str], None]] = []
+        self._thread = threading.Thread(target=self._work, name="background-executor", daemon=True)
+        self._thread.start()
+
+    def submit(self, func: Callable, *args, key=None, description: str = "Working",
+               on_done: Callable = None, on_error: Callable = None, merge: Callable = None):
+        """
+        Run func(*args) on the worker thread (call from the Tk thread).
+
+        Args:
+            func: The blocking work
+            key: Coalesce with queued, not yet started work of the same key
+            description: Shown by progress listeners while the work runs
+            on_done: Called on the Tk thread with func's result (replaces the
+                callbacks of coalesced work)
+            on_error: Called on the Tk thread with the exception
+            merge: merge(queued_args, new_args) -> args for coalesced work
+        """
+        with self._lock:
+            task = self._pending.get(key) if key is not None else None
+            if task is not None:
+                task.args = task.merge(task.args, args) if task.merge else args
+                task.func = func
+                task.description = description
+                task.on_done, task.on_error = on_done, on_error
+                return
+            task = _Task(func, args, key, description, merge)
+            task.on_done, task.on_error = on_done, on_error
+            if key is not None:
+                self._pending[key] = task
+            self._outstanding += 1
+        self._queue.put(task)
+        self._notify()
+        self._ensure_polling()
+
+    def add_listener(self, listener: Callable[[int, str], None]):
+        """Call listener(outstanding work, description of the running work) on the Tk thread when it changes."""
+        self._listeners.append(listener)
+
+    def shutdown(self):
+        """Stop the worker after the queued work."""
+        self._queue.put(None)
+
+    def _work(self):
+        while True:
+            task = self._queue.get()
+            if task is None:
+                return
+            with self._lock:
+                if task.key is not None and self._pending.get(task.key) is task:
+                    del self._pending[task.key]
+                self._running = task
+            try:
+                self._done.put((task, task.func(*task.args), None))
+            except Exception as e:
+                self._done.put((task, None, e))
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.widget.after(POLL_INTERVAL_MS, self._poll)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    task, result, error = self._done.get_nowait()
+                except queue.Empty:
+                    break
+                with self._lock:
+                    self._outstanding -= 1
+                    if self._running is task:
+                        self._running = None
+                self._deliver(task, result, error)
+                self._notify()
+        finally:
+            # Keep polling whatever a callback did, or later results would never be delivered
+            if self._outstanding or not self._done.empty():
+                self.widget.after(POLL_INTERVAL_MS, self._poll)
+            else:
+                self._polling = False
+
+    @staticmethod
+    def _deliver(task: _Task, result, error: Optional[Exception]):
+        callback, value = (task.on_done, result) if error is None else (task.on_error, error)
+        if callback is None:
+            return
+        try:
+            callback(value)
+        except Exception:
+            logger.exception(f"Callback of background work '{task.description}' failed")
+
+    def _notify(self):
+        with self._lock:
+            outstanding = self._outstanding
+            running = self._running
+        description = running.description if running is not None else ""
+        for listener in self._listeners:
+            listener(outstanding, description)
+
+
+def get_executor(widget) -> BackgroundExecutor:
+    """The executor shared by all modules in widget's window."""
+    top = widget.winfo_toplevel()
+    executor = getattr(top, "_background_executor", None)
+    if executor is None:
+        executor = top._background_executor = BackgroundExecutor(top)
+    return executor
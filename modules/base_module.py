@@ -3,6 +3,10 @@ from tkinter import ttk, messagebox
 from typing import Dict, Any, List, Callable
 from utils.json_handler import JSONHandler
 from utils.offboarding_tracker import OffboardingTracker
+from utils.job_queue import get_job_queue
+from .background import get_executor
+from .employee_picker import EmployeePicker
+from .widget_pool import FieldView, WidgetPool
 
 class BaseModule(ttk.Frame):
     def __init__(self, parent, json_handler: JSONHandler, department: str):
@@ -10,8 +14,13 @@ class BaseModule(ttk.Frame):
         self.json_handler = json_handler
         self.department = department
         self.selected_employee = None
-        self.offboarding_tracker = OffboardingTracker()
+        self.offboarding_tracker = OffboardingTracker(json_handler.storage.offboarding_tracking)
+        # Slow actions are queued and run by `python -m utils.job_queue work`
+        self.job_queue = get_job_queue(json_handler.storage.data_dir)
+        # Storage writes run off the Tk event loop
+        self.executor = get_executor(parent)
         self.setup_ui()
+        self.executor.add_listener(self.show_busy)
 
     def setup_ui(self):
         """Setup the basic UI components."""
@@ -19,88 +28,129 @@ class BaseModule(ttk.Frame):
         selection_frame = ttk.LabelFrame(self, text="Select Employee")
         selection_frame.pack(fill=tk.X, padx=5, pady=5)
 
-        # Employee dropdown
-        self.employee_var = tk.StringVar()
-        self.employee_dropdown = ttk.Combobox(
-            selection_frame,
-            textvariable=self.employee_var,
-            state="readonly"
-        )
-        self.employee_dropdown.pack(fill=tk.X, padx=5, pady=5)
+        # Type-ahead employee picker (shows only the visible matches)
+        self.employee_picker = EmployeePicker(selection_frame, on_select=self.on_employee_select)
+        self.employee_picker.pack(fill=tk.X, padx=5, pady=5)
         self.update_employee_list()
-        self.employee_dropdown.bind('<<ComboboxSelected>>', self.on_employee_select)
 
         # Employee details frame
         self.details_frame = ttk.LabelFrame(self, text="Employee Details")
         self.details_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.details_view = FieldView(self.details_frame)
 
         # Offboarding progress frame
         self.progress_frame = ttk.LabelFrame(self, text="Offboarding Progress")
         self.progress_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.task_rows = {}  # task -> (status variable, row widgets)
 
         # Actions frame
         self.actions_frame = ttk.LabelFrame(self, text="Department Actions")
         self.actions_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+        self.action_pool = WidgetPool(self.actions_frame)
+
+        # Background work indicator
+        self.status_frame = ttk.Frame(self)
+        self.status_frame.pack(fill=tk.X, padx=5, pady=(0, 5))
+        self.busy_bar = ttk.Progressbar(self.status_frame, mode="indeterminate", length=120)
+        self.busy_label = ttk.Label(self.status_frame, text="")
+        self.busy_label.pack(side=tk.RIGHT)
 
     def update_employee_list(self):
-        """Update the employee dropdown list."""
-        employees = self.json_handler.get_all_employees()
-        self.employee_dropdown['values'] = [
-            f"{emp['name']} ({emp['employee_id']})" for emp in employees
-        ]
-
-    def on_employee_select(self, event):
-        """Handle employee selection from dropdown."""
-        selection = self.employee_var.get()
-        if selection:
-            employee_id = selection.split('(')[-1].strip(')')
+        """Reload the employee picker in the background (re-indexed only when employees changed)."""
+        def load():
+            # The storage's cached mapping is replaced on every change, so it is not copied here
+            return self.employee_picker.index_for(self.json_handler.storage.employees.records())
+
+        self.executor.submit(
+            load,
+            key=("employee_list", id(self)),
+            description="Loading employees",
+            on_done=self.employee_picker.set_index
+        )
+
+    def on_employee_select(self, employee_id: str):
+        """Handle employee selection from the picker."""
+        if employee_id:
             self.selected_employee = self.json_handler.get_employee_by_id(employee_id)
             self.update_details()
             self.update_progress()
-            self.update_actions()
+            self.refresh_actions()
+
+    def show_busy(self, outstanding: int, description: str):
+        """Show or hide the background work indicator."""
+        if outstanding:
+            if not self.busy_bar.winfo_ismapped():
+                self.busy_bar.pack(side=tk.RIGHT, padx=5)
+                self.busy_bar.start(10)
+            self.busy_label.configure(text=f"{description or 'Saving'}... ({outstanding} pending)")
+        else:
+            self.busy_bar.stop()
+            self.busy_bar.pack_forget()
+            self.busy_label.configure(text="")
+
+    def save_employee(self, changes: Dict[str, Any], message: str, on_saved: Callable = None):
+        """
+        Save changes to the selected employee in the background.
+
+        Saves of one employee that are still queued are merged into one write.
+        Once saved, the details and progress are refreshed and message is
+        shown, then on_saved() is called.
+        """
+        employee_id = self.selected_employee["employee_id"]
+
+        def saved(employee):
+            if self.selected_employee and self.selected_employee.get("employee_id") == employee_id and employee:
+                self.selected_employee = employee
+            self.show_message("Success", message)
+            self.update_progress()
+            self.update_details()
+            if on_saved is not None:
+                on_saved()
+
+        self.executor.submit(
+            self.json_handler.update_employee, employee_id, dict(changes),
+            key=("employee", employee_id),
+            description=f"Saving {self.selected_employee.get('name', employee_id)}",
+            merge=lambda queued, new: (queued[0], dict(queued[1], **new[1])),
+            on_done=saved,
+            on_error=lambda e: self.show_error("Error", f"Could not save changes: {e}")
+        )
 
     def update_details(self):
-        """Update employee details display."""
-        # Clear existing widgets
-        for widget in self.details_frame.winfo_children():
-            widget.destroy()
-
-        if not self.selected_employee:
-            return
-
-        # Create details display
-        row = 0
-        for key, value in self.selected_employee.items():
-            ttk.Label(self.details_frame, text=f"{key.replace('_', ' ').title()}:").grid(
-                row=row, column=0, sticky=tk.W, padx=5, pady=2
-            )
-            ttk.Label(self.details_frame, text=str(value)).grid(
-                row=row, column=1, sticky=tk.W, padx=5, pady=2
-            )
-            row += 1
+        """Update employee details display (only the values that changed are redrawn)."""
+        self.details_view.render(self.selected_employee)
 
     def update_progress(self):
-        """Update the offboarding progress display."""
-        # Clear existing widgets
-        for widget in self.progress_frame.winfo_children():
-            widget.destroy()
-
+        """Show the stored task statuses (task rows are built once and reused)."""
         if not self.selected_employee:
+            for _, widgets in self.task_rows.values():
+                for widget in widgets:
+                    widget.grid_remove()
             return
 
-        # Get department tasks
+        # Get department tasks and their stored statuses
         dept_tasks = self.offboarding_tracker.departments[self.department]["tasks"]
-        
+        tracking_data = self.offboarding_tracker.get_tracking(self.selected_employee["employee_id"])
+        statuses = tracking_data["departments"][self.department]["tasks"] if tracking_data else {}
+
         # Create progress display
-        row = 0
-        for task in dept_tasks:
+        for row, task in enumerate(dept_tasks):
+            status = statuses.get(task, "Pending")
+            if task in self.task_rows:
+                status_var, widgets = self.task_rows[task]
+                if status_var.get() != status:
+                    status_var.set(status)
+                if not widgets[0].winfo_manager():
+                    for widget in widgets:
+                        widget.grid()
+                continue
+
             # Task label
-            ttk.Label(self.progress_frame, text=task).grid(
-                row=row, column=0, sticky=tk.W, padx=5, pady=2
-            )
-            
+            task_label = ttk.Label(self.progress_frame, text=task)
+            task_label.grid(row=row, column=0, sticky=tk.W, padx=5, pady=2)
+
             # Task status
-            status_var = tk.StringVar(value="Pending")
+            status_var = tk.StringVar(value=status)
             status_dropdown = ttk.Combobox(
                 self.progress_frame,
                 textvariable=status_var,
@@ -109,7 +159,7 @@ class BaseModule(ttk.Frame):
                 width=15
             )
             status_dropdown.grid(row=row, column=1, padx=5, pady=2)
-            
+
             # Update button
             update_btn = ttk.Button(
                 self.progress_frame,
@@ -117,28 +167,55 @@ class BaseModule(ttk.Frame):
                 command=lambda t=task, s=status_var: self.update_task_status(t, s.get())
             )
             update_btn.grid(row=row, column=2, padx=5, pady=2)
-            
-            row += 1
+
+            self.task_rows[task] = (status_var, (task_label, status_dropdown, update_btn))
 
     def update_task_status(self, task: str, status: str):
-        """Update the status of a task."""
+        """Store the status of a task in the background."""
         if not self.selected_employee:
             self.show_error("Error", "No employee selected")
             return
 
-        # In a real application, you would save this to a database
-        self.show_message(
-            "Success",
-            f"Task '{task}' status updated to {status}"
+        employee = self.selected_employee
+
+        def saved(tracking_data):
+            if tracking_data is None:
+                self.show_error(
+                    "Error",
+                    f"Offboarding has not been started for {employee['name']}"
+                )
+            else:
+                self.show_message(
+                    "Success",
+                    f"Task '{task}' status updated to {status}"
+                )
+            self.update_progress()
+
+        self.executor.submit(
+            self.offboarding_tracker.set_task_status,
+            employee["employee_id"], self.department, task, status,
+            key=("task", employee["employee_id"], self.department, task),
+            description=f"Saving {task}",
+            on_done=saved,
+            on_error=lambda e: self.show_error("Error", f"Could not save task status: {e}")
         )
-        self.update_progress()
 
-    def update_actions(self):
-        """Update department-specific actions."""
-        # Clear existing widgets
-        for widget in self.actions_frame.winfo_children():
-            widget.destroy()
+    def refresh_actions(self):
+        """
+        Redraw the department actions.
 
+        update_actions() runs against the action pool: the widgets it asks
+        for are reused from earlier runs and the ones it no longer shows are
+        hidden, not destroyed.
+        """
+        self.action_pool.begin()
+        try:
+            self.update_actions()
+        finally:
+            self.action_pool.end()
+
+    def update_actions(self):
+        """Update department-specific actions (call refresh_actions() to redraw)."""
         if not self.selected_employee:
             return
 
@@ -146,11 +223,23 @@ class BaseModule(ttk.Frame):
         pass
 
     def create_action_button(self, text: str, command: Callable):
-        """Create a standard action button."""
-        return ttk.Button(
-            self.actions_frame,
-            text=text,
-            command=command
+        """Create a standard action button (reused across refresh_actions())."""
+        def create():
+            button = ttk.Button(self.actions_frame, text=text, command=command)
+            button.action_command = command
+            return button
+
+        button = self.action_pool.get(("button", text), create)
+        if button.action_command != command:
+            button.configure(command=command)
+            button.action_command = command
+        return button
+
+    def create_action_label(self, text: str, **options):
+        """Create an action area label (reused across refresh_actions())."""
+        return self.action_pool.get(
+            ("label", text),
+            lambda: ttk.Label(self.actions_frame, text=text, **options)
         )
 
     def show_message(self, title: str, message: str):
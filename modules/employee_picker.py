@@ -0,0 +1,229 @@
+import bisect
+import re
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Any, List, Callable, Iterator, Optional
+
+# Rows the result list shows; only these are ever inserted into the Listbox
+VISIBLE_ROWS = 10
+# Pause after a keystroke before searching, so fast typing searches once
+TYPE_DELAY_MS = 120
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def _words(text: str) -> List[str]:
+    return WORD_PATTERN.findall(text.lower())
+
+
+class EmployeeIndex:
+    """
+    Sorted prefix index over employee names and IDs.
+
+    Every word of an employee's name and the employee ID are keys of one
+    sorted array, so the employees whose name or ID starts with a prefix are
+    one contiguous slice found with bisect. Matches are produced lazily, so a
+    caller only pays for the rows it shows.
+    """
+
+    def __init__(self, employees: Dict[str, Dict[str, Any]]):
+        self.source = employees
+        self.labels = {}  # employee_id -> "Name (employee_id)"
+        entries = []
+        for employee_id, employee in employees.items():
+            if not isinstance(employee_id, str):
+                # Records without an employee_id are stored under ('unkeyed', n) and cannot be selected
+                continue
+            name = employee.get("name") or ""
+            self.labels[employee_id] = f"{name} ({employee_id})"
+            entries.append((employee_id.lower(), name.lower(), employee_id))
+            for word in _words(name):
+                entries.append((word, name.lower(), employee_id))
+        entries.sort()
+        self._keys = [entry[0] for entry in entries]
+        self._ids = [entry[2] for entry in entries]
+        # All employees by name, for an empty query
+        self._by_name = sorted(self.labels, key=lambda employee_id: (self.labels[employee_id].lower(), employee_id))
+
+    def __len__(self):
+        return len(self.labels)
+
+    def _range(self, prefix: str) -> range:
+        start = bisect.bisect_left(self._keys, prefix)
+        end = bisect.bisect_left(self._keys, prefix + "\U0010ffff", start)
+        return range(start, end)
+
+    def estimate(self, query: str) -> int:
+        """Upper bound of the number of matches, without producing them."""
+        words = _words(query)
+        if not words:
+            return len(self.labels)
+        return min(len(self._range(word)) for word in words)
+
+    def matches(self, query: str) -> Iterator[str]:
+        """
+        Employee IDs whose name words or ID start with every word of query.
+
+        Yields each employee once, in key order of the query's most selective word.
+        """
+        words = _words(query)
+        if not words:
+            yield from self._by_name
+            return
+        ranges = sorted(((self._range(word), word) for word in words), key=lambda item: len(item[0]))
+        positions, _ = ranges[0]
+        others = [word for _, word in ranges[1:]]
+        seen = set()
+        for position in positions:
+            employee_id = self._ids[position]
+            if employee_id in seen:
+                continue
+            seen.add(employee_id)
+            if others:
+                keys = _words(self.labels[employee_id])
+                if not all(any(key.startswith(word) for key in keys) for word in others):
+                    continue
+            yield employee_id
+
+
+class EmployeePicker(ttk.Frame):
+    """
+    Type-ahead employee picker.
+
+    Typing filters the employees through an EmployeeIndex; the list shows a
+    window of VISIBLE_ROWS matches and fetches further matches only when it
+    is scrolled to them.
+
+    Args:
+        parent: Parent widget
+        on_select: Called with the employee ID when an employee is picked
+    """
+
+    def __init__(self, parent, on_select: Callable[[str], None]):
+        super().__init__(parent)
+        self.on_select = on_select
+        self.index: Optional[EmployeeIndex] = None
+        self._matches: List[str] = []  # Matches fetched so far
+        self._pending: Optional[Iterator[str]] = None  # Generator of the rest, None when exhausted
+        self._estimate = 0
+        self._offset = 0  # First match shown
+        self._search_job = None
+
+        self.query_var = tk.StringVar()
+        self.entry = ttk.Entry(self, textvariable=self.query_var)
+        self.entry.pack(fill=tk.X)
+
+        list_frame = ttk.Frame(self)
+        list_frame.pack(fill=tk.X)
+        self.listbox = tk.Listbox(list_frame, height=VISIBLE_ROWS, activestyle="dotbox", exportselection=False)
+        self.listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.count_label = ttk.Label(self, text="")
+        self.count_label.pack(anchor=tk.W)
+
+        self.query_var.trace_add("write", lambda *args: self._schedule_search())
+        self.entry.bind("<Down>", lambda event: self._move(1))
+        self.entry.bind("<Up>", lambda event: self._move(-1))
+        self.entry.bind("<Next>", lambda event: self._move(VISIBLE_ROWS))
+        self.entry.bind("<Prior>", lambda event: self._move(-VISIBLE_ROWS))
+        self.entry.bind("<Return>", lambda event: self._pick())
+        self.listbox.bind("<Down>", lambda event: self._move(1))
+        self.listbox.bind("<Up>", lambda event: self._move(-1))
+        self.listbox.bind("<Return>", lambda event: self._pick())
+        self.listbox.bind("<<ListboxSelect>>", lambda event: self._pick())
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.listbox.bind(sequence, self._on_wheel)
+
+    def index_for(self, employees: Dict[str, Dict[str, Any]]) -> EmployeeIndex:
+        """Index of employees by employee_id: the current one if the mapping is unchanged (any thread)."""
+        index = self.index
+        if index is not None and index.source is employees:
+            return index
+        return EmployeeIndex(employees)
+
+    def set_index(self, index: EmployeeIndex):
+        """Show the employees of index (Tk thread)."""
+        if index is not self.index:
+            self.index = index
+            self._search()
+
+    def _schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(TYPE_DELAY_MS, self._search)
+
+    def _search(self):
+        self._search_job = None
+        if self.index is None:
+            return
+        query = self.query_var.get()
+        self._matches = []
+        self._pending = self.index.matches(query)
+        self._estimate = self.index.estimate(query)
+        self._offset = 0
+        self._render()
+
+    def _fetch(self, count: int):
+        """Make sure the first count matches are fetched."""
+        while self._pending is not None and len(self._matches) < count:
+            try:
+                self._matches.append(next(self._pending))
+            except StopIteration:
+                self._pending = None
+        if self._pending is None:
+            self._estimate = len(self._matches)
+
+    def _render(self):
+        self._fetch(self._offset + VISIBLE_ROWS + 1)
+        self._offset = max(0, min(self._offset, len(self._matches) - VISIBLE_ROWS))
+        window = self._matches[self._offset:self._offset + VISIBLE_ROWS]
+        self.listbox.delete(0, tk.END)
+        for employee_id in window:
+            self.listbox.insert(tk.END, self.index.labels[employee_id])
+
+        total = max(self._estimate, len(self._matches), 1)
+        self.scrollbar.set(self._offset / total, min(1.0, (self._offset + len(window)) / total))
+        if self._pending is None:
+            self.count_label.configure(text=f"{len(self._matches)} of {len(self.index)} employees")
+        else:
+            self.count_label.configure(text=f"Up to {total} of {len(self.index)} employees")
+
+    def _scroll_to(self, offset: int):
+        self._offset = max(0, offset)
+        self._render()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == tk.MOVETO:
+            # Dragging far ahead fetches the matches up to that point
+            self._scroll_to(int(float(amount) * max(self._estimate, len(self._matches))))
+        elif action == tk.SCROLL:
+            step = VISIBLE_ROWS if unit == tk.PAGES else 1
+            self._scroll_to(self._offset + int(amount) * step)
+
+    def _on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll_to(self._offset - 3)
+        else:
+            self._scroll_to(self._offset + 3)
+        return "break"
+
+    def _move(self, rows: int):
+        selection = self.listbox.curselection()
+        row = (selection[0] if selection else -1) + rows
+        if row < 0 or row >= VISIBLE_ROWS:
+            self._scroll_to(self._offset + rows)
+            row = max(0, min(row, VISIBLE_ROWS - 1))
+        row = min(row, self.listbox.size() - 1)
+        self.listbox.selection_clear(0, tk.END)
+        if row >= 0:
+            self.listbox.selection_set(row)
+            self.listbox.activate(row)
+        return "break"
+
+    def _pick(self):
+        selection = self.listbox.curselection()
+        if not selection:
+            return "break"
+        employee_id = self._matches[self._offset + selection[0]]
+        self.on_select(employee_id)
+        return "break"
@@ -14,17 +14,25 @@ Workflow Overview:
 6. Post-LWD Processing (1 week after)
 7. Final Closure (People Ops)
 
-Each step is clearly defined with responsible teams and specific tasks.
+Each step is clearly defined with responsible teams and specific tasks. The
+steps and tasks come from the workflow definitions in data/workflow_definitions/
+(see utils.workflow_definitions), so other templates can be used per reason
+for leaving and location.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Any, Optional
 from enum import Enum
+import bisect
 import json
 import logging
+import threading
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
+from utils.business_calendar import DueRule, get_business_calendar, order_rules, parse_datetime
+from utils.storage import MemoryCollection
+from utils.workflow_definitions import LEGACY_TEMPLATE, WorkflowTemplate, get_workflow_definitions
+
+# Entry points configure logging; importing the engine must not
 logger = logging.getLogger(__name__)
 
 
@@ -56,6 +64,71 @@ class ReasonForLeaving(Enum):
     MUTUAL_AGREEMENT = "mutual_agreement"
 
 
+def _team_value(team):
+    """Return a TeamResponsibility (or a list of them) as its stored value."""
+    if isinstance(team, list):
+        return [t.value for t in team]
+    return team.value
+
+
+class _DueDateIndex:
+    """
+    Due times of every open workflow step, kept sorted for overdue lookups.
+    
+    The store replaces a workflow's record object whenever it changes, so
+    syncing compares record identities and re-indexes only new or changed
+    workflows, whichever process wrote them.
+    """
+    
+    def __init__(self):
+        self._entries = []  # Sorted (timestamp, request_id, step_id)
+        self._by_request = {}  # request_id -> (indexed record, its entries)
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _step_entries(request_id: str, workflow: Dict[str, Any]) -> List[tuple]:
+        return [(parse_datetime(step["due_date"]).timestamp(), request_id, step_id)
+                for step_id, step in workflow["steps"].items()
+                if step["status"] != WorkflowStatus.COMPLETED.value and step.get("due_date")]
+    
+    def _remove(self, request_id: str):
+        for entry in self._by_request.pop(request_id)[1]:
+            del self._entries[bisect.bisect_left(self._entries, entry)]
+    
+    def _sync(self, workflows: Dict[str, Dict[str, Any]]):
+        if not self._by_request:
+            # First build: sort once instead of inserting entry by entry
+            for request_id, workflow in workflows.items():
+                self._by_request[request_id] = (workflow, self._step_entries(request_id, workflow))
+            self._entries = sorted(entry for _, entries in self._by_request.values() for entry in entries)
+            return
+        
+        for request_id in [r for r in self._by_request if r not in workflows]:
+            self._remove(request_id)
+        for request_id, workflow in workflows.items():
+            indexed = self._by_request.get(request_id)
+            if indexed is not None and indexed[0] is workflow:
+                continue
+            if indexed is not None:
+                self._remove(request_id)
+            entries = self._step_entries(request_id, workflow)
+            for entry in entries:
+                bisect.insort(self._entries, entry)
+            self._by_request[request_id] = (workflow, entries)
+    
+    def sync(self, workflows: Dict[str, Dict[str, Any]]):
+        """Bring the index in line with the store's current workflows by request ID."""
+        with self._lock:
+            self._sync(workflows)
+    
+    def due_before(self, workflows: Dict[str, Dict[str, Any]], moment: datetime) -> List[tuple]:
+        """(request_id, step_id) of open steps in workflows due before moment, earliest first."""
+        with self._lock:
+            self._sync(workflows)
+            end = bisect.bisect_left(self._entries, (moment.timestamp(),))
+            return [(request_id, step_id) for _, request_id, step_id in self._entries[:end]]
+
+
 class EnhancedOffboardingWorkflow:
     """
     Enhanced Employee Offboarding Workflow System
@@ -64,293 +137,48 @@ class EnhancedOffboardingWorkflow:
     timing requirements, and task dependencies.
     """
     
-    def __init__(self):
-        """Initialize the enhanced workflow system."""
-        self.workflow_steps = self._initialize_workflow_steps()
-        self.active_workflows = {}
-        
-    def _initialize_workflow_steps(self) -> Dict[str, Dict]:
+    def __init__(self, store=None, calendar=None, definitions=None):
         """
-        Initialize the complete workflow structure with all steps, teams, and timing.
-        
-        Returns:
-            Dict containing all workflow steps with their configurations
+        Initialize the enhanced workflow system.
+
+        Args:
+            store: Collection keyed by request_id that persists workflows
+                (e.g. StorageService.workflows); workflows are only kept in
+                memory when omitted
+            calendar: BusinessCalendar for due dates (default: data/business_calendar.json,
+                loaded on first use)
+            definitions: WorkflowDefinitions with the step and task templates
+                (default: data/workflow_definitions/, loaded on first use)
         """
-        return {
-            "step_1_initial_request": {
-                "name": "Initial Request by Line Manager",
-                "responsible_team": TeamResponsibility.LINE_MANAGER,
-                "timing": "Day 0",
-                "description": "Line Manager initiates offboarding request with employee details",
-                "tasks": [
-                    {
-                        "id": "capture_employee_details",
-                        "name": "Capture Employee Details",
-                        "description": "Collect employee ID, name, email, LWD, and reason for leaving",
-                        "required_fields": ["employee_id", "name", "email", "last_working_day", "reason_for_leaving"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "validate_request",
-                        "name": "Validate Request",
-                        "description": "Ensure all required information is complete and accurate",
-                        "dependencies": ["capture_employee_details"],
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_2_people_ops_review": {
-                "name": "People Ops Review and Documentation",
-                "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                "timing": "Within 1 day",
-                "description": "People Ops reviews details and secures required documents",
-                "tasks": [
-                    {
-                        "id": "review_employee_details",
-                        "name": "Review Employee Details",
-                        "description": "Review and validate all submitted employee information",
-                        "dependencies": ["step_1_initial_request"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "secure_signed_documents",
-                        "name": "Secure Signed Documents",
-                        "description": "Collect and verify all required signed documents",
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "raise_it_ticket",
-                        "name": "Raise IT Ticket (Azure)",
-                        "description": "Create IT ticket in Azure for access revocation and device collection",
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_3_pre_lwd_processing": {
-                "name": "Pre-LWD Processing (1 week before LWD)",
-                "responsible_team": [TeamResponsibility.PEOPLE_OPS, TeamResponsibility.CORPORATE_DEVELOPMENT, TeamResponsibility.FINANCE],
-                "timing": "1 week before LWD",
-                "description": "Process termination in systems and handle equity/financial matters",
-                "tasks": [
-                    {
-                        "id": "process_zenhr_termination",
-                        "name": "Process Termination in ZenHR",
-                        "description": "Update employee status in ZenHR system",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "cancel_insurance_gosi_qiwa",
-                        "name": "Cancel Insurance, GOSI, Qiwa",
-                        "description": "Cancel employee benefits and government registrations",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "calculate_eos",
-                        "name": "Calculate EOS (End of Service)",
-                        "description": "Calculate end of service benefits",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "notify_corporate_dev",
-                        "name": "Notify Corporate Development",
-                        "description": "Inform Corporate Development team about employee departure",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "handle_equity_matters",
-                        "name": "Handle Equity Matters",
-                        "description": "Process equity-related matters and updates",
-                        "responsible_team": TeamResponsibility.CORPORATE_DEVELOPMENT,
-                        "dependencies": ["notify_corporate_dev"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "update_personal_email",
-                        "name": "Update Personal Email",
-                        "description": "Update employee's personal email for future communications",
-                        "responsible_team": TeamResponsibility.CORPORATE_DEVELOPMENT,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "close_hala_card",
-                        "name": "Close HALA Card",
-                        "description": "Close employee's HALA card account",
-                        "responsible_team": TeamResponsibility.FINANCE,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "settle_loans",
-                        "name": "Settle Loans",
-                        "description": "Process any outstanding loan settlements",
-                        "responsible_team": TeamResponsibility.FINANCE,
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_4_lwd_it_facilities": {
-                "name": "LWD Processing (IT & Facilities)",
-                "responsible_team": [TeamResponsibility.IT, TeamResponsibility.FACILITIES],
-                "timing": "On LWD",
-                "description": "IT revokes access and collects devices, Facilities collects property",
-                "tasks": [
-                    {
-                        "id": "revoke_system_access",
-                        "name": "Revoke System Access",
-                        "description": "Revoke all system and application access",
-                        "responsible_team": TeamResponsibility.IT,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "backup_employee_files",
-                        "name": "Backup Employee Files",
-                        "description": "Create backup of employee's work files and data",
-                        "responsible_team": TeamResponsibility.IT,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "collect_company_devices",
-                        "name": "Collect Company Devices",
-                        "description": "Collect all company-issued devices (laptop, phone, etc.)",
-                        "responsible_team": TeamResponsibility.IT,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "collect_access_cards",
-                        "name": "Collect Access Cards",
-                        "description": "Collect building and system access cards",
-                        "responsible_team": TeamResponsibility.FACILITIES,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "collect_parking_permits",
-                        "name": "Collect Parking Permits",
-                        "description": "Collect parking permits and related items",
-                        "responsible_team": TeamResponsibility.FACILITIES,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "collect_other_property",
-                        "name": "Collect Other Property",
-                        "description": "Collect any other company property (keys, equipment, etc.)",
-                        "responsible_team": TeamResponsibility.FACILITIES,
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_5_exit_interview": {
-                "name": "Exit Interview (HR)",
-                "responsible_team": TeamResponsibility.HR,
-                "timing": "On LWD",
-                "description": "Conduct exit interview and collect feedback",
-                "tasks": [
-                    {
-                        "id": "conduct_exit_interview",
-                        "name": "Conduct Exit Interview",
-                        "description": "Conduct comprehensive exit interview with employee",
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "collect_feedback",
-                        "name": "Collect Feedback",
-                        "description": "Document employee feedback and suggestions",
-                        "dependencies": ["conduct_exit_interview"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "document_interview",
-                        "name": "Document Interview",
-                        "description": "Create official documentation of exit interview",
-                        "dependencies": ["collect_feedback"],
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_6_post_lwd_processing": {
-                "name": "Post-LWD Processing (1 week after)",
-                "responsible_team": [TeamResponsibility.FINANCE, TeamResponsibility.PEOPLE_OPS],
-                "timing": "1 week after LWD",
-                "description": "Process final payment and provide experience certificate",
-                "tasks": [
-                    {
-                        "id": "process_final_payment",
-                        "name": "Process Final Payment",
-                        "description": "Process and release final salary and benefits payment",
-                        "responsible_team": TeamResponsibility.FINANCE,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "provide_experience_certificate",
-                        "name": "Provide Experience Certificate",
-                        "description": "Generate and provide experience certificate",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "provide_reference_documents",
-                        "name": "Provide Reference Documents",
-                        "description": "Prepare and provide reference letters and documents",
-                        "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            },
-            
-            "step_7_final_closure": {
-                "name": "Final Closure (People Ops)",
-                "responsible_team": TeamResponsibility.PEOPLE_OPS,
-                "timing": "After all steps completed",
-                "description": "Confirm all steps completed and close the process",
-                "tasks": [
-                    {
-                        "id": "verify_all_steps_completed",
-                        "name": "Verify All Steps Completed",
-                        "description": "Review and verify all workflow steps are completed",
-                        "dependencies": ["step_1_initial_request", "step_2_people_ops_review", 
-                                       "step_3_pre_lwd_processing", "step_4_lwd_it_facilities",
-                                       "step_5_exit_interview", "step_6_post_lwd_processing"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "close_jira_ticket",
-                        "name": "Close Jira Ticket",
-                        "description": "Close the offboarding ticket in Jira system",
-                        "dependencies": ["verify_all_steps_completed"],
-                        "status": WorkflowStatus.PENDING
-                    },
-                    {
-                        "id": "archive_employee_files",
-                        "name": "Archive Employee Files",
-                        "description": "Archive all employee-related files and documents",
-                        "dependencies": ["verify_all_steps_completed"],
-                        "status": WorkflowStatus.PENDING
-                    }
-                ],
-                "status": WorkflowStatus.PENDING,
-                "due_date": None
-            }
-        }
-    
+        self._calendar = calendar
+        self._definitions = definitions
+        self._template_steps = {}  # (template id, version) -> initial steps with calendar rules
+        self._due_index = _DueDateIndex()
+        self._store = store if store is not None else MemoryCollection("request_id")
+
+    @property
+    def calendar(self):
+        """BusinessCalendar for due dates."""
+        if self._calendar is None:
+            self._calendar = get_business_calendar()
+        return self._calendar
+
+    @property
+    def definitions(self):
+        """WorkflowDefinitions with the step and task templates."""
+        if self._definitions is None:
+            self._definitions = get_workflow_definitions()
+        return self._definitions
+
+    @property
+    def active_workflows(self) -> Dict[str, Dict[str, Any]]:
+        """All workflows by request ID (read-only; change them through the engine methods)."""
+        return self._store.records()
+
+    def workflow_versions(self) -> Dict[str, int]:
+        """Version of each workflow by request ID; it changes whenever the workflow is written."""
+        return self._store.versions()
+        
     def create_offboarding_request(self, employee_data: Dict[str, Any]) -> str:
         """
         Create a new offboarding request with the enhanced workflow.
@@ -365,92 +193,289 @@ class EnhancedOffboardingWorkflow:
                 - line_manager: Line manager name
                 - department: Employee department
                 - position: Employee position
+                - location: Work location (selects the holiday calendar and time zone)
         
         Returns:
             str: Request ID for the created offboarding request
         """
-        try:
-            # Validate required fields
-            required_fields = ["employee_id", "name", "email", "last_working_day", "reason_for_leaving"]
-            for field in required_fields:
-                if field not in employee_data:
-                    raise ValueError(f"Missing required field: {field}")
-            
-            # Validate reason for leaving
-            if employee_data["reason_for_leaving"] not in [reason.value for reason in ReasonForLeaving]:
-                raise ValueError(f"Invalid reason for leaving: {employee_data['reason_for_leaving']}")
-            
-            # Generate request ID
-            request_id = f"OB-{employee_data['employee_id']}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
-            
-            # Calculate due dates based on LWD
-            lwd = datetime.strptime(employee_data["last_working_day"], "%Y-%m-%d")
-            
-            # Initialize workflow with calculated due dates
-            workflow_data = {
-                "request_id": request_id,
-                "employee_data": employee_data,
-                "created_date": datetime.now().isoformat(),
-                "status": WorkflowStatus.PENDING.value,
-                "steps": self._initialize_workflow_with_dates(lwd),
-                "current_step": "step_1_initial_request",
-                "overall_progress": 0,
-                "notes": [],
-                "attachments": []
-            }
+        return self.create_offboarding_requests([employee_data])[0]
+    
+    def create_offboarding_requests(self, employee_data_list: List[Dict[str, Any]],
+                                    request_ids: List[str] = None,
+                                    extra_fields: List[Dict[str, Any]] = None) -> List[str]:
+        """
+        Create several offboarding requests, computing their due dates in one batch.
+        
+        Args:
+            employee_data_list: Employee dictionaries as for create_offboarding_request
+            request_ids: IDs to use instead of generated ones, one per employee
+                (for requests imported from elsewhere)
+            extra_fields: Fields to add to each workflow, one dict per employee
             
-            # Store workflow
-            self.active_workflows[request_id] = workflow_data
+        Returns:
+            List of request IDs, in the order of employee_data_list
             
-            logger.info(f"Created offboarding request {request_id} for employee {employee_data['employee_id']}")
+        Raises:
+            ValueError: If a given request ID is already taken. Generated IDs
+                (OB-<employee>-<timestamp>) that are taken, e.g. by a second
+                request for the employee within the same second, get a
+                -2, -3, ... suffix instead.
+        """
+        try:
+            created_date = datetime.now().isoformat()
+            workflows = []
+            for position, employee_data in enumerate(employee_data_list):
+                # Validate required fields
+                required_fields = ["employee_id", "name", "email", "last_working_day", "reason_for_leaving"]
+                for field in required_fields:
+                    if field not in employee_data:
+                        raise ValueError(f"Missing required field: {field}")
+                
+                # Validate reason for leaving
+                if employee_data["reason_for_leaving"] not in [reason.value for reason in ReasonForLeaving]:
+                    raise ValueError(f"Invalid reason for leaving: {employee_data['reason_for_leaving']}")
+                
+                # Validate LWD
+                datetime.strptime(employee_data["last_working_day"], "%Y-%m-%d")
+                
+                # Generate request ID
+                if request_ids is not None:
+                    request_id = request_ids[position]
+                else:
+                    request_id = f"OB-{employee_data['employee_id']}-{datetime.now().strftime('%Y%m%d%H%M%S')}"
+                
+                # Pick the template for the reason and location; the workflow stays on this version
+                template = self.definitions.select(employee_data["reason_for_leaving"], employee_data.get("location"))
+                
+                workflows.append({
+                    "request_id": request_id,
+                    "employee_data": employee_data,
+                    "created_date": created_date,
+                    "template": {"id": template.id, "version": template.version},
+                    "status": WorkflowStatus.PENDING.value,
+                    "steps": self._initialize_workflow_steps_state(template),
+                    "current_step": next(iter(template.steps)),
+                    "overall_progress": 0,
+                    "notes": [],
+                    "attachments": [],
+                    "history": [],
+                    **(extra_fields[position] if extra_fields is not None else {})
+                })
             
-            return request_id
+            # Calculate due dates for the whole batch from each LWD and location
+            self._assign_due_dates(workflows)
+            
+            # Check the IDs and store under the store's write lock, so no workflow is overwritten
+            with self._store.transaction():
+                taken = set()
+                for workflow_data in workflows:
+                    request_id = base_id = workflow_data["request_id"]
+                    suffix = 1
+                    while request_id in taken or self._store.get(request_id, copy=False) is not None:
+                        if request_ids is not None:
+                            raise ValueError(f"Offboarding request {request_id} already exists")
+                        suffix += 1
+                        request_id = f"{base_id}-{suffix}"
+                    workflow_data["request_id"] = request_id
+                    taken.add(request_id)
+                self._store.put_many(workflows)
+            
+            for workflow_data in workflows:
+                logger.info(f"Created offboarding request {workflow_data['request_id']} "
+                            f"for employee {workflow_data['employee_data']['employee_id']}")
+            
+            return [workflow_data["request_id"] for workflow_data in workflows]
             
         except Exception as e:
             logger.error(f"Error creating offboarding request: {str(e)}")
             raise
     
-    def _initialize_workflow_with_dates(self, lwd: datetime) -> Dict[str, Any]:
+    def _template_for(self, workflow: Dict[str, Any]) -> WorkflowTemplate:
+        """The template a workflow is pinned to."""
+        pinned = workflow.get("template")
+        if pinned is None:
+            return self.definitions.get(*LEGACY_TEMPLATE)
+        return self.definitions.get(pinned["id"], pinned["version"])
+    
+    def _initialize_workflow_steps_state(self, template: WorkflowTemplate) -> Dict[str, Any]:
         """
-        Initialize workflow steps with calculated due dates based on LWD.
+        Initialize the per-workflow copy of a template's steps (due dates are set by _assign_due_dates).
         
         Args:
-            lwd: Last working day datetime object
+            template: Compiled workflow template
             
         Returns:
-            Dict containing workflow steps with calculated due dates
+            Dict containing workflow steps with pending statuses
         """
+        if template.key not in self._template_steps:
+            # The calendar may override a step's due rule; resolve that once per template
+            rules = self.calendar.rules_for(template.steps)
+            order_rules(rules)
+            self._template_steps[template.key] = {
+                step_id: dict(step, due_rule=rules[step_id].to_dict()) for step_id, step in template.steps.items()
+            }
+        
+        # Copy step and task dicts so workflows do not share task state
         workflow_steps = {}
+        for step_id, step_template in self._template_steps[template.key].items():
+            step_data = step_template.copy()
+            step_data["tasks"] = [dict(task, notes=[]) for task in step_template["tasks"]]
+            workflow_steps[step_id] = step_data
+        return workflow_steps
+    
+    @staticmethod
+    def _due_date_anchors(workflow: Dict[str, Any]) -> Dict[str, Any]:
+        """Calendar anchors of a workflow: LWD, creation, location and step completions."""
+        return {
+            "lwd": workflow["employee_data"]["last_working_day"],
+            "created": workflow["created_date"],
+            "location": workflow["employee_data"].get("location"),
+            "completed": {step_id: step["completed_date"] for step_id, step in workflow["steps"].items()
+                          if step.get("completed_date")}
+        }
+    
+    def _assign_due_dates(self, workflows: List[Dict[str, Any]], only: List[Any] = None) -> None:
+        """
+        Set step due dates of workflows from their stored due rules, in one calendar batch.
+        
+        Args:
+            workflows: Workflow data dictionaries (changed in place)
+            only: Step IDs to recompute, one collection per workflow (default: all steps)
+        """
+        # Workflows created from the same definition share rules, so batch them by rule set
+        batches = {}
+        for position, workflow in enumerate(workflows):
+            rules = tuple((step_id, tuple(sorted((step.get("due_rule") or {}).items())))
+                          for step_id, step in workflow["steps"].items())
+            batches.setdefault(rules, []).append(position)
         
-        for step_id, step_config in self.workflow_steps.items():
-            step_data = step_config.copy()
-            
-            # Calculate due dates based on timing requirements
-            if step_id == "step_1_initial_request":
-                step_data["due_date"] = datetime.now().isoformat()
-            elif step_id == "step_2_people_ops_review":
-                step_data["due_date"] = (datetime.now() + timedelta(days=1)).isoformat()
-            elif step_id == "step_3_pre_lwd_processing":
-                step_data["due_date"] = (lwd - timedelta(days=7)).isoformat()
-            elif step_id == "step_4_lwd_it_facilities":
-                step_data["due_date"] = lwd.isoformat()
-            elif step_id == "step_5_exit_interview":
-                step_data["due_date"] = lwd.isoformat()
-            elif step_id == "step_6_post_lwd_processing":
-                step_data["due_date"] = (lwd + timedelta(days=7)).isoformat()
-            elif step_id == "step_7_final_closure":
-                step_data["due_date"] = (lwd + timedelta(days=14)).isoformat()
-            
-            # Initialize task statuses
-            for task in step_data["tasks"]:
-                task["status"] = WorkflowStatus.PENDING.value
-                task["completed_date"] = None
-                task["completed_by"] = None
-                task["notes"] = []
+        for positions in batches.values():
+            batch = [workflows[position] for position in positions]
+            wanted = None
+            if only is not None:
+                wanted = set().union(*(only[position] for position in positions))
+                if not wanted:
+                    continue
+            rules = self._stored_rules(batch[0])
+            due_dates = self.calendar.compute_due_dates(
+                rules, [self._due_date_anchors(workflow) for workflow in batch], wanted
+            )
+            for position, workflow, dates in zip(positions, batch, due_dates):
+                for step_id, due_date in dates.items():
+                    if only is None or step_id in only[position]:
+                        workflow["steps"][step_id]["due_date"] = due_date
+    
+    def _stored_rules(self, workflow: Dict[str, Any]) -> Dict[str, DueRule]:
+        """Due rules stored with a workflow's steps (its template's rules for steps stored without them)."""
+        rules = {}
+        for step_id, step in workflow["steps"].items():
+            if step.get("due_rule"):
+                rules[step_id] = DueRule.from_dict(step["due_rule"])
+            else:
+                rules[step_id] = self._template_for(workflow).rules[step_id]
+        return rules
+    
+    def _dependent_steps(self, step_id: str, workflow: Dict[str, Any]) -> List[str]:
+        """Step IDs whose due dates follow (directly or indirectly) from step_id's completion."""
+        rules = self._stored_rules(workflow)
+        dependents = [step_id]
+        for candidate in order_rules(rules):
+            if rules[candidate].anchor_step in dependents:
+                dependents.append(candidate)
+        return dependents[1:]
+    
+    def _lwd_dependent_steps(self, workflow: Dict[str, Any]) -> List[str]:
+        """Open step IDs whose due dates follow (directly or through open steps) from the LWD."""
+        steps = workflow["steps"]
+        rules = self._stored_rules(workflow)
+        affected = []
+        for step_id in order_rules(rules):
+            if steps[step_id]["status"] == WorkflowStatus.COMPLETED.value:
+                continue
+            if rules[step_id].anchor == "lwd" or rules[step_id].anchor_step in affected:
+                affected.append(step_id)
+        return affected
+    
+    def reschedule(self, request_id: str, new_lwd: str, changed_by: str = None) -> bool:
+        """
+        Move a workflow's last working day and recompute the due dates that depend on it.
+        
+        Args:
+            request_id: The offboarding request ID
+            new_lwd: New last working day (YYYY-MM-DD)
+            changed_by: Name/ID of person making the change
             
-            workflow_steps[step_id] = step_data
+        Returns:
+            bool: True if the workflow exists and now has new_lwd, False otherwise
+        """
+        try:
+            if request_id in self.reschedule_many({request_id: new_lwd}, changed_by):
+                return True
+            return self._store.get(request_id, copy=False) is not None
+        except Exception as e:
+            logger.error(f"Error rescheduling workflow: {str(e)}")
+            return False
+    
+    def reschedule_many(self, new_lwds: Dict[str, str], changed_by: str = None) -> List[str]:
+        """
+        Move the last working day of several workflows, computing their new due dates in one batch.
         
-        return workflow_steps
+        Completed steps, steps anchored on the request's creation and steps
+        anchored on a completed step keep their due dates. Task state is kept.
+        
+        Args:
+            new_lwds: New last working day (YYYY-MM-DD) by request ID
+            changed_by: Name/ID of person making the change
+            
+        Returns:
+            List of the request IDs that were rescheduled (unknown IDs and
+            unchanged dates are skipped)
+        """
+        for new_lwd in new_lwds.values():
+            datetime.strptime(new_lwd, "%Y-%m-%d")
+        
+        # Read, recompute and write under one write lock so no task update in between is lost
+        with self._store.transaction():
+            workflows, affected = [], []
+            for request_id, new_lwd in new_lwds.items():
+                workflow = self._store.get(request_id)
+                if workflow is None:
+                    logger.warning(f"Cannot reschedule unknown request {request_id}")
+                    continue
+                if workflow["employee_data"]["last_working_day"] == new_lwd:
+                    continue
+                workflow["history"].append({
+                    "date": datetime.now().isoformat(),
+                    "event": "rescheduled",
+                    "from_lwd": workflow["employee_data"]["last_working_day"],
+                    "to_lwd": new_lwd,
+                    "changed_by": changed_by,
+                    "due_dates": {}
+                })
+                workflow["employee_data"]["last_working_day"] = new_lwd
+                workflows.append(workflow)
+                affected.append(self._lwd_dependent_steps(workflow))
+            
+            previous = [{step_id: workflow["steps"][step_id]["due_date"] for step_id in steps}
+                        for workflow, steps in zip(workflows, affected)]
+            self._assign_due_dates(workflows, affected)
+            
+            for workflow, old_dates in zip(workflows, previous):
+                workflow["history"][-1]["due_dates"] = {
+                    step_id: {"from": old_date, "to": workflow["steps"][step_id]["due_date"]}
+                    for step_id, old_date in old_dates.items()
+                    if workflow["steps"][step_id]["due_date"] != old_date
+                }
+            self._store.put_many(workflows)
+        
+        # Re-index only the rescheduled workflows' deadlines
+        self._due_index.sync(self.active_workflows)
+        
+        for workflow in workflows:
+            logger.info(f"Rescheduled request {workflow['request_id']} to LWD "
+                        f"{workflow['employee_data']['last_working_day']}")
+        
+        return [workflow["request_id"] for workflow in workflows]
     
     def update_task_status(self, request_id: str, step_id: str, task_id: str, 
                           status: WorkflowStatus, completed_by: str = None, notes: str = None) -> bool:
@@ -468,12 +493,7 @@ class EnhancedOffboardingWorkflow:
         Returns:
             bool: True if update was successful, False otherwise
         """
-        try:
-            if request_id not in self.active_workflows:
-                raise ValueError(f"Request ID {request_id} not found")
-            
-            workflow = self.active_workflows[request_id]
-            
+        def apply(workflow):
             if step_id not in workflow["steps"]:
                 raise ValueError(f"Step ID {step_id} not found in workflow")
             
@@ -489,6 +509,16 @@ class EnhancedOffboardingWorkflow:
             if not task:
                 raise ValueError(f"Task ID {task_id} not found in step {step_id}")
             
+            # Record the transition before updating the task
+            workflow["history"].append({
+                "date": datetime.now().isoformat(),
+                "step_id": step_id,
+                "task_id": task_id,
+                "from_status": task["status"],
+                "to_status": status.value,
+                "changed_by": completed_by
+            })
+            
             # Update task status
             task["status"] = status.value
             if status == WorkflowStatus.COMPLETED:
@@ -507,9 +537,19 @@ class EnhancedOffboardingWorkflow:
             if all_tasks_completed:
                 step["status"] = WorkflowStatus.COMPLETED.value
                 step["completed_date"] = datetime.now().isoformat()
+                # Steps due relative to this step's completion now have a fixed date
+                dependents = self._dependent_steps(step_id, workflow)
+                if dependents:
+                    self._assign_due_dates([workflow], [dependents])
             
             # Update overall progress
             self._update_overall_progress(workflow)
+            return True
+        
+        try:
+            # Applied under the store's write lock so concurrent updates are not lost
+            if self._store.update(request_id, apply) is None:
+                raise ValueError(f"Request ID {request_id} not found")
             
             logger.info(f"Updated task {task_id} in step {step_id} for request {request_id} to {status.value}")
             
@@ -555,11 +595,10 @@ class EnhancedOffboardingWorkflow:
         Returns:
             Dict containing workflow status and progress information
         """
-        if request_id not in self.active_workflows:
+        workflow = self._store.get(request_id, copy=False)
+        if workflow is None:
             raise ValueError(f"Request ID {request_id} not found")
         
-        workflow = self.active_workflows[request_id]
-        
         return {
             "request_id": request_id,
             "employee_data": workflow["employee_data"],
@@ -567,6 +606,7 @@ class EnhancedOffboardingWorkflow:
             "overall_progress": workflow["overall_progress"],
             "created_date": workflow["created_date"],
             "current_step": workflow["current_step"],
+            "template": workflow.get("template") or dict(zip(("id", "version"), LEGACY_TEMPLATE)),
             "steps": workflow["steps"],
             "notes": workflow["notes"]
         }
@@ -579,23 +619,24 @@ class EnhancedOffboardingWorkflow:
             List of overdue tasks with workflow and employee information
         """
         overdue_tasks = []
-        current_date = datetime.now()
+        current_date = datetime.now().astimezone()
+        workflows = self.active_workflows
         
-        for request_id, workflow in self.active_workflows.items():
-            for step_id, step in workflow["steps"].items():
-                if step["status"] != WorkflowStatus.COMPLETED.value:
-                    due_date = datetime.fromisoformat(step["due_date"])
-                    if due_date < current_date:
-                        overdue_tasks.append({
-                            "request_id": request_id,
-                            "employee_name": workflow["employee_data"]["name"],
-                            "employee_id": workflow["employee_data"]["employee_id"],
-                            "step_id": step_id,
-                            "step_name": step["name"],
-                            "responsible_team": step["responsible_team"],
-                            "due_date": step["due_date"],
-                            "days_overdue": (current_date - due_date).days
-                        })
+        # The index holds open steps sorted by due time, so only overdue ones are visited
+        for request_id, step_id in self._due_index.due_before(workflows, current_date):
+            workflow = workflows[request_id]
+            step = workflow["steps"][step_id]
+            due_date = parse_datetime(step["due_date"])
+            overdue_tasks.append({
+                "request_id": request_id,
+                "employee_name": workflow["employee_data"]["name"],
+                "employee_id": workflow["employee_data"]["employee_id"],
+                "step_id": step_id,
+                "step_name": step["name"],
+                "responsible_team": step["responsible_team"],
+                "due_date": step["due_date"],
+                "days_overdue": (current_date - due_date).days
+            })
         
         return overdue_tasks
     
@@ -616,9 +657,9 @@ class EnhancedOffboardingWorkflow:
                 # Check if team is responsible for this step
                 step_teams = step["responsible_team"]
                 if isinstance(step_teams, list):
-                    if team in step_teams:
+                    if team.value in step_teams:
                         for task in step["tasks"]:
-                            if task.get("responsible_team") == team or task.get("responsible_team") is None:
+                            if task.get("responsible_team") == team.value or task.get("responsible_team") is None:
                                 team_tasks.append({
                                     "request_id": request_id,
                                     "employee_name": workflow["employee_data"]["name"],
@@ -633,7 +674,7 @@ class EnhancedOffboardingWorkflow:
                                     "completed_date": task["completed_date"],
                                     "completed_by": task["completed_by"]
                                 })
-                elif step_teams == team:
+                elif step_teams == team.value:
                     for task in step["tasks"]:
                         team_tasks.append({
                             "request_id": request_id,
@@ -664,17 +705,17 @@ class EnhancedOffboardingWorkflow:
         Returns:
             bool: True if note was added successfully, False otherwise
         """
-        try:
-            if request_id not in self.active_workflows:
-                raise ValueError(f"Request ID {request_id} not found")
-            
-            workflow = self.active_workflows[request_id]
-            
+        def apply(workflow):
             workflow["notes"].append({
                 "date": datetime.now().isoformat(),
                 "note": note,
                 "added_by": added_by
             })
+            return True
+        
+        try:
+            if self._store.update(request_id, apply) is None:
+                raise ValueError(f"Request ID {request_id} not found")
             
             logger.info(f"Added note to workflow {request_id} by {added_by}")
             return True
@@ -683,6 +724,49 @@ class EnhancedOffboardingWorkflow:
             logger.error(f"Error adding note to workflow: {str(e)}")
             return False
     
+    def update_department_task(self, request_id: str, department: str, task: Optional[str],
+                               status: str, updated_by: str = None) -> bool:
+        """
+        Set the status of a department and, optionally, of one of its checklist tasks.
+        
+        Department checklists hold ad-hoc tasks outside the workflow steps
+        (e.g. the departments of requests migrated from
+        offboarding_requests.json). Tasks are keyed by name, so updating a
+        task again replaces its state instead of adding to it.
+        
+        Args:
+            request_id: The offboarding request ID
+            department: Department name (created on first use)
+            task: Task name, or None to only set the department status
+            status: New status
+            updated_by: Name/ID of person making the update
+            
+        Returns:
+            bool: True if update was successful, False otherwise
+        """
+        def apply(workflow):
+            department_tasks = workflow.setdefault("department_tasks", {})
+            department_data = department_tasks.setdefault(department, {"status": "Pending", "tasks": {}})
+            department_data["status"] = status
+            if task:
+                department_data["tasks"][task] = {
+                    "status": status,
+                    "updated_at": datetime.now().isoformat(),
+                    "updated_by": updated_by
+                }
+            return True
+        
+        try:
+            if self._store.update(request_id, apply) is None:
+                raise ValueError(f"Request ID {request_id} not found")
+            
+            logger.info(f"Updated {department} task {task!r} for request {request_id} to {status}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Error updating department task: {str(e)}")
+            return False
+    
     def export_workflow_report(self, request_id: str) -> Dict[str, Any]:
         """
         Export a comprehensive report for a workflow.
@@ -693,11 +777,10 @@ class EnhancedOffboardingWorkflow:
         Returns:
             Dict containing comprehensive workflow report
         """
-        if request_id not in self.active_workflows:
+        workflow = self._store.get(request_id, copy=False)
+        if workflow is None:
             raise ValueError(f"Request ID {request_id} not found")
         
-        workflow = self.active_workflows[request_id]
-        
         report = {
             "request_id": request_id,
             "employee_data": workflow["employee_data"],
@@ -705,7 +788,8 @@ class EnhancedOffboardingWorkflow:
                 "status": workflow["status"],
                 "overall_progress": workflow["overall_progress"],
                 "created_date": workflow["created_date"],
-                "current_step": workflow["current_step"]
+                "current_step": workflow["current_step"],
+                "template": workflow.get("template") or dict(zip(("id", "version"), LEGACY_TEMPLATE))
             },
             "steps_detail": {},
             "team_summary": {},
@@ -714,12 +798,8 @@ class EnhancedOffboardingWorkflow:
         
         # Process each step
         for step_id, step in workflow["steps"].items():
-            # Convert TeamResponsibility to string for JSON serialization
-            responsible_team = step["responsible_team"]
-            if isinstance(responsible_team, list):
-                responsible_team_str = [team.value if hasattr(team, 'value') else str(team) for team in responsible_team]
-            else:
-                responsible_team_str = responsible_team.value if hasattr(responsible_team, 'value') else str(responsible_team)
+            responsible_team_str = step["responsible_team"]
+            tasks = [task.copy() for task in step["tasks"]]
             
             step_detail = {
                 "name": step["name"],
@@ -727,7 +807,7 @@ class EnhancedOffboardingWorkflow:
                 "status": step["status"],
                 "due_date": step["due_date"],
                 "completed_date": step.get("completed_date"),
-                "tasks": step["tasks"]
+                "tasks": tasks
             }
             
             report["steps_detail"][step_id] = step_detail
@@ -744,8 +824,7 @@ class EnhancedOffboardingWorkflow:
         team_tasks = {}
         for step in workflow["steps"].values():
             teams = step["responsible_team"] if isinstance(step["responsible_team"], list) else [step["responsible_team"]]
-            for team in teams:
-                team_key = team.value if hasattr(team, 'value') else str(team)
+            for team_key in teams:
                 if team_key not in team_tasks:
                     team_tasks[team_key] = {"total": 0, "completed": 0}
                 
@@ -756,6 +835,7 @@ class EnhancedOffboardingWorkflow:
         
         report["team_summary"] = team_tasks
         report["notes"] = workflow["notes"]
+        report["history"] = workflow.get("history", [])
         
         return report
 
@@ -791,6 +871,8 @@ def create_sample_workflow():
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
     # Run sample workflow
     workflow, request_id = create_sample_workflow()
     
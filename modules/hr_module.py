@@ -20,11 +20,31 @@ class HRModule(BaseModule):
         submit_btn.pack(fill=tk.X, padx=5, pady=2)
 
         # Status change frame
-        status_frame = ttk.LabelFrame(self.actions_frame, text="Change Status")
+        status_frame = self.action_pool.get("status_frame", self.create_status_frame)
         status_frame.pack(fill=tk.X, padx=5, pady=5)
+        self.status_var.set(self.selected_employee.get("status", "Active"))
+
+        # Schedule exit interview
+        interview_btn = self.create_action_button(
+            "Schedule Exit Interview",
+            self.schedule_exit_interview
+        )
+        interview_btn.pack(fill=tk.X, padx=5, pady=2)
+
+        # Start offboarding process button
+        if self.selected_employee["status"] == "Resigned":
+            start_btn = self.create_action_button(
+                "Start Offboarding Process",
+                self.start_offboarding
+            )
+            start_btn.pack(fill=tk.X, padx=5, pady=2)
+
+    def create_status_frame(self):
+        """Create the status change frame (kept in the action pool)."""
+        status_frame = ttk.LabelFrame(self.actions_frame, text="Change Status")
 
         # Status dropdown
-        self.status_var = tk.StringVar(value=self.selected_employee.get("status", "Active"))
+        self.status_var = tk.StringVar(value="Active")
         status_dropdown = ttk.Combobox(
             status_frame,
             textvariable=self.status_var,
@@ -40,21 +60,7 @@ class HRModule(BaseModule):
             command=self.change_status
         )
         update_status_btn.pack(side=tk.LEFT, padx=5, pady=5)
-
-        # Schedule exit interview
-        interview_btn = self.create_action_button(
-            "Schedule Exit Interview",
-            self.schedule_exit_interview
-        )
-        interview_btn.pack(fill=tk.X, padx=5, pady=2)
-
-        # Start offboarding process button
-        if self.selected_employee["status"] == "Resigned":
-            start_btn = self.create_action_button(
-                "Start Offboarding Process",
-                self.start_offboarding
-            )
-            start_btn.pack(fill=tk.X, padx=5, pady=2)
+        return status_frame
 
     def submit_resignation_letter(self):
         """Handle resignation letter submission."""
@@ -69,16 +75,10 @@ class HRModule(BaseModule):
 
         if file_path:
             # In a real application, you would copy the file to a secure location
-            self.json_handler.update_employee(
-                self.selected_employee["employee_id"],
-                {"resignation_letter": file_path}
-            )
-            self.show_message(
-                "Success",
+            self.save_employee(
+                {"resignation_letter": file_path},
                 f"Resignation letter submitted for {self.selected_employee['name']}"
             )
-            self.update_details()
-            self.update_progress()
 
     def change_status(self):
         """Change employee status."""
@@ -100,16 +100,11 @@ class HRModule(BaseModule):
         elif new_status == "Active":
             update_data["exit_date"] = ""
 
-        self.json_handler.update_employee(
-            self.selected_employee["employee_id"],
-            update_data
-        )
-        self.show_message(
-            "Success",
-            f"Status updated to {new_status} for {self.selected_employee['name']}"
+        self.save_employee(
+            update_data,
+            f"Status updated to {new_status} for {self.selected_employee['name']}",
+            on_saved=self.refresh_actions
         )
-        self.update_details()
-        self.update_actions()
 
     def schedule_exit_interview(self):
         """Schedule an exit interview."""
@@ -157,13 +152,20 @@ class HRModule(BaseModule):
             self.show_error("Error", "Employee must be marked as Resigned to start offboarding")
             return
 
-        # Initialize offboarding tracking
-        tracking_data = self.offboarding_tracker.initialize_employee_tracking(
-            self.selected_employee["employee_id"]
-        )
+        employee = self.selected_employee
+
+        def started(tracking_data):
+            self.show_message(
+                "Success",
+                f"Offboarding process started for {employee['name']}. All departments have been notified."
+            )
+            self.update_progress()
 
-        self.show_message(
-            "Success",
-            f"Offboarding process started for {self.selected_employee['name']}. All departments have been notified."
+        # Initialize offboarding tracking (kept if it was already started)
+        self.executor.submit(
+            self.offboarding_tracker.start_tracking, employee["employee_id"],
+            key=("start_tracking", employee["employee_id"]),
+            description="Starting offboarding",
+            on_done=started,
+            on_error=lambda e: self.show_error("Error", f"Could not start offboarding: {e}")
         )
-        self.update_progress() 
\ No newline at end of file
@@ -14,8 +14,7 @@ class ITModule(BaseModule):
 
         # Only show actions if employee is resigned
         if self.selected_employee["status"] != "Resigned":
-            ttk.Label(
-                self.actions_frame,
+            self.create_action_label(
                 text="Employee must be marked as Resigned to perform IT offboarding tasks",
                 wraplength=300
             ).pack(padx=5, pady=5)
@@ -200,10 +199,14 @@ class ITModule(BaseModule):
                 self.show_error("Error", "Please select at least one location")
                 return
 
-            # In a real application, you would perform the backup
+            # Archiving runs in a job worker so the GUI stays responsive
+            job_id = self.job_queue.enqueue(
+                "it.backup_files",
+                {"employee_id": self.selected_employee["employee_id"], "locations": selected}
+            )
             self.show_message(
                 "Success",
-                f"Backup initiated for {self.selected_employee['name']} from:\n" + 
+                f"Backup queued (job #{job_id}) for {self.selected_employee['name']} from:\n" + 
                 "\n".join(f"- {loc}" for loc in selected)
             )
             dialog.destroy()
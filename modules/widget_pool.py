@@ -0,0 +1,90 @@
+import tkinter as tk
+from tkinter import ttk
+from typing import Dict, Any, List, Callable, Hashable, Optional
+
+
+class FieldView:
+    """
+    Label/value rows of a grid-managed frame, one per record field.
+
+    Rows are created the first time a field is shown and kept afterwards:
+    rendering another record only reconfigures the values whose text
+    changed, re-grids rows whose position changed and hides fields the
+    record does not have.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._rows: Dict[str, list] = {}  # field -> [name label, value label, shown text, grid row or None]
+        self._shown: List[str] = []
+
+    def render(self, record: Optional[Dict[str, Any]]):
+        fields = list(record) if record else []
+        for position, field in enumerate(fields):
+            text = str(record[field])
+            row = self._rows.get(field)
+            if row is None:
+                row = self._rows[field] = [
+                    ttk.Label(self.frame, text=f"{field.replace('_', ' ').title()}:"),
+                    ttk.Label(self.frame, text=text),
+                    text,
+                    None
+                ]
+            elif row[2] != text:
+                row[1].configure(text=text)
+                row[2] = text
+            if row[3] != position:
+                row[0].grid(row=position, column=0, sticky=tk.W, padx=5, pady=2)
+                row[1].grid(row=position, column=1, sticky=tk.W, padx=5, pady=2)
+                row[3] = position
+
+        shown = set(fields)
+        for field in self._shown:
+            if field not in shown:
+                row = self._rows[field]
+                row[0].grid_remove()
+                row[1].grid_remove()
+                row[3] = None
+        self._shown = fields
+
+
+class WidgetPool:
+    """
+    Widgets of a pack-managed frame, reused across renders.
+
+    A render runs between begin() and end(): get() returns the widget kept
+    under a key (creating it on first use) and the caller packs it as usual.
+    end() hides the pooled widgets this render did not ask for and restores
+    the packing order if it changed, so nothing is destroyed or rebuilt.
+    """
+
+    def __init__(self, frame):
+        self.frame = frame
+        self._widgets: Dict[Hashable, tk.Widget] = {}
+        self._used: List[tk.Widget] = []
+
+    def begin(self):
+        self._used = []
+
+    def get(self, key: Hashable, factory: Callable[[], tk.Widget]) -> tk.Widget:
+        widget = self._widgets.get(key)
+        if widget is None:
+            widget = self._widgets[key] = factory()
+        self._used.append(widget)
+        return widget
+
+    def end(self):
+        used = set(self._used)
+        for widget in self.frame.pack_slaves():
+            if widget not in used:
+                widget.pack_forget()
+
+        ordered = [widget for widget in self._used if widget.winfo_manager() == "pack"]
+        if self.frame.pack_slaves() != ordered:
+            # A widget shown again was appended at the end; re-pack in render order
+            options = [(widget, widget.pack_info()) for widget in ordered]
+            for widget, _ in options:
+                widget.pack_forget()
+            for widget, info in options:
+                info.pop("in", None)
+                widget.pack(**info)
@@ -0,0 +1,118 @@
+"""Ordering, coalescing and callback delivery of modules/background.py (without a Tk display)."""
+
+import threading
+import time
+
+import pytest
+
+from modules.background import BackgroundExecutor
+
+
+class FakeWidget:
+    """Stands in for a Tk widget: after() callbacks are run by pump()."""
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay_ms, callback):
+        self.scheduled.append(callback)
+
+
+def pump(widget, timeout=5.0):
+    """Run scheduled after() callbacks, as the Tk event loop would, until none are left."""
+    deadline = time.monotonic() + timeout
+    while widget.scheduled:
+        assert time.monotonic() < deadline, "background work did not finish"
+        time.sleep(0.005)
+        widget.scheduled.pop(0)()
+
+
+@pytest.fixture
+def widget():
+    return FakeWidget()
+
+
+@pytest.fixture
+def executor(widget):
+    executor = BackgroundExecutor(widget)
+    yield executor
+    executor.shutdown()
+
+
+def _blocked(executor):
+    """Occupy the worker until the returned event is set, so later work stays queued."""
+    release = threading.Event()
+    executor.submit(release.wait)
+    return release
+
+
+def test_work_runs_in_order_and_results_reach_the_callbacks(widget, executor):
+    calls, results = [], []
+    for n in range(5):
+        executor.submit(calls.append, n, on_done=lambda _, n=n: results.append(n))
+    pump(widget)
+    assert calls == [0, 1, 2, 3, 4]
+    assert results == [0, 1, 2, 3, 4]
+    assert executor._polling is False
+
+
+def test_queued_work_with_the_same_key_is_coalesced(widget, executor):
+    release = _blocked(executor)
+    calls, done = [], []
+    for n in range(3):
+        executor.submit(lambda changes: calls.append(changes) or changes, {f"field{n}": n},
+                        key=("employee", "E1"), on_done=lambda result, n=n: done.append((n, result)),
+                        merge=lambda queued, new: (dict(queued[0], **new[0]),))
+    release.set()
+    pump(widget)
+
+    assert calls == [{"field0": 0, "field1": 1, "field2": 2}]
+    # Only the last caller hears about the coalesced save
+    assert done == [(2, {"field0": 0, "field1": 1, "field2": 2})]
+
+
+def test_without_merge_the_newest_arguments_win(widget, executor):
+    release = _blocked(executor)
+    calls = []
+    for n in range(3):
+        executor.submit(calls.append, n, key="list")
+    release.set()
+    pump(widget)
+    assert calls == [2]
+
+
+def test_errors_go_to_on_error(widget, executor):
+    errors = []
+    executor.submit(lambda: 1 / 0, on_done=lambda _: errors.append("done"), on_error=errors.append)
+    pump(widget)
+    assert len(errors) == 1 and isinstance(errors[0], ZeroDivisionError)
+
+
+def test_a_failing_callback_does_not_stop_later_deliveries(widget, executor, caplog):
+    release = _blocked(executor)
+    results = []
+
+    def broken(_):
+        raise RuntimeError("widget destroyed")
+
+    executor.submit(lambda: "first", on_done=broken)
+    executor.submit(lambda: "second", on_done=results.append)
+    release.set()
+    pump(widget)
+
+    assert results == ["second"]
+    assert "widget destroyed" in caplog.text
+    # Polling starts again for work submitted afterwards
+    executor.submit(lambda: "third", on_done=results.append)
+    pump(widget)
+    assert results == ["second", "third"]
+
+
+def test_listeners_see_the_outstanding_work(widget, executor):
+    seen = []
+    executor.add_listener(lambda outstanding, description: seen.append(outstanding))
+    executor.submit(lambda: None, description="Saving")
+    executor.submit(lambda: None, description="Saving")
+    pump(widget)
+    assert seen[:2] == [1, 2]
+    assert seen[-1] == 0
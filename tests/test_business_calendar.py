@@ -0,0 +1,117 @@
+"""Step due dates across weekends, holidays and time zones (utils/business_calendar.py)."""
+
+from datetime import date
+
+import pytest
+
+from utils.business_calendar import (BusinessCalendar, CalendarError, DueRule, HolidayCalendar,
+                                     DEFAULT_CALENDAR_PATH, order_rules)
+
+# Easter and Christmas bank holidays in England, 2026
+GB_HOLIDAYS = ["2026-04-03", "2026-04-06", "2026-12-25", "2026-12-28"]
+
+
+@pytest.fixture
+def calendar():
+    return BusinessCalendar(
+        calendars={"GB": HolidayCalendar((5, 6), GB_HOLIDAYS)},
+        locations={"London": {"timezone": "Europe/London", "calendar": "GB"}},
+        default_location="London",
+    )
+
+
+def _due(calendar, rule, lwd, **anchor):
+    anchor = dict({"lwd": lwd, "created": "2026-01-05T09:00:00+00:00", "location": "London"}, **anchor)
+    return calendar.compute_due_dates({"step": rule}, [anchor])[0]["step"]
+
+
+def _ordinal(value):
+    return date.fromisoformat(value).toordinal()
+
+
+def test_is_business_day_skips_weekends_and_holidays():
+    gb = HolidayCalendar((5, 6), GB_HOLIDAYS)
+    assert gb.is_business_day("2026-04-02")
+    assert not gb.is_business_day("2026-04-03")  # Good Friday
+    assert not gb.is_business_day("2026-04-04")  # Saturday
+    assert not gb.is_business_day("2026-04-06")  # Easter Monday
+
+
+def test_business_day_offsets_skip_the_easter_weekend(calendar):
+    # Thu 9 Apr minus five working days: 8, 7, 2 (Fri 3 and Mon 6 are holidays), 1, 31 Mar
+    assert _due(calendar, DueRule("lwd", -5), "2026-04-09").startswith("2026-03-31T")
+    assert _due(calendar, DueRule("lwd", 2), "2026-04-02").startswith("2026-04-08T")
+
+
+def test_business_day_offsets_skip_christmas(calendar):
+    # 25 Dec is a holiday, 26-27 the weekend and 28 Dec the substitute Boxing Day
+    assert _due(calendar, DueRule("lwd", 1), "2026-12-24").startswith("2026-12-29T")
+
+
+def test_anchor_on_a_holiday_is_rolled_before_the_offset(calendar):
+    assert _due(calendar, DueRule("lwd", 0), "2026-04-03").startswith("2026-04-07T")
+    assert _due(calendar, DueRule("lwd", 0, roll="backward"), "2026-04-03").startswith("2026-04-02T")
+    assert _due(calendar, DueRule("lwd", 1), "2026-04-03").startswith("2026-04-08T")
+    assert _due(calendar, DueRule("lwd", -1, roll="backward"), "2026-04-06").startswith("2026-04-01T")
+
+
+def test_calendar_day_rules_only_roll_when_asked(calendar):
+    assert _due(calendar, DueRule("lwd", 1, unit="days"), "2026-04-02").startswith("2026-04-03T")
+    assert _due(calendar, DueRule("lwd", 1, unit="days", roll="forward"), "2026-04-02").startswith("2026-04-07T")
+
+
+def test_due_time_is_local_to_the_location(calendar):
+    # British Summer Time started on 29 March 2026
+    assert _due(calendar, DueRule("lwd", -5, due_time="17:00"), "2026-04-09") == "2026-03-31T17:00:00+01:00"
+    assert _due(calendar, DueRule("lwd", 0, due_time="17:00"), "2026-03-27") == "2026-03-27T17:00:00+00:00"
+
+
+def test_step_anchored_rules_use_the_completion_when_there_is_one(calendar):
+    rules = {
+        "notice": DueRule("lwd", -1),
+        "handover": DueRule("step:notice", 2),
+    }
+    anchors = [
+        {"lwd": "2026-04-08", "created": "2026-03-01T09:00:00+00:00", "location": "London"},
+        {"lwd": "2026-04-08", "created": "2026-03-01T09:00:00+00:00", "location": "London",
+         "completed": {"notice": "2026-03-30T10:00:00+01:00"}},
+    ]
+    due = calendar.compute_due_dates(rules, anchors, only=["handover"])
+
+    # Due 7 Apr + 2 working days, or completed on Mon 30 Mar + 2 working days (1 Apr)
+    assert [d["handover"][:10] for d in due] == ["2026-04-09", "2026-04-01"]
+    assert all(set(d) == {"handover"} for d in due)
+
+
+def test_batch_matches_one_at_a_time(calendar):
+    rule = DueRule("lwd", -3)
+    lwds = ["2026-04-%02d" % day for day in range(1, 15)] + ["2026-12-%02d" % day for day in range(20, 32)]
+    anchors = [{"lwd": lwd, "created": "2026-01-05T09:00:00+00:00"} for lwd in lwds]
+
+    batch = [due["step"] for due in calendar.compute_due_dates({"step": rule}, anchors)]
+    assert batch == [_due(calendar, rule, lwd, location=None) for lwd in lwds]
+
+
+def test_offset_many_rolls_like_busday_offset():
+    gb = HolidayCalendar((5, 6), GB_HOLIDAYS)
+    days = [_ordinal("2026-04-03"), _ordinal("2026-04-04"), _ordinal("2026-04-07")]
+    assert gb.offset_many(days, [0, 0, 0]) == [_ordinal("2026-04-07")] * 3
+    assert gb.offset_many(days, [0, 0, 0], "backward") == [_ordinal("2026-04-02")] * 2 + [_ordinal("2026-04-07")]
+
+
+def test_shipped_calendar_skips_us_thanksgiving():
+    calendar = BusinessCalendar.load(DEFAULT_CALENDAR_PATH)
+    anchor = {"lwd": "2026-11-25", "created": "2026-11-01T09:00:00-05:00", "location": "New York"}
+    due = calendar.compute_due_dates({"step": DueRule("lwd", 1, due_time="09:00")}, [anchor])[0]["step"]
+    assert due == "2026-11-27T09:00:00-05:00"
+
+
+def test_invalid_rules_are_rejected():
+    with pytest.raises(CalendarError):
+        DueRule("hire_date")
+    with pytest.raises(CalendarError):
+        DueRule.from_dict({"anchor": "lwd", "offest": 1})
+    with pytest.raises(CalendarError):
+        order_rules({"a": DueRule("step:b"), "b": DueRule("step:a")})
+    with pytest.raises(CalendarError):
+        order_rules({"a": DueRule("step:missing")})
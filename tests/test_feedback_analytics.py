@@ -0,0 +1,25 @@
+"""Grouping exit interview themes by reason for leaving (utils/feedback_analytics.py)."""
+
+import json
+
+from utils import feedback_analytics
+from utils import storage as storage_module
+
+
+def test_legacy_and_workflow_reasons_share_buckets(tmp_path):
+    (tmp_path / 'offboarding_requests.json').write_text(json.dumps([
+        {"request_id": "R1", "employee_id": "E1", "reason": "End of contract"},
+        {"request_id": "R2", "employee_id": "E2", "reason": "Resignation"},
+        {"request_id": "R3", "reason": "Termination"},
+    ]))
+    (tmp_path / 'enhanced_workflows.json').write_text(json.dumps([
+        {"request_id": "OB-E3", "created_date": "2026-10-01T09:00:00",
+         "employee_data": {"employee_id": "E3", "reason_for_leaving": "non_renewal"}},
+        {"request_id": "OB-E2", "created_date": "2026-10-02T09:00:00",
+         "employee_data": {"employee_id": "E2", "reason_for_leaving": "termination"}},
+    ]))
+
+    reasons = feedback_analytics._reasons_by_employee(storage_module.get_storage(str(tmp_path)))
+
+    # The latest workflow wins over the legacy request, and the request without an employee is skipped
+    assert reasons == {"E1": "non_renewal", "E2": "termination", "E3": "non_renewal"}
@@ -0,0 +1,187 @@
+"""Claiming, retries, leases and idempotency of utils/job_queue.py."""
+
+import threading
+import time
+
+import pytest
+
+from utils import job_queue
+from utils.job_queue import JobContext, JobQueue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    return JobQueue(str(tmp_path / job_queue.DB_NAME))
+
+
+@pytest.fixture
+def context(tmp_path):
+    return JobContext(str(tmp_path), str(tmp_path / 'uploads'))
+
+
+@pytest.fixture
+def handlers(monkeypatch):
+    """Register test handlers for one test only."""
+    registered = dict(job_queue.HANDLERS)
+    monkeypatch.setattr(job_queue, "HANDLERS", registered)
+    return registered
+
+
+def _expire_leases(monkeypatch):
+    monkeypatch.setattr(job_queue, "LEASE_SECONDS", -1)
+
+
+def test_jobs_are_claimed_by_priority_then_age(queue, handlers):
+    handlers["test.noop"] = lambda payload, context: {}
+    low = queue.enqueue("test.noop", {})
+    high = queue.enqueue("test.noop", {}, priority=5)
+    later_low = queue.enqueue("test.noop", {})
+
+    claimed = [queue.claim("w")["id"] for _ in range(3)]
+    assert claimed == [high, low, later_low]
+    assert queue.claim("w") is None
+
+
+def test_claim_records_the_attempt_and_the_worker(queue, handlers):
+    handlers["test.noop"] = lambda payload, context: {}
+    job_id = queue.enqueue("test.noop", {"n": 1})
+
+    job = queue.claim("worker-1")
+    assert job["id"] == job_id
+    assert job["status"] == "running"
+    assert job["attempts"] == 1
+    assert job["locked_by"] == "worker-1"
+    assert job["payload"] == {"n": 1}
+
+
+def test_idempotency_key_enqueues_once(queue, handlers):
+    handlers["test.noop"] = lambda payload, context: {}
+    first = queue.enqueue("test.noop", {"n": 1}, idempotency_key="noop:E1")
+    second = queue.enqueue("test.noop", {"n": 2}, idempotency_key="noop:E1")
+    other = queue.enqueue("test.noop", {"n": 3}, idempotency_key="noop:E2")
+
+    assert first == second != other
+    assert queue.get(first)["payload"] == {"n": 1}
+    assert queue.counts()["queued"] == 2
+
+
+def test_unknown_kind_is_rejected(queue):
+    with pytest.raises(ValueError):
+        queue.enqueue("test.missing", {})
+
+
+def test_failed_attempts_back_off_then_fail_for_good(queue, handlers, context):
+    handlers["test.broken"] = lambda payload, context: 1 / 0
+    job_id = queue.enqueue("test.broken", {}, max_attempts=2)
+
+    before = time.time()
+    assert job_queue.run_job(queue, queue.claim("w"), context) is False
+    job = queue.get(job_id)
+    assert job["status"] == "queued"
+    assert job["run_after"] >= before + job_queue.RETRY_BASE_SECONDS
+    assert "division by zero" in job["error"]
+    # Not runnable again until the backoff has passed
+    assert queue.claim("w") is None
+
+    queue._connect().execute("UPDATE jobs SET run_after = 0 WHERE id = ?", (job_id,))
+    assert job_queue.run_job(queue, queue.claim("w"), context) is False
+    job = queue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["attempts"] == 2
+
+
+def test_backoff_doubles_per_attempt(queue, handlers):
+    handlers["test.noop"] = lambda payload, context: {}
+    job_id = queue.enqueue("test.noop", {}, max_attempts=5)
+    delays = []
+    for _ in range(3):
+        job = queue.claim("w")
+        before = time.time()
+        queue.fail(job["id"], "boom", "w")
+        delays.append(round(queue.get(job_id)["run_after"] - before))
+        queue._connect().execute("UPDATE jobs SET run_after = 0 WHERE id = ?", (job_id,))
+    base = job_queue.RETRY_BASE_SECONDS
+    assert delays == [base, 2 * base, 4 * base]
+
+
+def test_successful_run_stores_the_result(queue, handlers, context):
+    handlers["test.echo"] = lambda payload, context: {"echo": payload["n"], "job": context.job["id"]}
+    job_id = queue.enqueue("test.echo", {"n": 7})
+
+    assert job_queue.run_job(queue, queue.claim("w"), context) is True
+    job = queue.get(job_id)
+    assert job["status"] == "succeeded"
+    assert job["result"] == {"echo": 7, "job": job_id}
+    assert job["locked_by"] is None
+
+
+def test_expired_lease_is_handed_to_another_worker(queue, handlers, monkeypatch):
+    handlers["test.noop"] = lambda payload, context: {}
+    job_id = queue.enqueue("test.noop", {})
+    queue.claim("w1")
+
+    _expire_leases(monkeypatch)
+    job = queue.claim("w2")
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+    assert job["locked_by"] == "w2"
+
+    # The first worker's late outcome is not recorded over the second's
+    assert queue.complete(job_id, {"by": "w1"}, "w1") is False
+    assert queue.fail(job_id, "late", "w1") is None
+    assert queue.get(job_id)["status"] == "running"
+    assert queue.complete(job_id, {"by": "w2"}, "w2") is True
+    assert queue.get(job_id)["result"] == {"by": "w2"}
+
+
+def test_expired_lease_on_the_last_attempt_fails_the_job(queue, handlers, monkeypatch):
+    handlers["test.noop"] = lambda payload, context: {}
+    job_id = queue.enqueue("test.noop", {}, max_attempts=1)
+    queue.claim("w1")
+
+    _expire_leases(monkeypatch)
+    expired = []
+    assert queue.claim("w2", expired) is None
+    assert [job["id"] for job in expired] == [job_id]
+    assert queue.get(job_id)["status"] == "failed"
+
+
+def test_running_handlers_keep_their_lease(queue, handlers, context, monkeypatch):
+    monkeypatch.setattr(job_queue, "LEASE_SECONDS", 0.3)
+    release = threading.Event()
+    handlers["test.slow"] = lambda payload, context: release.wait(5) and {}
+    job_id = queue.enqueue("test.slow", {})
+    runner = threading.Thread(target=job_queue.run_job, args=(queue, queue.claim("w1"), context))
+    runner.start()
+    try:
+        for _ in range(6):
+            time.sleep(0.15)
+            assert queue.claim("w2") is None
+    finally:
+        release.set()
+        runner.join()
+    assert queue.get(job_id)["status"] == "succeeded"
+    assert queue.get(job_id)["attempts"] == 1
+
+
+def test_heartbeat_only_renews_the_holders_lease(queue, handlers):
+    handlers["test.noop"] = lambda payload, context: {}
+    job_id = queue.enqueue("test.noop", {})
+    queue.claim("w1")
+    assert queue.heartbeat(job_id, "w1") is True
+    assert queue.heartbeat(job_id, "w2") is False
+
+
+def test_it_ticket_is_raised_once_across_retries(queue, context, monkeypatch):
+    job_id = queue.enqueue("it.raise_ticket", {"employee_id": "E1", "name": "Ada"},
+                           idempotency_key="it.raise_ticket:R1")
+    first = queue.claim("w1")
+    _expire_leases(monkeypatch)
+    second = queue.claim("w2")
+
+    tickets = [job_queue.HANDLERS["it.raise_ticket"](job["payload"], context.for_job(job))
+               for job in (first, second)]
+
+    assert tickets[0] == tickets[1]
+    assert len(context.storage.collection('it_tickets.json').all()) == 1
+    assert second["id"] == job_id
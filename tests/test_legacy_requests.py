@@ -0,0 +1,198 @@
+"""migrate() and its command line (utils/legacy_requests.py)."""
+
+import json
+
+import pytest
+
+from modules.enhanced_workflow import EnhancedOffboardingWorkflow
+from utils import storage as storage_module
+from utils import legacy_requests
+from utils.legacy_requests import LegacyRequests, migrate
+
+
+def _request(request_id, employee_id="E1", **fields):
+    request = {
+        "request_id": request_id,
+        "employee_id": employee_id,
+        "employee_name": "Ada Lovelace",
+        "department": "Engineering",
+        "last_working_day": "2026-11-30",
+        "reason": "End of contract",
+        "notice_period": 30,
+        "status": "In Progress",
+        "created_at": "2026-10-01T09:00:00",
+        "updated_at": "2026-10-02T09:00:00",
+        "departments": {
+            "hr": {"status": "Completed", "tasks": [
+                {"task": "Exit interview", "status": "In Progress", "updated_at": "2026-10-01T10:00:00"},
+                {"task": "Exit interview", "status": "Completed", "updated_at": "2026-10-02T09:00:00"},
+            ]},
+            "it": {"status": "Pending", "tasks": []},
+            "finance": {"status": "Pending", "tasks": []},
+            "legal": {"status": "Pending", "tasks": []},
+        },
+    }
+    request.update(fields)
+    return request
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    employees = [{"employee_id": "E1", "name": "Ada Lovelace", "email": "ada@example.com",
+                  "department": "Engineering", "position": "Engineer", "status": "Resigned"}]
+    requests = [
+        _request("R1"),
+        _request("R2", reason="Termination", last_working_day="2026-12-15"),
+        _request("R3", employee_id=None),
+        _request("R4", last_working_day="30/11/2026"),
+    ]
+    (tmp_path / 'employees.json').write_text(json.dumps(employees))
+    (tmp_path / 'offboarding_requests.json').write_text(json.dumps(requests))
+    return tmp_path
+
+
+def _services(data_dir):
+    storage = storage_module.get_storage(str(data_dir))
+    return storage, EnhancedOffboardingWorkflow(store=storage.workflows)
+
+
+def _files(data_dir):
+    """Contents of the data files that exist (lock files and empty new collections aside)."""
+    return {path.name: path.read_bytes() for path in data_dir.glob('*.json*')
+            if not path.name.endswith('.lock') and path.read_bytes() not in (b'', b'[]')}
+
+
+def test_dry_run_reports_without_writing(data_dir):
+    storage, engine = _services(data_dir)
+    before = _files(data_dir)
+
+    report = migrate(storage, engine, dry_run=True)
+
+    assert report["migrated"] == 2
+    assert report["dry_run"] is True
+    assert set(report["skipped"]) == {"R3", "R4"}
+    assert engine.active_workflows == {}
+    assert _files(data_dir) == before
+
+
+def test_migrate_converts_requests_into_workflows(data_dir):
+    storage, engine = _services(data_dir)
+    listing = LegacyRequests(engine, storage)
+    before = {request["request_id"]: request for request in listing.all()}
+
+    report = migrate(storage, engine, batch_size=1)
+
+    assert report == {"migrated": 2, "skipped": report["skipped"], "already_migrated": 0, "dry_run": False}
+    assert set(engine.active_workflows) == {"R1", "R2"}
+    workflow = engine.active_workflows["R2"]
+    assert workflow["employee_data"]["reason_for_leaving"] == "termination"
+    assert workflow["legacy"]["notice_period"] == 30
+    # Repeated updates of a task are folded into its latest state
+    assert workflow["department_tasks"]["hr"]["tasks"] == {
+        "Exit interview": {"status": "Completed", "updated_at": "2026-10-02T09:00:00"}
+    }
+
+    marked = {r["request_id"]: r.get("migrated_to") for r in storage.offboarding_requests.all()}
+    assert marked == {"R1": "R1", "R2": "R2", "R3": None, "R4": None}
+
+    # The legacy pages see the same requests, now served by the engine
+    after = {request["request_id"]: request for request in listing.all()}
+    assert set(after) == set(before)
+    for request_id in ("R1", "R2"):
+        assert after[request_id]["workflow"] is True
+        for field in ("employee_id", "reason", "status", "last_working_day", "progress", "hr_status"):
+            assert after[request_id][field] == before[request_id][field]
+        assert after[request_id]["departments"]["hr"]["tasks"] == [before[request_id]["departments"]["hr"]["tasks"][-1]]
+
+
+def test_migrate_is_idempotent(data_dir):
+    storage, engine = _services(data_dir)
+    migrate(storage, engine)
+    workflows = dict(storage.workflows.records())
+    files = _files(data_dir)
+
+    report = migrate(storage, engine)
+
+    assert report["migrated"] == 0
+    assert report["already_migrated"] == 2
+    assert set(report["skipped"]) == {"R3", "R4"}
+    assert dict(storage.workflows.records()) == workflows
+    assert _files(data_dir) == files
+
+    # A fresh process over the same files agrees
+    engine = EnhancedOffboardingWorkflow(store=storage_module.JSONCollection(
+        str(data_dir / 'enhanced_workflows.json'), key='request_id'))
+    assert migrate(storage, engine, dry_run=True)["migrated"] == 0
+
+
+def test_existing_workflow_with_the_same_id_is_not_overwritten(data_dir):
+    storage, engine = _services(data_dir)
+    engine.create_offboarding_requests(
+        [legacy_requests.workflow_input(_request("R1", reason="Resignation"), None)], request_ids=["R1"]
+    )
+
+    report = migrate(storage, engine)
+
+    assert report["migrated"] == 1
+    assert report["skipped"]["R1"] == "a workflow with this ID already exists"
+    assert "legacy" not in engine.active_workflows["R1"]
+
+
+def test_command_line_dry_run(data_dir, capsys):
+    before = _files(data_dir)
+
+    assert legacy_requests.main(["migrate", "--data-dir", str(data_dir), "--dry-run"]) == 0
+
+    report = json.loads(capsys.readouterr().out)
+    assert report["migrated"] == 2
+    assert report["dry_run"] is True
+    assert _files(data_dir) == before
+
+
+def test_rerun_marks_requests_whose_workflow_was_written_before_a_crash(data_dir):
+    storage, engine = _services(data_dir)
+    # A run that stopped after creating the workflow but before marking the record
+    request = storage.offboarding_requests.get("R1")
+    engine.create_offboarding_requests(
+        [legacy_requests.workflow_input(request, storage.employees.get("E1"))],
+        request_ids=["R1"], extra_fields=[legacy_requests.legacy_fields(request)]
+    )
+    workflow = engine.active_workflows["R1"]
+
+    report = migrate(storage, engine)
+
+    assert "R1" not in report["skipped"]
+    assert report["migrated"] == 1
+    assert report["already_migrated"] == 1
+    assert storage.offboarding_requests.get("R1")["migrated_to"] == "R1"
+    assert engine.active_workflows["R1"] == workflow
+
+
+def test_requests_created_in_the_same_second_get_distinct_ids(data_dir):
+    storage, engine = _services(data_dir)
+    listing = LegacyRequests(engine, storage)
+    request_data = {"last_working_day": "2026-11-30", "reason": "Resignation", "notice_period": 30}
+
+    first = listing.create("E1", request_data)
+    second = listing.create("E1", dict(request_data, last_working_day="2026-12-31"))
+
+    assert first != second
+    assert engine.active_workflows[first]["employee_data"]["last_working_day"] == "2026-11-30"
+    assert engine.active_workflows[second]["employee_data"]["last_working_day"] == "2026-12-31"
+
+    employee = legacy_requests.workflow_input(_request("R9"), None)
+    batch = engine.create_offboarding_requests([employee, employee])
+    assert len(set(batch)) == 2
+    assert all(request_id in engine.active_workflows for request_id in batch)
+
+
+def test_given_request_ids_are_never_overwritten(data_dir):
+    storage, engine = _services(data_dir)
+    employee = legacy_requests.workflow_input(_request("R9"), None)
+    engine.create_offboarding_requests([employee], request_ids=["R9"])
+
+    with pytest.raises(ValueError):
+        engine.create_offboarding_requests([employee], request_ids=["R9"])
+    with pytest.raises(ValueError):
+        engine.create_offboarding_requests([employee, employee], request_ids=["R10", "R10"])
+    assert "R10" not in engine.active_workflows
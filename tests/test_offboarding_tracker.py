@@ -0,0 +1,211 @@
+"""Task counters, completion bitmasks and bulk progress of utils/offboarding_tracker.py."""
+
+import copy
+
+import pytest
+
+from utils import storage
+from utils.offboarding_tracker import OffboardingTracker, TrackingColumns
+
+
+@pytest.fixture
+def tracker():
+    return OffboardingTracker()
+
+
+def _legacy(tracking_data):
+    """Tracking data as stored before the counters and bitmasks existed."""
+    legacy = copy.deepcopy(tracking_data)
+    del legacy["completed_tasks"], legacy["total_tasks"]
+    for dept_data in legacy["departments"].values():
+        del dept_data["completed_tasks"], dept_data["total_tasks"], dept_data["completed_mask"]
+    return legacy
+
+
+def test_new_tracking_starts_with_zero_counters(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    assert tracking["completed_tasks"] == 0
+    assert tracking["total_tasks"] == 16
+    assert tracking["departments"]["IT"]["total_tasks"] == 3
+    assert tracking["departments"]["IT"]["completed_mask"] == 0
+
+
+def test_counters_and_mask_follow_task_updates(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    tracker.update_task_status(tracking, "IT", "Backup Files")
+    tracker.update_task_status(tracking, "IT", "Revoke System Access")
+    it = tracking["departments"]["IT"]
+    assert it["completed_tasks"] == 2
+    assert it["completed_mask"] == 0b101
+    assert tracking["completed_tasks"] == 2
+    assert tracker.is_task_completed(tracking, "IT", "Backup Files")
+    assert not tracker.is_task_completed(tracking, "IT", "Return Company Device")
+
+    # Completing a completed task again changes nothing
+    tracker.update_task_status(tracking, "IT", "Backup Files")
+    assert it["completed_tasks"] == 2
+    assert tracking["completed_tasks"] == 2
+
+    tracker.update_task_status(tracking, "IT", "Backup Files", "In Progress")
+    assert it["completed_mask"] == 0b001
+    assert it["completed_tasks"] == 1
+    assert tracking["completed_tasks"] == 1
+    assert not tracker.is_task_completed(tracking, "IT", "Backup Files")
+
+
+def test_unknown_department_or_task_is_ignored(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    before = copy.deepcopy(tracking)
+    tracker.update_task_status(tracking, "Facilities", "Backup Files")
+    tracker.update_task_status(tracking, "IT", "Water Plants")
+    assert tracking == before
+
+
+def test_department_and_offboarding_complete_and_reopen(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    for task in tracker.departments["Admin"]["tasks"]:
+        tracker.update_task_status(tracking, "Admin", task)
+    admin = tracking["departments"]["Admin"]
+    assert admin["status"] == "Completed"
+    assert admin["completed_date"] is not None
+
+    for dept, info in tracker.departments.items():
+        for task in info["tasks"]:
+            tracker.update_task_status(tracking, dept, task)
+    assert tracking["status"] == "Completed"
+    assert tracking["completed_tasks"] == tracking["total_tasks"]
+
+    tracker.update_task_status(tracking, "Admin", "Facility Clearance", "Pending")
+    assert admin["status"] == "Pending"
+    assert admin["completed_date"] is None
+    assert tracking["status"] == "In Progress"
+
+
+def test_tracking_without_counters_gets_them_on_first_update(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    tracker.update_task_status(tracking, "HR", "Submit Resignation Letter")
+    tracker.update_task_status(tracking, "Legal", "Document Return")
+    legacy = _legacy(tracking)
+
+    assert tracker.get_completion(legacy) == tracker.get_completion(tracking)
+    assert tracker.get_department_progress(legacy, "Legal") == tracker.get_department_progress(tracking, "Legal")
+    assert tracker.is_task_completed(legacy, "Legal", "Document Return")
+
+    tracker.update_task_status(legacy, "Legal", "NDA Status Check")
+    tracker.update_task_status(tracking, "Legal", "NDA Status Check")
+    assert legacy == tracking
+
+
+def test_set_task_status_journals_only_the_changed_fields(tmp_path):
+    path = str(tmp_path / 'offboarding_tracking.json')
+    tracker = OffboardingTracker(storage.JSONCollection(path, key='employee_id'))
+    tracker.start_tracking("E1")
+    for task in tracker.departments["Manager"]["tasks"]:
+        tracker.set_task_status("E1", "Manager", task)
+
+    with open(storage.journal_path(path)) as f:
+        ops = [line for line in f if line.strip()]
+    assert len(ops) == 3  # the initial put and one small "set" per task
+    assert all('"op":"set"' in op for op in ops[1:])
+
+    stored = storage.JSONCollection(path, key='employee_id').get("E1")
+    manager = stored["departments"]["Manager"]
+    assert manager["status"] == "Completed"
+    assert manager["completed_mask"] == 0b11
+    assert stored["completed_tasks"] == 2
+    assert tracker.set_task_status("E2", "Manager", "Confirm Handover") is None
+
+
+def test_set_task_status_upgrades_stored_tracking_without_counters(tracker):
+    tracking = tracker.initialize_employee_tracking("E1")
+    tracker._store.put(_legacy(tracking))
+
+    updated = tracker.set_task_status("E1", "HR", "Schedule Exit Interview")
+    assert updated["completed_tasks"] == 1
+    assert tracker.get_tracking("E1")["departments"]["HR"]["completed_mask"] == 0b100
+
+
+def _tracked(tracker, employee_id, updates):
+    tracking = tracker.start_tracking(employee_id)
+    for dept, task, status in updates:
+        tracker.set_task_status(employee_id, dept, task, status)
+    return tracker.get_tracking(employee_id)
+
+
+def _everything(tracker):
+    return [(dept, task, "Completed") for dept, info in tracker.departments.items() for task in info["tasks"]]
+
+
+def test_bulk_progress_matches_per_employee_progress(tracker):
+    _tracked(tracker, "untouched", [])
+    _tracked(tracker, "started", [("IT", "Backup Files", "In Progress")])
+    _tracked(tracker, "partial", [("HR", task, "Completed") for task in tracker.departments["HR"]["tasks"]]
+             + [("IT", "Backup Files", "Completed")])
+    _tracked(tracker, "done", _everything(tracker))
+
+    progress = tracker.get_bulk_progress(tracker.get_columns())
+
+    assert progress["employee_ids"] == ["untouched", "started", "partial", "done"]
+    assert progress["total_tasks"] == 16
+    for position, employee_id in enumerate(progress["employee_ids"]):
+        completion = tracker.get_completion(tracker.get_tracking(employee_id))
+        assert progress["completed_tasks"][position] == completion["completed_tasks"]
+        assert progress["completed"][position] == (completion["status"] == "Completed")
+
+    hr = progress["departments"]["HR"]
+    assert list(hr["completed_tasks"]) == [0, 0, 3, 3]
+    assert list(hr["completed"]) == [0, 0, 1, 1]
+    assert hr["funnel"] == {"pending": 2, "in_progress": 0, "completed": 2}
+    assert progress["departments"]["IT"]["funnel"] == {"pending": 1, "in_progress": 2, "completed": 1}
+
+    funnel = progress["funnel"]
+    assert funnel["departments_completed"] == [2, 1, 0, 0, 0, 0, 1]
+    assert (funnel["pending"], funnel["in_progress"], funnel["completed"]) == (1, 2, 1)
+
+
+def test_blocked_on_lists_employees_waiting_for_a_department(tracker):
+    _tracked(tracker, "E1", [("Legal", task, "Completed") for task in tracker.departments["Legal"]["tasks"]])
+    _tracked(tracker, "E2", [("Legal", "NDA Status Check", "Completed")])
+    _tracked(tracker, "E3", [])
+
+    progress = tracker.get_bulk_progress(tracker.get_columns())
+    assert tracker.blocked_on(progress, "Legal") == ["E2", "E3"]
+    assert tracker.blocked_on(progress, "HR") == ["E1", "E2", "E3"]
+
+
+def test_columns_follow_status_changes(tracker):
+    columns = tracker.get_columns()
+    columns.add(tracker.initialize_employee_tracking("E1"))
+    columns.set_status("E1", "Finance", "Check Loans", "Completed")
+    columns.add(tracker.initialize_employee_tracking("E2"))
+
+    progress = tracker.get_bulk_progress(columns)
+    assert list(progress["departments"]["Finance"]["completed_tasks"]) == [1, 0]
+
+    # Adding an employee again replaces the row rather than appending one
+    columns.add(tracker.initialize_employee_tracking("E1"))
+    assert len(columns) == 2
+    assert list(tracker.get_bulk_progress(columns)["completed_tasks"]) == [0, 0]
+
+
+def test_bulk_progress_of_no_employees(tracker):
+    progress = tracker.get_bulk_progress(tracker.get_columns())
+    assert progress["employee_ids"] == []
+    assert progress["funnel"]["departments_completed"] == [0] * 7
+    assert progress["funnel"]["completed"] == 0
+
+
+def test_columns_are_limited_to_255_tasks():
+    with pytest.raises(ValueError):
+        TrackingColumns({"IT": {"tasks": [f"Task {n}" for n in range(256)]}})
+
+
+def test_set_task_status_rejects_unknown_departments_and_tasks(tracker):
+    tracker.start_tracking("E1")
+    stored = copy.deepcopy(tracker.get_tracking("E1"))
+
+    with pytest.raises(KeyError):
+        tracker.set_task_status("E1", "Facilities", "Backup Files")
+    with pytest.raises(KeyError):
+        tracker.set_task_status("E1", "IT", "Water Plants")
+    assert tracker.get_tracking("E1") == stored
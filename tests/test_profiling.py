@@ -0,0 +1,40 @@
+"""Workflow engine timing of utils/profiling.py."""
+
+import pytest
+
+from modules.enhanced_workflow import EnhancedOffboardingWorkflow
+from utils import profiling
+
+
+@pytest.fixture
+def metrics():
+    profiling._local.metrics = profiling.RequestMetrics()
+    yield profiling._local.metrics
+    profiling._local.metrics = None
+
+
+def _employee():
+    return {"employee_id": "E1", "name": "Ada Lovelace", "email": "ada@example.com",
+            "last_working_day": "2026-11-30", "reason_for_leaving": "resignation"}
+
+
+def test_every_public_engine_method_is_timed_once_per_call(metrics):
+    engine = EnhancedOffboardingWorkflow()
+    profiling.instrument_workflow_engine(engine)
+
+    # create_offboarding_request is built on create_offboarding_requests: one call is recorded
+    request_id = engine.create_offboarding_request(_employee())
+    assert metrics.components["workflow"][1] == 1
+
+    engine.create_offboarding_requests([_employee()])
+    engine.reschedule(request_id, "2026-12-15")
+    engine.update_department_task(request_id, "hr", "Exit interview", "Completed")
+    assert metrics.components["workflow"][1] == 4
+    assert not metrics.active
+
+
+def test_properties_are_left_alone():
+    engine = EnhancedOffboardingWorkflow()
+    profiling.instrument_workflow_engine(engine)
+    assert isinstance(engine.active_workflows, dict)
+    assert "active_workflows" not in vars(engine)
@@ -0,0 +1,125 @@
+"""Moving a workflow's last working day (EnhancedOffboardingWorkflow.reschedule_many)."""
+
+import threading
+import time
+
+import pytest
+
+from modules.enhanced_workflow import EnhancedOffboardingWorkflow, WorkflowStatus
+from utils import storage
+from utils.business_calendar import BusinessCalendar
+
+
+def _engine(path):
+    return EnhancedOffboardingWorkflow(store=storage.JSONCollection(str(path), key='request_id'),
+                                       calendar=BusinessCalendar())
+
+
+def _employee(employee_id="E1", lwd="2026-11-30"):
+    return {"employee_id": employee_id, "name": "Ada Lovelace", "email": "ada@example.com",
+            "last_working_day": lwd, "reason_for_leaving": "resignation"}
+
+
+def _due_days(workflow):
+    return {step_id: step["due_date"][:10] for step_id, step in workflow["steps"].items()}
+
+
+def _complete_step(engine, request_id, step_id):
+    for task in engine.active_workflows[request_id]["steps"][step_id]["tasks"]:
+        engine.update_task_status(request_id, step_id, task["id"], WorkflowStatus.COMPLETED, "test")
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'enhanced_workflows.json'
+
+
+def test_lwd_anchored_steps_move_and_the_change_is_recorded(path):
+    engine = _engine(path)
+    request_id = engine.create_offboarding_request(_employee())
+    before = _due_days(engine.active_workflows[request_id])
+
+    assert engine.reschedule_many({request_id: "2026-12-15"}, "hr") == [request_id]
+
+    workflow = engine.active_workflows[request_id]
+    after = _due_days(workflow)
+    assert after["step_3_pre_lwd_processing"] == "2026-12-08"
+    assert after["step_4_lwd_it_facilities"] == "2026-12-15"
+    assert after["step_6_post_lwd_processing"] == "2026-12-22"
+    # Anchored on step 6, which moved with the LWD
+    assert after["step_7_final_closure"] == "2026-12-29"
+    # Anchored on the request's creation
+    assert after["step_1_initial_request"] == before["step_1_initial_request"]
+    assert after["step_2_people_ops_review"] == before["step_2_people_ops_review"]
+
+    event = workflow["history"][-1]
+    assert (event["event"], event["from_lwd"], event["to_lwd"], event["changed_by"]) == \
+        ("rescheduled", "2026-11-30", "2026-12-15", "hr")
+    assert set(event["due_dates"]) == {"step_3_pre_lwd_processing", "step_4_lwd_it_facilities",
+                                       "step_5_exit_interview", "step_6_post_lwd_processing",
+                                       "step_7_final_closure"}
+    # Written to the file, not just the engine's cache
+    assert _due_days(_engine(path).active_workflows[request_id]) == after
+
+
+def test_completed_steps_and_task_state_are_kept(path):
+    engine = _engine(path)
+    request_id = engine.create_offboarding_request(_employee())
+    _complete_step(engine, request_id, "step_5_exit_interview")
+    before = engine.active_workflows[request_id]["steps"]["step_5_exit_interview"]
+
+    engine.reschedule_many({request_id: "2026-12-15"})
+
+    after = engine.active_workflows[request_id]["steps"]["step_5_exit_interview"]
+    assert after["due_date"] == before["due_date"]
+    assert after["status"] == before["status"] == WorkflowStatus.COMPLETED.value
+    assert [task["status"] for task in after["tasks"]] == [task["status"] for task in before["tasks"]]
+
+
+def test_unknown_and_unchanged_requests_are_skipped(path):
+    engine = _engine(path)
+    moved = engine.create_offboarding_request(_employee("E1"))
+    same = engine.create_offboarding_request(_employee("E2"))
+
+    result = engine.reschedule_many({moved: "2026-12-15", same: "2026-11-30", "OB-MISSING": "2026-12-15"})
+
+    assert result == [moved]
+    assert engine.active_workflows[same]["history"] == []
+    assert engine.reschedule("OB-MISSING", "2026-12-15") is False
+    assert engine.reschedule(same, "2026-11-30") is True
+
+
+def test_invalid_date_changes_nothing(path):
+    engine = _engine(path)
+    first = engine.create_offboarding_request(_employee("E1"))
+    second = engine.create_offboarding_request(_employee("E2"))
+
+    with pytest.raises(ValueError):
+        engine.reschedule_many({first: "2026-12-15", second: "15/12/2026"})
+    assert engine.active_workflows[first]["employee_data"]["last_working_day"] == "2026-11-30"
+
+
+def test_task_update_during_a_reschedule_is_not_lost(path, monkeypatch):
+    engine = _engine(path)
+    request_id = engine.create_offboarding_request(_employee())
+    other = _engine(path)  # another process's view of the same file
+    task_id = engine.active_workflows[request_id]["steps"]["step_4_lwd_it_facilities"]["tasks"][0]["id"]
+
+    assign_due_dates = engine._assign_due_dates
+    updater = threading.Thread(target=other.update_task_status, args=(
+        request_id, "step_4_lwd_it_facilities", task_id, WorkflowStatus.COMPLETED, "it"))
+
+    def slow_assign(*args, **kwargs):
+        # The update starts while the reschedule holds the write lock, and has to wait for it
+        updater.start()
+        time.sleep(0.2)
+        return assign_due_dates(*args, **kwargs)
+
+    monkeypatch.setattr(engine, "_assign_due_dates", slow_assign)
+    engine.reschedule_many({request_id: "2026-12-15"})
+    updater.join()
+
+    workflow = _engine(path).active_workflows[request_id]
+    assert workflow["employee_data"]["last_working_day"] == "2026-12-15"
+    assert workflow["steps"]["step_4_lwd_it_facilities"]["due_date"][:10] == "2026-12-15"
+    assert workflow["steps"]["step_4_lwd_it_facilities"]["tasks"][0]["status"] == WorkflowStatus.COMPLETED.value
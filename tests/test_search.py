@@ -0,0 +1,109 @@
+"""Full-text search (utils.search.SearchIndex): BM25 ranking, prefix expansion and incremental indexing."""
+
+import pytest
+
+from utils import search as search_module
+from utils import storage as storage_module
+from utils.search import SearchIndex
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return storage_module.get_storage(str(tmp_path))
+
+
+@pytest.fixture
+def index(storage):
+    return SearchIndex(storage.workflows, storage.exit_interviews)
+
+
+def _workflow(request_id, name, reason="resignation", notes=()):
+    return {"request_id": request_id, "steps": {},
+            "employee_data": {"employee_id": request_id.replace("OB", "E"), "name": name,
+                              "reason_for_leaving": reason},
+            "notes": [{"note": note, "date": "2026-10-01", "added_by": "hr"} for note in notes]}
+
+
+def _interview(interview_id, feedback):
+    return {"interview_id": interview_id, "employee_id": "E" + interview_id,
+            "interview_date": "2026-10-01", "interviewer": "hr", "feedback": feedback}
+
+
+def _ids(results):
+    return [result.get("request_id") or result.get("interview_id") for result in results]
+
+
+def test_more_occurrences_in_a_shorter_document_rank_higher(storage, index):
+    storage.exit_interviews.put_many([
+        _interview("1", "Salary was fine, the commute was long and the office was far away from home"),
+        _interview("2", "Salary salary salary"),
+        _interview("3", "Management was supportive"),
+    ])
+    results = index.search("salary")
+    assert _ids(results) == ["2", "1"]
+    assert results[0]["score"] > results[1]["score"] > 0
+    assert results[0]["kind"] == "feedback"
+
+
+def test_rare_terms_weigh_more_than_common_ones(storage, index):
+    storage.exit_interviews.put_many([
+        _interview("1", "team relocation"),
+        _interview("2", "team workload"),
+        _interview("3", "team workload"),
+        _interview("4", "team workload"),
+    ])
+    assert index.search("relocation")[0]["score"] > index.search("workload")[0]["score"]
+
+
+def test_every_query_term_must_match(storage, index):
+    storage.workflows.put_many([
+        _workflow("OB1", "Ada Lovelace", notes=["Laptop returned"]),
+        _workflow("OB2", "Ada Byron", notes=["Laptop missing"]),
+    ])
+    assert _ids(index.search("laptop returned")) == ["OB1"]
+    assert index.search("laptop stolen") == []
+
+
+def test_prefix_matches_longer_terms_but_ranks_below_exact(storage, index):
+    storage.workflows.put_many([
+        _workflow("OB1", "Ada Lovelace", reason="resignation"),
+        _workflow("OB2", "Alan Turing", reason="resign"),
+        _workflow("OB3", "Grace Hopper", reason="retirement"),
+    ])
+    assert set(_ids(index.search("resig"))) == {"OB1", "OB2"}
+    assert _ids(index.search("resign")) == ["OB2", "OB1"]
+
+
+def test_short_prefix_expands_to_the_most_frequent_terms(storage, index, monkeypatch):
+    monkeypatch.setattr(search_module, "MAX_EXPANSIONS", 1)
+    storage.exit_interviews.put_many([
+        _interview("1", "parking"),
+        _interview("2", "pay"),
+        _interview("3", "pay"),
+    ])
+    assert sorted(_ids(index.search("pa"))) == ["2", "3"]
+
+
+def test_kinds_filter_and_result_fields(storage, index):
+    storage.workflows.put(_workflow("OB1", "Ada Lovelace", notes=["Ada asked about her pension"]))
+    storage.exit_interviews.put(_interview("1", "Ada mentioned the pension scheme"))
+
+    assert {result["kind"] for result in index.search("pension")} == {"note", "feedback"}
+    notes = index.search("pension", kinds=["note"])
+    assert [(r["kind"], r["request_id"], r["title"], r["added_by"]) for r in notes] == \
+        [("note", "OB1", "Ada Lovelace (E1)", "hr")]
+    assert index.search("pension", limit=0) == []
+    assert index.search("  ") == []
+
+
+def test_index_follows_writes_and_deletes(storage, index):
+    storage.workflows.put(_workflow("OB1", "Ada Lovelace"))
+    assert _ids(index.search("lovelace")) == ["OB1"]
+
+    storage.workflows.put(_workflow("OB1", "Ada King"))
+    assert index.search("lovelace") == []
+    assert _ids(index.search("king")) == ["OB1"]
+
+    storage.workflows.delete("OB1")
+    assert index.search("king") == []
+    assert index.search("ada") == []
@@ -0,0 +1,162 @@
+"""Journal replay, compaction, record versions and copy semantics of utils/storage.py."""
+
+import json
+import os
+
+import pytest
+
+from utils import storage
+from utils.json_handler import JSONHandler
+
+
+def _collection(path, **kwargs):
+    return storage.JSONCollection(str(path), key='employee_id', indexes=('department',), **kwargs)
+
+
+def _employee(employee_id, **fields):
+    return dict({"employee_id": employee_id, "name": f"Employee {employee_id}", "department": "IT"}, **fields)
+
+
+def _journal_lines(path):
+    with open(storage.journal_path(str(path))) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _snapshot(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'employees.json'
+
+
+def test_small_writes_are_journaled_and_replayed_by_another_reader(path):
+    writer = _collection(path)
+    writer.put(_employee("1"))
+    writer.put(_employee("2"))
+    writer.patch("1", {"department": "HR"})
+    writer.patch_paths("2", [(("address", "city"), "Leeds")])
+    writer.delete("2")
+
+    assert _snapshot(path) == []
+    assert [op["op"] for op in _journal_lines(path)] == ["put", "put", "patch", "set", "delete"]
+
+    reader = _collection(path)
+    assert list(reader.records()) == ["1"]
+    assert reader.get("1")["department"] == "HR"
+    assert reader.find("department", "HR") == [reader.get("1")]
+    assert reader.find("department", "IT") == []
+
+
+def test_reader_catches_up_on_lines_appended_after_its_last_look(path):
+    writer = _collection(path)
+    reader = _collection(path)
+    writer.put(_employee("1"))
+    assert reader.get("1")["name"] == "Employee 1"
+
+    writer.patch("1", {"name": "Renamed"})
+    assert reader.get("1")["name"] == "Renamed"
+
+
+def test_partial_journal_tail_is_ignored_and_dropped_by_the_next_append(path):
+    writer = _collection(path)
+    writer.put(_employee("1"))
+    with open(storage.journal_path(str(path)), 'a') as f:
+        f.write('{"op": "put", "record": {"employee_id": "2"')
+
+    reader = _collection(path)
+    assert list(reader.records()) == ["1"]
+
+    reader.put(_employee("3"))
+    assert [op["record"]["employee_id"] for op in _journal_lines(path)] == ["1", "3"]
+    assert list(_collection(path).records()) == ["1", "3"]
+
+
+def test_journal_is_compacted_into_the_snapshot(path):
+    writer = _collection(path, compact_after=3)
+    reader = _collection(path)
+    writer.put(_employee("1"))
+    writer.put(_employee("2"))
+    assert list(reader.records()) == ["1", "2"]
+
+    writer.patch("1", {"department": "HR"})
+
+    assert _journal_lines(path) == []
+    assert _snapshot(path) == [_employee("1", department="HR"), _employee("2")]
+    # The reader notices the new snapshot instead of replaying the truncated journal
+    assert reader.get("1")["department"] == "HR"
+
+    writer.put(_employee("3"))
+    assert len(_journal_lines(path)) == 1
+    assert list(_collection(path).records()) == ["1", "2", "3"]
+
+
+def test_put_many_past_the_threshold_writes_one_snapshot(path):
+    writer = _collection(path, compact_after=3)
+    writer.put_many(_employee(str(n)) for n in range(5))
+
+    assert not os.path.exists(storage.journal_path(str(path))) or _journal_lines(path) == []
+    assert [record["employee_id"] for record in _snapshot(path)] == ["0", "1", "2", "3", "4"]
+
+
+def test_versions_change_only_for_written_records(path):
+    collection = _collection(path)
+    collection.put(_employee("1"))
+    collection.put(_employee("2"))
+    before = collection.versions()
+
+    collection.patch("1", {"department": "HR"})
+    after = collection.versions()
+    assert after["1"] > before["1"]
+    assert after["2"] == before["2"]
+
+    # A patch that changes nothing is not journaled and keeps the version
+    collection.patch("1", {"department": "HR"})
+    assert collection.versions() == after
+
+    collection.delete("2")
+    assert list(collection.versions()) == ["1"]
+
+
+def test_versions_are_unique_across_collections(tmp_path):
+    first = _collection(tmp_path / 'a.json')
+    second = _collection(tmp_path / 'b.json')
+    first.put(_employee("1"))
+    second.put(_employee("1"))
+    assert first.versions()["1"] != second.versions()["1"]
+
+
+def test_records_handed_out_do_not_change_under_the_reader(path):
+    collection = _collection(path)
+    collection.put(_employee("1"))
+    mapping = collection.records()
+    record = mapping["1"]
+
+    collection.patch("1", {"department": "HR"})
+    assert record["department"] == "IT"
+    assert mapping is not collection.records()
+
+
+def test_corrupt_snapshot_is_served_as_empty_and_kept(path, caplog):
+    path.write_text('[{"employee_id": ')
+
+    collection = _collection(path)
+    assert collection.all() == []
+    assert "Unreadable snapshot" in caplog.text
+    assert (path.parent / 'employees.json.corrupt').read_text() == '[{"employee_id": '
+
+
+def test_json_handler_returns_copies_unless_asked_not_to(tmp_path):
+    handler = JSONHandler(str(tmp_path / 'employees.json'))
+    employees = [_employee("1", status="Active", meta={"level": 1})]
+    handler.save_data(employees)
+    employees[0]["meta"]["level"] = 2
+
+    handler.load_data()[0]["meta"]["level"] = 3
+    handler.get_employee_by_name("employee 1")["meta"]["level"] = 4
+    handler.get_employees_by_department("IT")[0]["meta"]["level"] = 5
+
+    assert handler.get_employee_by_id("1")["meta"]["level"] == 1
+    assert handler.get_all_employees(copy=False) is handler.collection.all()
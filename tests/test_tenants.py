@@ -0,0 +1,81 @@
+"""Tenant partitions and how a web request picks its tenant."""
+
+import json
+import os
+
+import pytest
+from flask import Flask, g
+
+from utils import tenants as tenants_module
+
+
+@pytest.fixture
+def registry(tmp_path):
+    with open(tmp_path / 'tenants.json', 'w') as f:
+        json.dump({"default_tenant": "main", "tenants": {
+            "main": {"name": "Head Office", "data_dir": "."},
+            "ksa": {"name": "KSA Entity"},
+        }}, f)
+    return tenants_module.TenantRegistry(str(tmp_path), str(tmp_path / 'uploads'))
+
+
+@pytest.fixture
+def client(registry):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    tenants_module.init_app(app, registry)
+
+    @app.route('/tenant')
+    def tenant():
+        return g.tenant.id
+
+    return app.test_client()
+
+
+def test_registry_partitions(registry, tmp_path):
+    assert registry.default.id == "main"
+    assert registry.get("main").data_dir == str(tmp_path)
+    assert registry.get("ksa").data_dir == os.path.join(str(tmp_path), 'tenants', 'ksa')
+    assert (registry.get("main").upload_prefix, registry.get("ksa").upload_prefix) == ('', 'tenants/ksa/')
+    with pytest.raises(tenants_module.TenantError):
+        registry.get("uae")
+
+
+def test_without_tenants_json_the_data_directory_is_one_tenant(tmp_path):
+    registry = tenants_module.TenantRegistry(str(tmp_path))
+    assert list(registry.tenants) == [tenants_module.DEFAULT_TENANT]
+    assert registry.default.data_dir == str(tmp_path)
+
+
+def test_default_tenant_without_a_choice(client):
+    assert client.get('/tenant').data == b'main'
+
+
+def test_query_parameter_is_remembered_in_the_session(client):
+    assert client.get('/tenant?tenant=ksa').data == b'ksa'
+    assert client.get('/tenant').data == b'ksa'
+    assert client.get('/tenant?tenant=main').data == b'main'
+    assert client.get('/tenant').data == b'main'
+
+
+def test_header_selects_the_tenant_for_one_request(client):
+    assert client.get('/tenant', headers={tenants_module.TENANT_HEADER: 'ksa'}).data == b'ksa'
+    assert client.get('/tenant').data == b'main'
+
+
+def test_header_wins_over_the_session_but_not_the_query_parameter(client):
+    client.get('/tenant?tenant=ksa')
+    assert client.get('/tenant', headers={tenants_module.TENANT_HEADER: 'main'}).data == b'main'
+    assert client.get('/tenant?tenant=ksa', headers={tenants_module.TENANT_HEADER: 'main'}).data == b'ksa'
+
+
+def test_unknown_tenant_is_not_found(client):
+    assert client.get('/tenant?tenant=uae').status_code == 404
+    assert client.get('/tenant', headers={tenants_module.TENANT_HEADER: 'uae'}).status_code == 404
+    assert client.get('/tenant').data == b'main'
+
+
+def test_tenant_removed_from_the_registry_falls_back_to_the_default(client, registry):
+    client.get('/tenant?tenant=ksa')
+    del registry.tenants["ksa"]
+    assert client.get('/tenant').data == b'main'
@@ -0,0 +1,114 @@
+"""Deduplication, size limits, quotas and reference counting of utils/upload_store.py."""
+
+import hashlib
+import io
+import os
+
+import pytest
+from werkzeug.datastructures import FileStorage
+
+from utils import storage as storage_module
+from utils.upload_store import UploadRejected, UploadStore
+
+
+def _file(content: bytes, filename: str = "letter.pdf") -> FileStorage:
+    return FileStorage(io.BytesIO(content), filename=filename, content_type="application/pdf")
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = storage_module.get_storage(str(tmp_path / 'data'))
+    storage.employees.put_many([
+        {"employee_id": "E1", "name": "Ada Lovelace"},
+        {"employee_id": "E2", "name": "Alan Turing"},
+    ])
+    return storage
+
+
+@pytest.fixture
+def store(tmp_path, storage):
+    return UploadStore(str(tmp_path / 'uploads'), storage.uploads, max_file_size=1024,
+                       employee_quota=2048, chunk_size=100)
+
+
+def _objects(store):
+    return sorted(name for _, _, files in os.walk(os.path.join(store.root, 'objects')) for name in files)
+
+
+def test_upload_is_stored_under_its_hash(store, storage):
+    content = b"resignation letter"
+    employee = store.attach(storage.employees, "E1", "resignation_letter", _file(content),
+                            {"status": "Resigned"})
+
+    digest = hashlib.sha256(content).hexdigest()
+    assert employee["resignation_letter"] == f"objects/{digest[:2]}/{digest}.pdf"
+    assert employee["status"] == "Resigned"
+    with open(store.path_for(employee["resignation_letter"]), 'rb') as f:
+        assert f.read() == content
+    entry = storage.uploads.get(digest)
+    assert entry["refs"] == ["E1:resignation_letter"]
+    assert entry["size"] == len(content)
+    assert os.listdir(store.temp_dir) == []
+
+
+def test_identical_uploads_share_one_file(store, storage):
+    first = store.attach(storage.employees, "E1", "nda", _file(b"standard nda"))
+    second = store.attach(storage.employees, "E2", "nda", _file(b"standard nda", "copy.pdf"))
+
+    assert first["nda"] == second["nda"]
+    assert len(_objects(store)) == 1
+    digest = hashlib.sha256(b"standard nda").hexdigest()
+    assert storage.uploads.get(digest)["refs"] == ["E1:nda", "E2:nda"]
+
+
+def test_file_is_deleted_when_its_last_reference_goes(store, storage):
+    old = store.attach(storage.employees, "E1", "nda", _file(b"old nda"))["nda"]
+    store.attach(storage.employees, "E2", "nda", _file(b"old nda"))
+
+    store.attach(storage.employees, "E1", "nda", _file(b"new nda"))
+    assert os.path.exists(store.path_for(old))
+
+    store.attach(storage.employees, "E2", "nda", _file(b"new nda"))
+    assert not os.path.exists(store.path_for(old))
+    assert storage.uploads.get(hashlib.sha256(b"old nda").hexdigest()) is None
+    assert len(_objects(store)) == 1
+
+
+def test_reattaching_the_same_file_keeps_one_reference(store, storage):
+    store.attach(storage.employees, "E1", "nda", _file(b"same"))
+    store.attach(storage.employees, "E1", "nda", _file(b"same"))
+    assert storage.uploads.get(hashlib.sha256(b"same").hexdigest())["refs"] == ["E1:nda"]
+
+
+def test_oversized_upload_is_rejected_while_streaming(store, storage):
+    with pytest.raises(UploadRejected):
+        store.attach(storage.employees, "E1", "nda", _file(b"x" * 1025))
+    assert "nda" not in storage.employees.get("E1")
+    assert _objects(store) == []
+    assert os.listdir(store.temp_dir) == []
+
+
+def test_employee_quota_counts_distinct_fields(store, storage):
+    store.attach(storage.employees, "E1", "payslip", _file(b"a" * 1000))
+    store.attach(storage.employees, "E1", "nda", _file(b"b" * 1000))
+
+    with pytest.raises(UploadRejected, match="quota"):
+        store.attach(storage.employees, "E1", "resignation_letter", _file(b"c" * 100))
+    # Replacing a field frees its old file's share of the quota
+    store.attach(storage.employees, "E1", "nda", _file(b"d" * 1000))
+    # Other employees have their own quota
+    store.attach(storage.employees, "E2", "nda", _file(b"e" * 1000))
+
+
+def test_unknown_employee_is_rejected_without_storing(store, storage):
+    with pytest.raises(UploadRejected):
+        store.attach(storage.employees, "E9", "nda", _file(b"orphan"))
+    assert storage.uploads.all() == []
+    assert _objects(store) == []
+
+
+def test_tenant_prefix_keeps_files_apart(tmp_path, storage):
+    store = UploadStore(str(tmp_path / 'uploads'), storage.uploads, prefix='tenants/b/')
+    employee = store.attach(storage.employees, "E1", "nda", _file(b"tenant file"))
+    assert employee["nda"].startswith('tenants/b/objects/')
+    assert os.path.exists(store.path_for(employee["nda"]))
@@ -0,0 +1,373 @@
+"""
+Business calendar and due-date rules for workflow steps.
+
+Each workflow step carries a due-date rule: an anchor (the employee's last
+working day, the request's creation time or another step's completion), an
+offset in business or calendar days, how to roll a date that falls on a
+weekend or holiday, and the local time of day the step is due.
+
+Working days come from holiday calendars (a weekend plus a list of holiday
+dates) and every employee location maps to a calendar and a time zone. Both
+are read from data/business_calendar.json:
+
+    {
+        "default_location": "Head Office",
+        "locations": {"London": {"timezone": "Europe/London", "calendar": "GB"}},
+        "calendars": {"GB": {"weekend": ["Sat", "Sun"], "holidays": ["2026-12-25"]}},
+        "step_rules": {"step_3_pre_lwd_processing": {"anchor": "lwd", "offset": -10}}
+    }
+
+"step_rules" overrides the rules defined with the workflow steps. A location
+without a time zone uses the server's local time.
+
+Due dates are computed column by column: for one step, the anchor dates of
+every workflow in a batch are shifted together against a sorted table of
+business-day ordinals, so a business-day offset is a table lookup rather than
+a day-by-day walk.
+"""
+
+import bisect
+import json
+import os
+from datetime import date, datetime, time
+from typing import Dict, List, Any, Iterable, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+DEFAULT_CALENDAR_PATH = os.path.join(os.path.dirname(__file__), '..', 'data', 'business_calendar.json')
+DEFAULT_LOCATION = "Head Office"
+DEFAULT_DUE_TIME = "23:59"
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+ANCHORS = ("lwd", "created")
+UNITS = ("business_days", "days")
+ROLLS = ("forward", "backward", "none")
+
+# Extra calendar days the business-day table covers on either side of a request
+TABLE_MARGIN_DAYS = 366
+
+
+class CalendarError(ValueError):
+    """Invalid calendar configuration or due-date rule."""
+
+
+def parse_datetime(value) -> datetime:
+    """
+    Parse an ISO date/time string (or datetime) into an aware datetime.
+
+    Values without an offset, as stored before due dates carried time zones,
+    are taken as server local time.
+    """
+    if not isinstance(value, datetime):
+        value = datetime.fromisoformat(value)
+    return value if value.tzinfo is not None else value.astimezone()
+
+
+def _parse_date(value) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise CalendarError(f"Invalid date: {value!r} (expected YYYY-MM-DD)")
+
+
+class HolidayCalendar:
+    """
+    Working days of one calendar: every day except the weekend and holidays.
+
+    Args:
+        weekend: Weekday numbers (Monday is 0) that are not working days
+        holidays: Holiday dates (date objects or YYYY-MM-DD strings)
+    """
+
+    def __init__(self, weekend: Iterable[int] = (5, 6), holidays: Iterable = ()):
+        self.weekend = frozenset(weekend)
+        if len(self.weekend) >= 7:
+            raise CalendarError("A calendar needs at least one working weekday")
+        self.holidays = frozenset(_parse_date(day).toordinal() for day in holidays)
+        self._days: List[int] = []  # Sorted business-day ordinals
+        self._first = self._last = 0
+
+    def is_business_day(self, day) -> bool:
+        ordinal = _parse_date(day).toordinal()
+        # date.fromordinal(1) is a Monday
+        return (ordinal - 1) % 7 not in self.weekend and ordinal not in self.holidays
+
+    def _ensure(self, first: int, last: int):
+        """Make sure the business-day table covers ordinals first..last."""
+        if self._days and self._first <= first and last <= self._last:
+            return
+        if self._days:
+            first, last = min(first, self._first), max(last, self._last)
+        first, last = first - TABLE_MARGIN_DAYS, last + TABLE_MARGIN_DAYS
+        weekend, holidays = self.weekend, self.holidays
+        self._days = [o for o in range(first, last + 1)
+                      if (o - 1) % 7 not in weekend and o not in holidays]
+        self._first, self._last = first, last
+
+    def offset_many(self, ordinals: List[int], offsets: List[int], roll: str = "forward") -> List[int]:
+        """
+        Shift date ordinals by business-day offsets.
+
+        A date that is not a business day is first rolled to the next
+        ("forward") or previous ("backward") business day, as numpy's
+        busday_offset does.
+        """
+        if not ordinals:
+            return []
+        # Seven calendar days hold at least one business day, so this bounds every result
+        reach = 7 * (max(abs(n) for n in offsets) + 1) + 7 * len(self.holidays)
+        self._ensure(min(ordinals) - reach, max(ordinals) + reach)
+
+        days = self._days
+        backward = roll == "backward"
+        result = []
+        for ordinal, offset in zip(ordinals, offsets):
+            i = bisect.bisect_left(days, ordinal)
+            if backward and days[i] != ordinal:
+                i -= 1
+            result.append(days[i + offset])
+        return result
+
+    def roll_many(self, ordinals: List[int], roll: str) -> List[int]:
+        """Move non-business days to the next or previous business day."""
+        if roll == "none":
+            return list(ordinals)
+        return self.offset_many(ordinals, [0] * len(ordinals), roll)
+
+
+class DueRule:
+    """
+    Due-date rule of one workflow step.
+
+    Args:
+        anchor: "lwd", "created" or "step:<step id>" (that step's completion)
+        offset: Days after (or, when negative, before) the anchor
+        unit: "business_days" or "days"
+        roll: "forward", "backward" or "none" for a date off the calendar
+            (calendar-day rules default to "none")
+        due_time: Local time of day (HH:MM) the step is due
+    """
+
+    def __init__(self, anchor: str = "lwd", offset: int = 0, unit: str = "business_days",
+                 roll: Optional[str] = None, due_time: str = DEFAULT_DUE_TIME):
+        if anchor not in ANCHORS and not (anchor.startswith("step:") and len(anchor) > 5):
+            raise CalendarError(f"Unknown due-date anchor: {anchor}")
+        if unit not in UNITS:
+            raise CalendarError(f"Unknown due-date unit: {unit}")
+        if roll is None:
+            roll = "forward" if unit == "business_days" else "none"
+        if roll not in ROLLS:
+            raise CalendarError(f"Unknown roll: {roll}")
+        try:
+            self.time = time.fromisoformat(due_time)
+        except (TypeError, ValueError):
+            raise CalendarError(f"Invalid due time: {due_time}")
+        self.anchor = anchor
+        self.offset = int(offset)
+        self.unit = unit
+        self.roll = roll
+        self.due_time = due_time
+
+    @property
+    def anchor_step(self) -> Optional[str]:
+        """Step ID the rule is anchored on, if any."""
+        return self.anchor[5:] if self.anchor.startswith("step:") else None
+
+    @classmethod
+    def from_dict(cls, spec: Dict[str, Any]) -> "DueRule":
+        unknown = set(spec) - {"anchor", "offset", "unit", "roll", "due_time"}
+        if unknown:
+            raise CalendarError(f"Unknown due-rule fields: {', '.join(sorted(unknown))}")
+        return cls(**spec)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"anchor": self.anchor, "offset": self.offset, "unit": self.unit,
+                "roll": self.roll, "due_time": self.due_time}
+
+
+def order_rules(rules: Dict[str, DueRule]) -> List[str]:
+    """
+    Step IDs ordered so every step comes after the step it is anchored on.
+
+    Raises:
+        CalendarError: If a rule is anchored on an unknown step or the anchors form a cycle
+    """
+    ordered, visiting = [], set()
+
+    def visit(step_id):
+        if step_id in ordered:
+            return
+        if step_id in visiting:
+            raise CalendarError(f"Due-date rules form a cycle at {step_id}")
+        visiting.add(step_id)
+        anchor_step = rules[step_id].anchor_step
+        if anchor_step is not None:
+            if anchor_step not in rules:
+                raise CalendarError(f"{step_id} is anchored on unknown step {anchor_step}")
+            visit(anchor_step)
+        visiting.discard(step_id)
+        ordered.append(step_id)
+
+    for step_id in rules:
+        visit(step_id)
+    return ordered
+
+
+class BusinessCalendar:
+    """
+    Holiday calendars and time zones by employee location, plus step-rule overrides.
+
+    Args:
+        calendars: HolidayCalendar by name
+        locations: Location name -> {"timezone": IANA name or None, "calendar": calendar name}
+        default_location: Location used for employees without a known location
+        step_rules: Due-rule dicts by step ID that override the workflow's own rules
+    """
+
+    def __init__(self, calendars: Dict[str, HolidayCalendar] = None,
+                 locations: Dict[str, Dict[str, Any]] = None,
+                 default_location: str = DEFAULT_LOCATION,
+                 step_rules: Dict[str, Dict[str, Any]] = None):
+        self.calendars = dict(calendars or {})
+        self.calendars.setdefault("default", HolidayCalendar())
+        self.default_location = default_location
+        self.step_rules = {step_id: DueRule.from_dict(spec) for step_id, spec in (step_rules or {}).items()}
+
+        self._locations = {}
+        for name, spec in (locations or {}).items():
+            self._locations[name] = self._resolve_location(name, spec)
+        if default_location not in self._locations:
+            self._locations[default_location] = (None, self.calendars["default"])
+
+    def _resolve_location(self, name: str, spec: Dict[str, Any]):
+        calendar_name = spec.get("calendar", "default")
+        if calendar_name not in self.calendars:
+            raise CalendarError(f"Location {name} uses unknown calendar {calendar_name}")
+        zone = spec.get("timezone")
+        try:
+            tz = ZoneInfo(zone) if zone else None
+        except (ZoneInfoNotFoundError, ValueError):
+            raise CalendarError(f"Location {name} has unknown time zone {zone}")
+        return tz, self.calendars[calendar_name]
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_CALENDAR_PATH) -> "BusinessCalendar":
+        """Read a calendar file; a missing file gives a Monday-to-Friday calendar in local time."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            config = json.load(f)
+
+        calendars = {}
+        for name, spec in config.get("calendars", {}).items():
+            weekend = [WEEKDAYS.index(day) for day in spec.get("weekend", ["Sat", "Sun"])]
+            calendars[name] = HolidayCalendar(weekend, spec.get("holidays", []))
+        return cls(calendars, config.get("locations", {}),
+                   config.get("default_location", DEFAULT_LOCATION), config.get("step_rules", {}))
+
+    def location_names(self) -> List[str]:
+        return sorted(self._locations)
+
+    def location(self, name: Optional[str]):
+        """(tzinfo or None for local time, HolidayCalendar) of a location."""
+        return self._locations.get(name) or self._locations[self.default_location]
+
+    def rules_for(self, steps: Dict[str, Dict[str, Any]]) -> Dict[str, DueRule]:
+        """Due rules of workflow steps (their "due_rule" dicts), with this calendar's overrides."""
+        rules = {}
+        for step_id, step in steps.items():
+            if step_id in self.step_rules:
+                rules[step_id] = self.step_rules[step_id]
+            else:
+                rules[step_id] = DueRule.from_dict(step.get("due_rule") or {})
+        return rules
+
+    @staticmethod
+    def _local_ordinal(value, tz, cache: Dict) -> int:
+        if (value, tz) not in cache:
+            moment = parse_datetime(value)
+            cache[value, tz] = (moment.astimezone(tz) if tz else moment.astimezone()).date().toordinal()
+        return cache[value, tz]
+
+    @staticmethod
+    def _format(ordinal: int, rule: DueRule, tz, cache: Dict) -> str:
+        if (ordinal, rule.time, tz) not in cache:
+            moment = datetime.combine(date.fromordinal(ordinal), rule.time)
+            cache[ordinal, rule.time, tz] = (moment.replace(tzinfo=tz) if tz else moment.astimezone()).isoformat()
+        return cache[ordinal, rule.time, tz]
+
+    def compute_due_dates(self, rules: Dict[str, DueRule], anchors: List[Dict[str, Any]],
+                          only: Iterable[str] = None) -> List[Dict[str, str]]:
+        """
+        Compute step due dates for a batch of workflows.
+
+        Args:
+            rules: DueRule by step ID (see rules_for)
+            anchors: One dict per workflow with "lwd" (YYYY-MM-DD), "created"
+                (ISO date/time), optionally "location" and "completed"
+                (completion date/time by step ID)
+            only: Step IDs to return (default: all); the steps they are
+                anchored on are still computed
+
+        Returns:
+            List of {step ID: ISO due date/time with offset}, in the order of anchors
+
+        A step anchored on another step uses that step's completion when it
+        is completed and its due date otherwise.
+        """
+        ordered = order_rules(rules)
+        wanted = set(only) if only is not None else set(rules)
+        locations = [self.location(a.get("location")) for a in anchors]
+        lwd = [_parse_date(a["lwd"]).toordinal() for a in anchors]
+        # Batches share few distinct creation times and due dates, so conversions are cached
+        parsed, formatted = {}, {}
+        created = [self._local_ordinal(a["created"], tz, parsed) for a, (tz, _) in zip(anchors, locations)]
+
+        # Workflow positions by calendar, so each calendar's table is used once per step
+        groups: Dict[int, List[int]] = {}
+        for i, (_, calendar) in enumerate(locations):
+            groups.setdefault(id(calendar), []).append(i)
+
+        due: Dict[str, List[int]] = {}
+        results = [{} for _ in anchors]
+        for step_id in ordered:
+            rule = rules[step_id]
+            anchor_step = rule.anchor_step
+            if anchor_step is not None:
+                base = list(due[anchor_step])
+                for i, a in enumerate(anchors):
+                    completed = (a.get("completed") or {}).get(anchor_step)
+                    if completed:
+                        base[i] = self._local_ordinal(completed, locations[i][0], parsed)
+            else:
+                base = lwd if rule.anchor == "lwd" else created
+
+            column = [0] * len(anchors)
+            for positions in groups.values():
+                calendar = locations[positions[0]][1]
+                ordinals = [base[i] for i in positions]
+                if rule.unit == "business_days":
+                    shifted = calendar.offset_many(ordinals, [rule.offset] * len(ordinals), rule.roll)
+                else:
+                    shifted = calendar.roll_many([o + rule.offset for o in ordinals], rule.roll)
+                for i, ordinal in zip(positions, shifted):
+                    column[i] = ordinal
+            due[step_id] = column
+
+            if step_id in wanted:
+                for i, ordinal in enumerate(column):
+                    results[i][step_id] = self._format(ordinal, rule, locations[i][0], formatted)
+        return results
+
+
+_calendars: Dict[str, BusinessCalendar] = {}
+
+
+def get_business_calendar(path: str = DEFAULT_CALENDAR_PATH) -> BusinessCalendar:
+    """Shared calendar for a calendar file, loaded on first use."""
+    path = os.path.abspath(path)
+    if path not in _calendars:
+        _calendars[path] = BusinessCalendar.load(path)
+    return _calendars[path]
@@ -0,0 +1,390 @@
+"""
+Bulk export of employees, enhanced workflows, workflow tasks and task transitions.
+
+Rows are produced by generators and written in fixed-size chunks, so the
+output side never holds more than one chunk in memory. CSV is always
+available; Parquet and Arrow IPC output require the optional ``pyarrow``
+package.
+
+Command line usage:
+    python -m utils.exporter employees --format csv --output employees.csv
+    python -m utils.exporter tasks --format parquet --output tasks.parquet \\
+        --reports workflow_report_*.json
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from typing import Dict, List, Any, Iterable, Iterator, Tuple
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Column name and type ("string", "bool", "int" or "float") for each export
+EMPLOYEE_COLUMNS = [
+    ("employee_id", "string"),
+    ("name", "string"),
+    ("email", "string"),
+    ("department", "string"),
+    ("position", "string"),
+    ("status", "string"),
+    ("join_date", "string"),
+    ("exit_date", "string"),
+    ("resignation_letter", "string"),
+    ("exit_interview", "string"),
+    ("it_access_revoked", "bool"),
+    ("devices_collected", "bool"),
+    ("files_transferred", "bool"),
+    ("final_salary", "string"),
+    ("loan_balance", "string"),
+    ("payslip", "string"),
+    ("nda_validated", "bool"),
+    ("conf_docs_returned", "bool"),
+    ("access_card_reclaimed", "bool"),
+    ("facility_access_removed", "bool"),
+    ("handover_confirmed", "bool"),
+    ("checklist_approved", "bool"),
+    ("created_at", "string"),
+    ("updated_at", "string"),
+]
+
+WORKFLOW_COLUMNS = [
+    ("request_id", "string"),
+    ("employee_id", "string"),
+    ("employee_name", "string"),
+    ("email", "string"),
+    ("department", "string"),
+    ("position", "string"),
+    ("line_manager", "string"),
+    ("reason_for_leaving", "string"),
+    ("last_working_day", "string"),
+    ("status", "string"),
+    ("overall_progress", "float"),
+    ("current_step", "string"),
+    ("created_date", "string"),
+    ("total_tasks", "int"),
+    ("completed_tasks", "int"),
+    ("note_count", "int"),
+]
+
+TASK_COLUMNS = [
+    ("request_id", "string"),
+    ("employee_id", "string"),
+    ("step_id", "string"),
+    ("step_name", "string"),
+    ("step_status", "string"),
+    ("step_due_date", "string"),
+    ("task_id", "string"),
+    ("task_name", "string"),
+    ("responsible_team", "string"),
+    ("status", "string"),
+    ("completed_date", "string"),
+    ("completed_by", "string"),
+]
+
+TRANSITION_COLUMNS = [
+    ("request_id", "string"),
+    ("employee_id", "string"),
+    ("date", "string"),
+    ("step_id", "string"),
+    ("task_id", "string"),
+    ("from_status", "string"),
+    ("to_status", "string"),
+    ("changed_by", "string"),
+]
+
+EXPORT_KINDS = {
+    "employees": EMPLOYEE_COLUMNS,
+    "workflows": WORKFLOW_COLUMNS,
+    "tasks": TASK_COLUMNS,
+    "transitions": TRANSITION_COLUMNS,
+}
+
+EXPORT_FORMATS = ("csv", "parquet", "arrow")
+
+
+def _team_value(team: Any) -> str:
+    """Convert a TeamResponsibility (or list of them) to a plain string."""
+    if team is None:
+        return None
+    if isinstance(team, list):
+        return ",".join(_team_value(t) for t in team)
+    return team.value if hasattr(team, 'value') else str(team)
+
+
+def iter_employee_rows(employees: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one flat row per employee record."""
+    for employee in employees:
+        yield {name: employee.get(name) for name, _ in EMPLOYEE_COLUMNS}
+
+
+def iter_workflow_rows(workflows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one summary row per enhanced workflow."""
+    for workflow in workflows:
+        employee_data = workflow["employee_data"]
+        total_tasks = 0
+        completed_tasks = 0
+        for step in workflow["steps"].values():
+            for task in step["tasks"]:
+                total_tasks += 1
+                if task["status"] == "completed":
+                    completed_tasks += 1
+
+        yield {
+            "request_id": workflow["request_id"],
+            "employee_id": employee_data.get("employee_id"),
+            "employee_name": employee_data.get("name"),
+            "email": employee_data.get("email"),
+            "department": employee_data.get("department"),
+            "position": employee_data.get("position"),
+            "line_manager": employee_data.get("line_manager"),
+            "reason_for_leaving": employee_data.get("reason_for_leaving"),
+            "last_working_day": employee_data.get("last_working_day"),
+            "status": workflow["status"],
+            "overall_progress": workflow["overall_progress"],
+            "current_step": workflow["current_step"],
+            "created_date": workflow["created_date"],
+            "total_tasks": total_tasks,
+            "completed_tasks": completed_tasks,
+            "note_count": len(workflow.get("notes", [])),
+        }
+
+
+def iter_task_rows(workflows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one row per task of every enhanced workflow."""
+    for workflow in workflows:
+        employee_id = workflow["employee_data"].get("employee_id")
+        for step_id, step in workflow["steps"].items():
+            for task in step["tasks"]:
+                yield {
+                    "request_id": workflow["request_id"],
+                    "employee_id": employee_id,
+                    "step_id": step_id,
+                    "step_name": step["name"],
+                    "step_status": step["status"],
+                    "step_due_date": step["due_date"],
+                    "task_id": task["id"],
+                    "task_name": task["name"],
+                    "responsible_team": _team_value(task.get("responsible_team") or step["responsible_team"]),
+                    "status": task["status"],
+                    "completed_date": task.get("completed_date"),
+                    "completed_by": task.get("completed_by"),
+                }
+
+
+def iter_transition_rows(workflows: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Yield one row per recorded task status transition."""
+    for workflow in workflows:
+        employee_id = workflow["employee_data"].get("employee_id")
+        for entry in workflow.get("history", []):
+            if "to_status" not in entry:
+                continue  # Not a task transition (e.g. a reschedule)
+            row = {name: entry.get(name) for name, _ in TRANSITION_COLUMNS}
+            row["request_id"] = workflow["request_id"]
+            row["employee_id"] = employee_id
+            yield row
+
+
+def iter_export_rows(kind: str, employees: Iterable[Dict[str, Any]] = (),
+                     workflows: Iterable[Dict[str, Any]] = ()) -> Iterator[Dict[str, Any]]:
+    """Yield the rows for an export kind from employees or workflows."""
+    if kind == "employees":
+        return iter_employee_rows(employees)
+    if kind == "workflows":
+        return iter_workflow_rows(workflows)
+    if kind == "tasks":
+        return iter_task_rows(workflows)
+    if kind == "transitions":
+        return iter_transition_rows(workflows)
+    raise ValueError(f"Unknown export kind: {kind}")
+
+
+def iter_chunks(rows: Iterable[Dict[str, Any]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[List[Dict[str, Any]]]:
+    """Group rows into lists of at most chunk_size rows."""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]],
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Yield CSV text, one header block and then one block per chunk of rows."""
+    names = [name for name, _ in columns]
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=names, extrasaction='ignore')
+    writer.writeheader()
+    yield buffer.getvalue()
+
+    for chunk in iter_chunks(rows, chunk_size):
+        buffer.seek(0)
+        buffer.truncate()
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+
+
+def _arrow_schema(columns: List[Tuple[str, str]]):
+    """Build a pyarrow schema for an export's columns."""
+    import pyarrow as pa
+
+    types = {"string": pa.string(), "bool": pa.bool_(), "int": pa.int64(), "float": pa.float64()}
+    return pa.schema([(name, types[type_name]) for name, type_name in columns])
+
+
+def _coerce(value: Any, type_name: str) -> Any:
+    """Coerce a JSON value to the column type, keeping None as null."""
+    if value is None or value == "":
+        return None if type_name != "string" else value
+    if type_name == "string":
+        return value if isinstance(value, str) else str(value)
+    if type_name == "bool":
+        return bool(value)
+    if type_name == "int":
+        return int(value)
+    return float(value)
+
+
+def _iter_record_batches(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]], chunk_size: int):
+    """Yield one pyarrow RecordBatch per chunk of rows."""
+    import pyarrow as pa
+
+    schema = _arrow_schema(columns)
+    for chunk in iter_chunks(rows, chunk_size):
+        arrays = [
+            pa.array([_coerce(row.get(name), type_name) for row in chunk], type=schema.field(name).type)
+            for name, type_name in columns
+        ]
+        yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _require_pyarrow(file_format: str):
+    """Raise a helpful error when pyarrow is not installed."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        raise RuntimeError(f"{file_format} export requires pyarrow (pip install pyarrow)")
+
+
+def write_csv(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]], output: str,
+              chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Write rows to a CSV file chunk by chunk."""
+    with open(output, 'w', newline='') as f:
+        for block in stream_csv(rows, columns, chunk_size):
+            f.write(block)
+
+
+def write_parquet(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]], output: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Write rows to a Parquet file, one row group per chunk."""
+    _require_pyarrow("Parquet")
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(output, _arrow_schema(columns)) as writer:
+        for batch in _iter_record_batches(rows, columns, chunk_size):
+            writer.write_batch(batch)
+
+
+def write_arrow(rows: Iterable[Dict[str, Any]], columns: List[Tuple[str, str]], output: str,
+                chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+    """Write rows to an Arrow IPC file, one record batch per chunk."""
+    _require_pyarrow("Arrow")
+    import pyarrow as pa
+
+    with pa.OSFile(output, 'wb') as sink:
+        with pa.ipc.new_file(sink, _arrow_schema(columns)) as writer:
+            for batch in _iter_record_batches(rows, columns, chunk_size):
+                writer.write_batch(batch)
+
+
+def _workflow_from_report(report: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert an export_workflow_report dump back into workflow shape."""
+    if "workflow_summary" not in report:
+        # Already a stored workflow (enhanced_workflows.json)
+        return report
+    summary = report["workflow_summary"]
+    return {
+        "request_id": report["request_id"],
+        "employee_data": report["employee_data"],
+        "status": summary["status"],
+        "overall_progress": summary["overall_progress"],
+        "created_date": summary["created_date"],
+        "current_step": summary["current_step"],
+        "steps": report["steps_detail"],
+        "notes": report.get("notes", []),
+        "history": report.get("history", []),
+    }
+
+
+def load_workflow_reports(paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Yield workflows from saved workflow report files, skipping unreadable ones.
+
+    A file may hold a single report or a list of reports; stored workflows
+    (enhanced_workflows.json) are accepted as well.
+    """
+    for path in paths:
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            reports = data if isinstance(data, list) else [data]
+            workflows = [_workflow_from_report(report) for report in reports]
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+        yield from workflows
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Bulk export offboarding data")
+    parser.add_argument("kind", choices=sorted(EXPORT_KINDS))
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    parser.add_argument("--output", help="Output file (CSV defaults to stdout)")
+    parser.add_argument("--data", default=os.path.join('data', 'employees.json'),
+                        help="Employee data file")
+    parser.add_argument("--reports", nargs="*", default=[],
+                        help="Workflow report JSON files to export workflows from "
+                             "(default: the workflows stored next to --data)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.kind == "employees":
+        from utils.json_handler import JSONHandler
+        rows = iter_export_rows(args.kind, employees=JSONHandler(args.data).get_all_employees(copy=False))
+    elif args.reports:
+        rows = iter_export_rows(args.kind, workflows=load_workflow_reports(args.reports))
+    else:
+        from utils.storage import get_storage
+        workflows = get_storage(os.path.dirname(args.data) or '.').workflows.all()
+        rows = iter_export_rows(args.kind, workflows=workflows)
+    columns = EXPORT_KINDS[args.kind]
+
+    if args.format == "csv":
+        if args.output:
+            write_csv(rows, columns, args.output, args.chunk_size)
+        else:
+            for block in stream_csv(rows, columns, args.chunk_size):
+                sys.stdout.write(block)
+        return 0
+
+    if not args.output:
+        parser.error(f"--output is required for {args.format} export")
+    try:
+        if args.format == "parquet":
+            write_parquet(rows, columns, args.output, args.chunk_size)
+        else:
+            write_arrow(rows, columns, args.output, args.chunk_size)
+    except RuntimeError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
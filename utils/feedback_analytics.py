@@ -0,0 +1,312 @@
+"""
+Exit interview feedback analytics.
+
+Free-text feedback from exit interviews is tokenised and analysed offline,
+on the CPU only:
+
+- keywords: the most frequent non-stopword terms
+- topics: themes from a keyword lexicon (compensation, management, growth,
+  workload, culture, relocation)
+- sentiment: lexicon-based score from -1 (negative) to 1 (positive), with
+  negations ("not", "no", ...) flipping the words that follow; every topic
+  also gets the sentiment of the sentences that mention it
+
+Results are cached per interview in data/feedback_analytics.json together
+with the version of the feedback they were computed from, so a refresh only
+analyses new or changed interviews. Large refreshes run in batches across a
+process pool. Refreshes run outside web requests: from this module's command
+line or as a "feedback.refresh" background job, which scheduling an exit
+interview enqueues. themes() aggregates the results by department and reason
+for leaving; /reports only reads the cached analyses (analyse=False).
+
+Usage:
+    python -m utils.feedback_analytics --data-dir data --processes 4
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import os
+import re
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Any, Iterable
+
+from utils.legacy_requests import reason_for_leaving
+from utils.search import tokenize
+from utils.storage import get_storage
+
+# Bump when the lexicons or scoring change, so cached results are recomputed
+ANALYZER_VERSION = 1
+CACHE_FILE = 'feedback_analytics.json'
+BATCH_SIZE = 500
+KEYWORDS_PER_INTERVIEW = 8
+
+SENTENCE_PATTERN = re.compile(r"[.!?;]+")
+
+STOPWORDS = frozenset("""
+a about after again all also am an and any are as at be became because become been before being but by can could did do does
+during each even felt for from had has have having he her here him his how i if in into is it its just me more
+most my no nor not of off on once only or other our out over own same she should so some such than that the their
+them then there these they this those through to too under until up very was we were what when where which while
+who why will with would you your
+""".split())
+
+NEGATIONS = frozenset({"not", "no", "never", "nor", "without", "hardly", "didn", "don", "wasn", "weren", "isn"})
+NEGATION_SCOPE = 3
+
+POSITIVE_WORDS = frozenset("""
+good great excellent fair generous supportive helpful friendly collaborative learned enjoyed happy appreciated
+recognised recognized valued flexible positive clear rewarding interesting support respect respected
+encouraging well better best
+""".split())
+
+NEGATIVE_WORDS = frozenset("""
+poor bad below unfair unclear unrealistic heavy stressful excluded limited understaffed overtime toxic lacking
+lack difficult frustrated frustrating burnout burned worse worst unhappy ignored micromanaged micromanagement
+chaotic constantly long too politics underpaid low
+""".split())
+
+# Topic -> words (or word prefixes ending in *) that indicate it
+TOPIC_LEXICON = {
+    "compensation": ["salary", "pay*", "bonus*", "compensation", "benefit*", "wage*", "raise", "market", "underpaid"],
+    "management": ["manager*", "management", "leadership", "boss", "supervisor*", "recognis*", "recogniz*",
+                   "communication", "priorities", "micromanag*"],
+    "growth": ["career", "growth", "promotion*", "learn*", "training", "responsibility", "develop*", "skills"],
+    "workload": ["workload", "overtime", "deadline*", "understaffed", "hours", "burnout", "balance", "stress*"],
+    "culture": ["culture", "team", "colleague*", "politics", "excluded", "inclusion", "collaborative", "friendly"],
+    "relocation": ["relocat*", "commute", "remote", "city", "family", "move"],
+}
+
+_TOPIC_WORDS = {topic: {word for word in words if not word.endswith("*")} for topic, words in TOPIC_LEXICON.items()}
+_TOPIC_PREFIXES = {topic: tuple(word[:-1] for word in words if word.endswith("*"))
+                   for topic, words in TOPIC_LEXICON.items()}
+
+
+def feedback_version(feedback: str) -> str:
+    """Version of a feedback text for the cache: analyzer version and content hash."""
+    return f"{ANALYZER_VERSION}:{hashlib.sha1(feedback.encode('utf-8')).hexdigest()[:16]}"
+
+
+def _topics(tokens: Iterable[str]) -> List[str]:
+    found = []
+    for topic in TOPIC_LEXICON:
+        words, prefixes = _TOPIC_WORDS[topic], _TOPIC_PREFIXES[topic]
+        if any(token in words or (prefixes and token.startswith(prefixes)) for token in tokens):
+            found.append(topic)
+    return found
+
+
+def _sentiment(tokens: List[str]) -> float:
+    positive = negative = 0
+    negated = 0
+    for token in tokens:
+        if token in NEGATIONS:
+            negated = NEGATION_SCOPE
+            continue
+        polarity = (token in POSITIVE_WORDS) - (token in NEGATIVE_WORDS)
+        if negated:
+            polarity = -polarity
+            negated -= 1
+        if polarity > 0:
+            positive += 1
+        elif polarity < 0:
+            negative += 1
+    if not positive and not negative:
+        return 0.0
+    # Scaled by length, so one opinion word in a long answer counts for less
+    return max(-1.0, min(1.0, (positive - negative) / math.sqrt(positive + negative + 1)))
+
+
+def analyze_feedback(feedback: str) -> Dict[str, Any]:
+    """Keywords, topics with their sentiment, and overall sentiment of one feedback text."""
+    tokens = tokenize(feedback)
+    keywords = Counter(token for token in tokens if token not in STOPWORDS and not token.isdigit() and len(token) > 2)
+
+    topic_scores = {}
+    for sentence in SENTENCE_PATTERN.split(feedback):
+        sentence_tokens = tokenize(sentence)
+        if not sentence_tokens:
+            continue
+        score = _sentiment(sentence_tokens)
+        for topic in _topics(sentence_tokens):
+            topic_scores.setdefault(topic, []).append(score)
+
+    return {
+        "tokens": len(tokens),
+        "keywords": [word for word, _ in keywords.most_common(KEYWORDS_PER_INTERVIEW)],
+        "topics": {topic: round(sum(scores) / len(scores), 3) for topic, scores in topic_scores.items()},
+        "sentiment": round(_sentiment(tokens), 3),
+    }
+
+
+def _analyze_batch(batch: List[tuple]) -> List[tuple]:
+    """Worker entry point: [(interview_id, feedback)] -> [(interview_id, analysis)]."""
+    return [(interview_id, analyze_feedback(feedback)) for interview_id, feedback in batch]
+
+
+def analyze_many(items: List[tuple], processes: int = None, batch_size: int = BATCH_SIZE) -> Dict[str, Dict[str, Any]]:
+    """
+    Analyse (interview_id, feedback) pairs, in batches across processes when there are many.
+
+    Args:
+        items: (interview_id, feedback) pairs
+        processes: Worker processes (default: CPU count); 1 analyses in this process
+        batch_size: Interviews per worker task
+    """
+    processes = processes or os.cpu_count() or 1
+    batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+    if processes == 1 or len(batches) < 2:
+        return dict(_analyze_batch(items))
+
+    results = {}
+    # Spawned rather than forked: callers may be multi-threaded web servers
+    with ProcessPoolExecutor(max_workers=min(processes, len(batches)),
+                             mp_context=multiprocessing.get_context('spawn')) as pool:
+        for batch_results in pool.map(_analyze_batch, batches):
+            results.update(batch_results)
+    return results
+
+
+def refresh(storage, processes: int = None) -> Dict[str, Dict[str, Any]]:
+    """
+    Bring the cached analyses in line with the exit interviews.
+
+    Only interviews whose feedback changed since their cached analysis are
+    analysed; analyses of deleted interviews are dropped.
+
+    Args:
+        storage: StorageService of the data directory
+        processes: Worker processes for analyse_many
+
+    Returns:
+        Cache records by interview_id (interview_id, employee_id, version, analysis)
+    """
+    cache = storage.collection(CACHE_FILE)
+    interviews = storage.exit_interviews.records()
+    cached = cache.records()
+
+    stale = {}
+    for interview_id, interview in interviews.items():
+        feedback = interview.get("feedback") or ""
+        if not feedback.strip():
+            continue
+        version = feedback_version(feedback)
+        entry = cached.get(interview_id)
+        if entry is None or entry["version"] != version:
+            stale[interview_id] = (interview, version)
+
+    if stale:
+        analyses = analyze_many([(interview_id, interview["feedback"])
+                                 for interview_id, (interview, _) in stale.items()], processes)
+        cache.put_many([
+            {"interview_id": interview_id, "employee_id": interview.get("employee_id"),
+             "version": version, "analysis": analyses[interview_id]}
+            for interview_id, (interview, version) in stale.items()
+        ])
+
+    with cache.transaction():
+        for interview_id in [key for key in cache.records() if key not in interviews]:
+            cache.delete(interview_id)
+    return cached_analyses(storage)
+
+
+def cached_analyses(storage) -> Dict[str, Dict[str, Any]]:
+    """
+    The cached analyses of the current exit interviews, without analysing or writing anything.
+
+    Interviews not analysed yet are left out; an interview whose feedback
+    changed keeps its previous analysis until the next refresh.
+    """
+    interviews = storage.exit_interviews.records()
+    return {key: entry for key, entry in storage.collection(CACHE_FILE).records().items()
+            if key in interviews and (interviews[key].get("feedback") or "").strip()}
+
+
+def _reasons_by_employee(storage) -> Dict[str, str]:
+    """
+    Reason for leaving of each employee, from their latest workflow or legacy request.
+
+    Legacy free-text reasons are mapped to the workflow's ReasonForLeaving
+    values as the migration maps them, so both count in the same bucket.
+    """
+    reasons = {}
+    for request in storage.offboarding_requests.all():
+        # Requests that predate the schema may lack an employee_id
+        if request.get("reason") and request.get("employee_id"):
+            reasons[request["employee_id"]] = reason_for_leaving(request["reason"])
+    workflows = sorted(storage.workflows.records().values(), key=lambda workflow: workflow.get("created_date", ""))
+    for workflow in workflows:
+        employee = workflow.get("employee_data", {})
+        if employee.get("reason_for_leaving") and employee.get("employee_id"):
+            reasons[employee["employee_id"]] = employee["reason_for_leaving"]
+    return reasons
+
+
+def _summarize(entries: List[Dict[str, Any]], top: int) -> Dict[str, Any]:
+    mentions, topic_sentiment, keywords = Counter(), {}, Counter()
+    for entry in entries:
+        analysis = entry["analysis"]
+        keywords.update(analysis["keywords"])
+        for topic, score in analysis["topics"].items():
+            mentions[topic] += 1
+            topic_sentiment[topic] = topic_sentiment.get(topic, 0.0) + score
+    return {
+        "interviews": len(entries),
+        "sentiment": round(sum(entry["analysis"]["sentiment"] for entry in entries) / len(entries), 3),
+        "themes": [{"topic": topic, "mentions": count, "share": round(count / len(entries), 3),
+                    "sentiment": round(topic_sentiment[topic] / count, 3)}
+                   for topic, count in mentions.most_common(top)],
+        "keywords": [word for word, _ in keywords.most_common(top)],
+    }
+
+
+def themes(storage, processes: int = None, top: int = 5, analyse: bool = True) -> Dict[str, Any]:
+    """
+    Feedback themes overall, by department and by reason for leaving.
+
+    Args:
+        storage: StorageService of the data directory
+        processes: Worker processes for a refresh
+        top: Themes and keywords per summary
+        analyse: Refresh the cache first; False only reads the cached analyses
+
+    Returns:
+        {"overall": summary, "by_department": {department: summary},
+         "by_reason": {reason: summary}}, where a summary has interviews,
+         average sentiment, the top themes (mentions, share of interviews,
+         sentiment) and the top keywords
+    """
+    entries = list((refresh(storage, processes) if analyse else cached_analyses(storage)).values())
+    employees = storage.employees.records()
+    reasons = _reasons_by_employee(storage)
+
+    by_department, by_reason = {}, {}
+    for entry in entries:
+        employee = employees.get(entry["employee_id"]) or {}
+        by_department.setdefault(employee.get("department") or "Unknown", []).append(entry)
+        by_reason.setdefault(reasons.get(entry["employee_id"]) or "unknown", []).append(entry)
+
+    return {
+        "overall": _summarize(entries, top) if entries else None,
+        "by_department": {key: _summarize(group, top) for key, group in sorted(by_department.items())},
+        "by_reason": {key: _summarize(group, top) for key, group in sorted(by_reason.items())},
+    }
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point: refresh the cache and print the themes."""
+    parser = argparse.ArgumentParser(description="Analyse exit interview feedback")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--processes", type=int, default=None)
+    args = parser.parse_args(argv)
+
+    print(json.dumps(themes(get_storage(args.data_dir), args.processes), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
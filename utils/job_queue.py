@@ -0,0 +1,548 @@
+"""
+Persistent background job queue for slow offboarding side effects.
+
+Jobs live in a SQLite database in the data directory (``jobs.sqlite3``), so
+they survive restarts and can be shared by the web app, the desktop modules
+and any number of worker processes. Each job has a kind (see ``HANDLERS``), a
+JSON payload, a priority (higher runs first), an optional idempotency key (a
+second enqueue with the same key returns the existing job) and a retry budget
+with exponential backoff.
+
+A worker leases the job it runs and renews the lease while the handler is
+running; a job whose worker died is handed out again once its lease lapses.
+
+A job may be linked to a task of an enhanced workflow; the worker marks that
+task in progress when it starts, completed when the job succeeds and blocked
+when the job runs out of retries.
+
+Run workers with:
+
+    python -m utils.job_queue work --data-dir data --processes 2
+"""
+
+import argparse
+import copy
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sqlite3
+import sys
+import threading
+import time
+import zipfile
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+from utils.storage import get_storage
+
+logger = logging.getLogger(__name__)
+
+DB_NAME = 'jobs.sqlite3'
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_SECONDS = 5
+# A running job whose worker stopped renewing it for this long is handed out again;
+# run_job renews the lease of the job it runs every LEASE_SECONDS / 3
+LEASE_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    idempotency_key TEXT UNIQUE,
+    run_after REAL NOT NULL,
+    locked_by TEXT,
+    locked_at REAL,
+    request_id TEXT,
+    step_id TEXT,
+    task_id TEXT,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, priority DESC, run_after, id);
+"""
+
+JOB_STATUSES = ("queued", "running", "succeeded", "failed")
+
+
+class JobQueue:
+    """SQLite-backed job queue; safe to share between threads and processes."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _row(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def enqueue(self, kind: str, payload: Dict[str, Any], priority: int = 0,
+                idempotency_key: str = None, max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+                workflow_task: tuple = None) -> int:
+        """
+        Add a job and return its ID.
+
+        Args:
+            kind: Handler name (a key of HANDLERS)
+            payload: JSON-serialisable handler arguments
+            priority: Higher priorities are run first
+            idempotency_key: Jobs with the same key are only enqueued once
+            max_attempts: Runs before the job is marked failed
+            workflow_task: Optional (request_id, step_id, task_id) to report into
+        """
+        if kind not in HANDLERS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        request_id, step_id, task_id = workflow_task or (None, None, None)
+        now = datetime.now().isoformat()
+        conn = self._connect()
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO jobs (kind, payload, priority, max_attempts, idempotency_key, run_after, "
+            "request_id, step_id, task_id, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (kind, json.dumps(payload), priority, max_attempts, idempotency_key, time.time(),
+             request_id, step_id, task_id, now, now)
+        )
+        if cursor.rowcount:
+            return cursor.lastrowid
+        row = conn.execute("SELECT id FROM jobs WHERE idempotency_key = ?", (idempotency_key,)).fetchone()
+        return row["id"]
+
+    def claim(self, worker_id: str, expired: List[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Atomically take the next runnable job, or return None.
+
+        A running job whose lease expired is handed out again, unless that
+        was its last attempt (its worker died running it every time): such
+        jobs are marked failed instead and, if expired is given, appended to it.
+        """
+        now = time.time()
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            exhausted = conn.execute(
+                "SELECT id FROM jobs WHERE status = 'running' AND locked_at < ? AND attempts >= max_attempts",
+                (now - LEASE_SECONDS,)
+            ).fetchall()
+            if exhausted:
+                conn.execute(
+                    "UPDATE jobs SET status = 'failed', error = ?, locked_by = NULL, locked_at = NULL, "
+                    "updated_at = ? WHERE status = 'running' AND locked_at < ? AND attempts >= max_attempts",
+                    ("Worker stopped before finishing the last attempt", datetime.now().isoformat(),
+                     now - LEASE_SECONDS)
+                )
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE (status = 'queued' AND run_after <= ?) "
+                "OR (status = 'running' AND locked_at < ?) "
+                "ORDER BY priority DESC, run_after, id LIMIT 1",
+                (now, now - LEASE_SECONDS)
+            ).fetchone()
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = 'running', attempts = attempts + 1, locked_by = ?, locked_at = ?, "
+                    "updated_at = ? WHERE id = ?",
+                    (worker_id, now, datetime.now().isoformat(), row["id"])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if expired is not None:
+            expired.extend(self.get(job["id"]) for job in exhausted)
+        return self.get(row["id"]) if row is not None else None
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Renew worker_id's lease on a running job; returns False if it no longer holds the job."""
+        cursor = self._connect().execute(
+            "UPDATE jobs SET locked_at = ? WHERE id = ? AND status = 'running' AND locked_by = ?",
+            (time.time(), job_id, worker_id)
+        )
+        return cursor.rowcount > 0
+
+    def complete(self, job_id: int, result: Dict[str, Any] = None, worker_id: str = None) -> bool:
+        """
+        Record a successful run; returns False if worker_id no longer holds the job.
+
+        A worker whose lease expired must not overwrite the outcome of the
+        worker the job was handed to next, so the update only applies while
+        the job is still locked by worker_id (when given).
+        """
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = 'succeeded', result = ?, error = NULL, locked_by = NULL, "
+            "locked_at = NULL, updated_at = ? WHERE id = ?" + (" AND locked_by = ?" if worker_id else ""),
+            (json.dumps(result), datetime.now().isoformat(), job_id) + ((worker_id,) if worker_id else ())
+        )
+        return cursor.rowcount > 0
+
+    def fail(self, job_id: int, error: str, worker_id: str = None) -> Optional[bool]:
+        """
+        Record a failed attempt.
+
+        Returns True if the job will be retried, False if it failed for good
+        and None if worker_id no longer holds the job (nothing is recorded).
+        """
+        job = self.get(job_id)
+        retry = job["attempts"] < job["max_attempts"]
+        cursor = self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, run_after = ?, locked_by = NULL, locked_at = NULL, "
+            "updated_at = ? WHERE id = ?" + (" AND locked_by = ?" if worker_id else ""),
+            ("queued" if retry else "failed", error,
+             time.time() + RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1),
+             datetime.now().isoformat(), job_id) + ((worker_id,) if worker_id else ())
+        )
+        if not cursor.rowcount:
+            return None
+        return retry
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._row(row) if row else None
+
+    def list_jobs(self, status: str = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """Most recent jobs first, optionally filtered by status."""
+        if status:
+            rows = self._connect().execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?", (status, limit)
+            )
+        else:
+            rows = self._connect().execute("SELECT * FROM jobs ORDER BY id DESC LIMIT ?", (limit,))
+        return [self._row(row) for row in rows]
+
+    def counts(self) -> Dict[str, int]:
+        counts = dict.fromkeys(JOB_STATUSES, 0)
+        for row in self._connect().execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status"):
+            counts[row["status"]] = row["n"]
+        return counts
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_job_queue(data_dir: str) -> JobQueue:
+    """Return the process-wide job queue of a data directory."""
+    path = os.path.abspath(os.path.join(data_dir, DB_NAME))
+    with _queues_lock:
+        if path not in _queues:
+            _queues[path] = JobQueue(path)
+        return _queues[path]
+
+
+# Handlers
+
+class JobContext:
+    """
+    What handlers may touch: the data directory's storage and the upload folder.
+
+    run_job hands each handler a copy with ``job`` set to the job being run,
+    so side effects can be keyed on the job and stay single across retries.
+    """
+
+    def __init__(self, data_dir: str, upload_folder: str, upload_prefix: str = ''):
+        self.data_dir = data_dir
+        self.upload_folder = upload_folder
+        self.upload_prefix = upload_prefix
+        self.storage = get_storage(data_dir)
+        self.job: Optional[Dict[str, Any]] = None
+
+    def for_job(self, job: Dict[str, Any]) -> "JobContext":
+        context = copy.copy(self)
+        context.job = job
+        return context
+
+    def upload_store(self):
+        from utils.upload_store import UploadStore
+        return UploadStore(self.upload_folder, self.storage.uploads, prefix=self.upload_prefix)
+
+
+HANDLERS: Dict[str, Callable[[Dict[str, Any], JobContext], Dict[str, Any]]] = {}
+
+
+def handler(kind: str):
+    """Register a job handler; it receives (payload, context) and returns a JSON result."""
+    def decorator(func):
+        HANDLERS[kind] = func
+        return func
+    return decorator
+
+
+@handler("it.backup_files")
+def backup_employee_files(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Archive an employee's stored documents with a manifest of the requested locations."""
+    employee_id = payload["employee_id"]
+    employee = context.storage.employees.get(employee_id)
+    if employee is None:
+        raise ValueError(f"Employee {employee_id} not found")
+
+    backup_dir = os.path.join(context.data_dir, 'backups', employee_id)
+    os.makedirs(backup_dir, exist_ok=True)
+    archive = os.path.join(backup_dir, f"{datetime.now().strftime('%Y%m%d%H%M%S')}.zip")
+    prefix = f"{employee_id}:"
+    documents = [entry for entry in context.storage.uploads.all()
+                 if any(ref.startswith(prefix) for ref in entry["refs"])]
+
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('manifest.json', json.dumps({
+            "employee": employee,
+            "locations": payload.get("locations", []),
+            "created_at": datetime.now().isoformat(),
+        }, indent=4))
+        for entry in documents:
+            path = os.path.join(context.upload_folder, *entry["path"].split('/'))
+            if os.path.exists(path):
+                zf.write(path, entry["original_name"] or os.path.basename(path))
+
+    context.storage.employees.patch(employee_id, {"files_transferred": True})
+    return {"archive": archive, "documents": len(documents), "locations": payload.get("locations", [])}
+
+
+def _render_payslip(employee: Dict[str, Any], payment_date: str, payment_method: str) -> bytes:
+    lines = [
+        "Final Payslip",
+        f"Employee: {employee.get('name')} ({employee.get('employee_id')})",
+        f"Department: {employee.get('department', '')}",
+        f"Payment Date: {payment_date}",
+        f"Payment Method: {payment_method}",
+        f"Final Salary: {employee.get('final_salary', 0)}",
+        f"Loan Balance: {employee.get('loan_balance', 0)}",
+    ]
+    try:
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfgen import canvas
+    except ImportError:
+        return ("\n".join(lines) + "\n").encode()
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    y = A4[1] - 72
+    for line in lines:
+        pdf.drawString(72, y, line)
+        y -= 18
+    pdf.save()
+    return buffer.getvalue()
+
+
+@handler("finance.generate_payslip")
+def generate_payslip(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Render the final payslip (PDF with ReportLab, text otherwise) and attach it to the employee."""
+    from werkzeug.datastructures import FileStorage
+
+    employee_id = payload["employee_id"]
+    employee = context.storage.employees.get(employee_id)
+    if employee is None:
+        raise ValueError(f"Employee {employee_id} not found")
+
+    content = _render_payslip(employee, payload["payment_date"], payload["payment_method"])
+    extension = '.pdf' if content.startswith(b'%PDF') else '.txt'
+    upload = FileStorage(io.BytesIO(content), filename=f"payslip_{employee_id}{extension}")
+    updated = context.upload_store().attach(context.storage.employees, employee_id, 'payslip', upload)
+    return {"payslip": updated["payslip"], "bytes": len(content)}
+
+
+@handler("it.raise_ticket")
+def raise_it_ticket(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """
+    Open an IT ticket for access revocation and device collection.
+
+    The ticket ID is derived from the job (its idempotency key, else its ID),
+    so a retry or a worker taking over an expired lease finds the ticket the
+    earlier attempt opened instead of raising a second one.
+    """
+    tickets = context.storage.collection('it_tickets.json')
+    job = context.job or {}
+    source = job.get("idempotency_key") or f"job:{job.get('id')}"
+    ticket_id = f"IT-{hashlib.sha256(source.encode()).hexdigest()[:8].upper()}"
+    with tickets.transaction():
+        if tickets.get(ticket_id, copy=False) is None:
+            tickets.put({
+                "ticket_id": ticket_id,
+                "request_id": payload.get("request_id"),
+                "employee_id": payload["employee_id"],
+                "summary": f"Offboarding: revoke access and collect devices for "
+                           f"{payload.get('name', payload['employee_id'])}",
+                "last_working_day": payload.get("last_working_day"),
+                "status": "Open",
+                "created_at": datetime.now().isoformat(),
+            })
+    return {"ticket_id": ticket_id}
+
+
+@handler("documents.verify")
+def verify_document(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Re-hash a stored upload and record that its content matches its address."""
+    manifest = context.storage.uploads
+    entry = manifest.get(payload["sha256"])
+    if entry is None:
+        return {"verified": False, "reason": "no longer stored"}
+
+    digest = hashlib.sha256()
+    with open(os.path.join(context.upload_folder, *entry["path"].split('/')), 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            digest.update(chunk)
+    if digest.hexdigest() != entry["sha256"]:
+        raise ValueError(f"Stored file {entry['path']} does not match its hash")
+    manifest.update(entry["sha256"], lambda record: record.update(verified_at=datetime.now().isoformat()))
+    return {"verified": True}
+
+
+@handler("feedback.refresh")
+def refresh_feedback_analytics(payload: Dict[str, Any], context: JobContext) -> Dict[str, Any]:
+    """Analyse new or changed exit interview feedback into the analytics cache."""
+    from utils import feedback_analytics
+
+    analyses = feedback_analytics.refresh(context.storage, payload.get("processes"))
+    return {"interviews": len(analyses)}
+
+
+# Workers
+
+def _report_to_workflow(engine, job: Dict[str, Any], status, note: str = None):
+    if engine is None or not job.get("request_id"):
+        return
+    engine.update_task_status(job["request_id"], job["step_id"], job["task_id"], status,
+                              completed_by=f"job:{job['kind']}", notes=note)
+
+
+def _renew_lease(queue: JobQueue, job: Dict[str, Any], finished: threading.Event):
+    while not finished.wait(LEASE_SECONDS / 3):
+        if not queue.heartbeat(job["id"], job["locked_by"]):
+            logger.warning(f"Job {job['id']} ({job['kind']}) lost its lease while running")
+            return
+
+
+def run_job(queue: JobQueue, job: Dict[str, Any], context: JobContext, engine=None) -> bool:
+    """Run one claimed job and record its outcome; returns True on success."""
+    from modules.enhanced_workflow import WorkflowStatus
+
+    if job["attempts"] == 1:
+        _report_to_workflow(engine, job, WorkflowStatus.IN_PROGRESS)
+    # Renew the lease while the handler runs, so a long job is not handed to a second worker
+    finished = threading.Event()
+    heartbeat = threading.Thread(target=_renew_lease, args=(queue, job, finished), daemon=True)
+    heartbeat.start()
+    try:
+        result, error = HANDLERS[job["kind"]](job["payload"], context.for_job(job)), None
+    except Exception as e:
+        result, error = None, e
+    finally:
+        finished.set()
+
+    if error is not None:
+        logger.warning(f"Job {job['id']} ({job['kind']}) failed: {error}")
+        if queue.fail(job["id"], str(error), job["locked_by"]) is False:
+            _report_to_workflow(engine, job, WorkflowStatus.BLOCKED,
+                                f"{job['kind']} failed after {job['attempts']} attempts: {error}")
+        return False
+
+    if not queue.complete(job["id"], result, job["locked_by"]):
+        logger.warning(f"Job {job['id']} ({job['kind']}) finished after its lease expired; result dropped")
+        return False
+    _report_to_workflow(engine, job, WorkflowStatus.COMPLETED, f"{job['kind']} finished: {json.dumps(result)}")
+    return True
+
+
+def work(data_dir: str, upload_folder: str, poll_interval: float = 1.0, max_jobs: int = None,
+         stop_event=None, upload_prefix: str = '') -> int:
+    """Claim and run jobs until stopped (or until max_jobs ran, or the queue is empty if max_jobs is 0)."""
+    from modules.enhanced_workflow import EnhancedOffboardingWorkflow, WorkflowStatus
+
+    queue = get_job_queue(data_dir)
+    context = JobContext(data_dir, upload_folder, upload_prefix)
+    engine = EnhancedOffboardingWorkflow(store=context.storage.workflows)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    processed = 0
+
+    while stop_event is None or not stop_event.is_set():
+        expired = []
+        job = queue.claim(worker_id, expired)
+        for failed in expired:
+            _report_to_workflow(engine, failed, WorkflowStatus.BLOCKED,
+                                f"{failed['kind']} failed after {failed['attempts']} attempts: {failed['error']}")
+        if job is None:
+            if max_jobs == 0:
+                break
+            time.sleep(poll_interval)
+            continue
+        run_job(queue, job, context, engine)
+        processed += 1
+        if max_jobs and processed >= max_jobs:
+            break
+    return processed
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Offboarding background job queue")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    work_parser = subparsers.add_parser("work", help="Run worker processes")
+    work_parser.add_argument("--data-dir", default="data")
+    work_parser.add_argument("--upload-folder", default=os.path.join('static', 'uploads'))
+    work_parser.add_argument("--processes", type=int, default=1)
+    work_parser.add_argument("--poll-interval", type=float, default=1.0)
+    work_parser.add_argument("--drain", action="store_true", help="Exit once the queue is empty")
+    work_parser.add_argument("--tenant", help="Work on this tenant's queue (see utils.tenants)")
+
+    list_parser = subparsers.add_parser("list", help="Show recent jobs")
+    list_parser.add_argument("--data-dir", default="data")
+    list_parser.add_argument("--status", choices=JOB_STATUSES)
+    list_parser.add_argument("--tenant", help="Show this tenant's jobs (see utils.tenants)")
+    args = parser.parse_args(argv)
+
+    upload_prefix = ''
+    if args.tenant:
+        from utils.tenants import TenantRegistry
+        tenant = TenantRegistry(args.data_dir).get(args.tenant)
+        args.data_dir, upload_prefix = tenant.data_dir, tenant.upload_prefix
+
+    if args.command == "list":
+        queue = get_job_queue(args.data_dir)
+        print(json.dumps({"counts": queue.counts(), "jobs": queue.list_jobs(args.status)}, indent=2))
+        return 0
+
+    logging.basicConfig(level=logging.INFO)
+    work_args = (args.data_dir, args.upload_folder, args.poll_interval, 0 if args.drain else None)
+    work_kwargs = {"upload_prefix": upload_prefix}
+    if args.processes == 1:
+        work(*work_args, **work_kwargs)
+        return 0
+    processes = [multiprocessing.Process(target=work, args=work_args, kwargs=work_kwargs)
+                 for _ in range(args.processes)]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
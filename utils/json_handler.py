@@ -1,71 +1,55 @@
-import json
 import os
 from typing import Dict, List, Any
 from datetime import datetime
 import uuid
+from utils import storage
 
 class JSONHandler:
     def __init__(self, file_path: str):
         self.file_path = file_path
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        """Ensure the JSON file exists, create if it doesn't."""
-        if not os.path.exists(self.file_path):
-            os.makedirs(os.path.dirname(self.file_path), exist_ok=True)
-            with open(self.file_path, 'w') as f:
-                json.dump([], f, indent=4)
-
-    def load_data(self) -> List[Dict[str, Any]]:
-        """Load data from JSON file."""
-        try:
-            with open(self.file_path, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
+        self.storage = storage.get_storage(os.path.dirname(file_path) or '.')
+        self.collection = self.storage.collection(os.path.basename(file_path))
+
+    def load_data(self, copy: bool = True) -> List[Dict[str, Any]]:
+        """
+        Load data from JSON file.
+
+        Returns copies the caller may change; read-only callers can pass
+        copy=False to get the shared cached records instead (do not mutate).
+        """
+        records = self.collection.all()
+        return storage.copy_records(records) if copy else records
 
     def save_data(self, data: List[Dict[str, Any]]):
-        """Save data to JSON file."""
-        with open(self.file_path, 'w') as f:
-            json.dump(data, f, indent=4)
+        """Save data to JSON file (data is copied, so the caller may keep changing it)."""
+        self.collection.replace_all(data)
 
     def get_employee_by_id(self, employee_id: str) -> Dict[str, Any]:
         """Get employee data by ID."""
-        data = self.load_data()
-        for employee in data:
-            if employee["employee_id"] == employee_id:
-                return employee
-        return {}
+        return self.collection.get(employee_id) or {}
 
     def get_employee_by_name(self, name: str) -> Dict[str, Any]:
         """Get employee data by name."""
-        data = self.load_data()
-        for employee in data:
+        for employee in self.collection.all():
             if employee["name"].lower() == name.lower():
-                return employee
+                return storage.copy_records([employee])[0]
         return {}
 
-    def update_employee(self, employee_id: str, updated_data: Dict[str, Any]):
-        """Update employee data."""
-        data = self.load_data()
-        for i, employee in enumerate(data):
-            if employee["employee_id"] == employee_id:
-                data[i].update(updated_data)
-                break
-        self.save_data(data)
+    def update_employee(self, employee_id: str, updated_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Update employee data; returns the updated employee (None if unknown)."""
+        return self.collection.patch(employee_id, updated_data)
 
-    def get_all_employees(self) -> List[Dict[str, Any]]:
-        """Get all employees data."""
-        return self.load_data()
+    def get_all_employees(self, copy: bool = True) -> List[Dict[str, Any]]:
+        """Get all employees data (shared cached records if copy=False; do not mutate)."""
+        return self.load_data(copy)
 
-    def get_employees_by_department(self, department: str) -> List[Dict[str, Any]]:
-        """Get all employees in a specific department."""
-        data = self.load_data()
-        return [emp for emp in data if emp["department"] == department]
+    def get_employees_by_department(self, department: str, copy: bool = True) -> List[Dict[str, Any]]:
+        """Get all employees in a specific department (shared cached records if copy=False)."""
+        employees = self.collection.find("department", department)
+        return storage.copy_records(employees) if copy else employees
 
     def add_employee(self, employee_data: Dict[str, Any]) -> str:
         """Add a new employee to the database."""
-        data = self.load_data()
         employee_id = str(uuid.uuid4())
         employee = {
             "employee_id": employee_id,
@@ -78,8 +62,7 @@ class JSONHandler:
             "created_at": datetime.now().isoformat(),
             "updated_at": datetime.now().isoformat()
         }
-        data.append(employee)
-        self.save_data(data)
+        self.collection.put(employee)
         return employee_id
 
     def create_offboarding_request(self, employee_id: str, request_data: Dict[str, Any]) -> str:
@@ -112,41 +95,39 @@ class JSONHandler:
         self.update_employee(employee_id, {"status": "Resigned"})
 
         # Save request to offboarding requests file
-        offboarding_file = os.path.join(os.path.dirname(self.file_path), 'offboarding_requests.json')
-        handler = JSONHandler(offboarding_file)
-        requests = handler.load_data()
-        requests.append(request)
-        handler.save_data(requests)
+        self.storage.offboarding_requests.put(request)
 
         return request_id
 
-    def get_offboarding_requests(self) -> List[Dict[str, Any]]:
-        """Get all offboarding requests."""
-        offboarding_file = os.path.join(os.path.dirname(self.file_path), 'offboarding_requests.json')
-        handler = JSONHandler(offboarding_file)
-        return handler.load_data()
+    def get_offboarding_requests(self, copy: bool = True) -> List[Dict[str, Any]]:
+        """Get all offboarding requests (shared cached records if copy=False; do not mutate)."""
+        requests = self.storage.offboarding_requests.all()
+        return storage.copy_records(requests) if copy else requests
 
     def get_offboarding_request(self, request_id: str) -> Dict[str, Any]:
         """Get a specific offboarding request."""
-        requests = self.get_offboarding_requests()
-        for request in requests:
-            if request["request_id"] == request_id:
-                return request
-        return {}
+        return self.storage.offboarding_requests.get(request_id) or {}
 
     def update_offboarding_request(self, request_id: str, updated_data: Dict[str, Any]):
         """Update an offboarding request."""
-        offboarding_file = os.path.join(os.path.dirname(self.file_path), 'offboarding_requests.json')
-        handler = JSONHandler(offboarding_file)
-        requests = handler.load_data()
-        
-        for i, request in enumerate(requests):
-            if request["request_id"] == request_id:
-                requests[i].update(updated_data)
-                requests[i]["updated_at"] = datetime.now().isoformat()
-                break
-        
-        handler.save_data(requests)
+        self.storage.offboarding_requests.patch(
+            request_id, dict(updated_data, updated_at=datetime.now().isoformat())
+        )
+
+    def modify_offboarding_request(self, request_id: str, mutate) -> Any:
+        """
+        Change an offboarding request in place under the storage write lock.
+
+        mutate receives the request and returns False to leave it unchanged.
+        Concurrent modifications of the same request are applied one after the
+        other instead of overwriting each other.
+        """
+        def apply(request):
+            result = mutate(request)
+            if result is not False:
+                request["updated_at"] = datetime.now().isoformat()
+            return result
+        return self.storage.offboarding_requests.update(request_id, apply)
 
     def create_exit_interview(self, employee_id: str, interview_data: Dict[str, Any]) -> str:
         """Create a new exit interview record."""
@@ -163,30 +144,17 @@ class JSONHandler:
         }
 
         # Save interview to exit interviews file
-        interviews_file = os.path.join(os.path.dirname(self.file_path), 'exit_interviews.json')
-        handler = JSONHandler(interviews_file)
-        interviews = handler.load_data()
-        interviews.append(interview)
-        handler.save_data(interviews)
+        self.storage.exit_interviews.put(interview)
 
         return interview_id
 
-    def get_exit_interviews(self) -> List[Dict[str, Any]]:
-        """Get all exit interviews."""
-        interviews_file = os.path.join(os.path.dirname(self.file_path), 'exit_interviews.json')
-        handler = JSONHandler(interviews_file)
-        return handler.load_data()
+    def get_exit_interviews(self, copy: bool = True) -> List[Dict[str, Any]]:
+        """Get all exit interviews (shared cached records if copy=False; do not mutate)."""
+        interviews = self.storage.exit_interviews.all()
+        return storage.copy_records(interviews) if copy else interviews
 
     def update_exit_interview(self, interview_id: str, updated_data: Dict[str, Any]):
         """Update an exit interview record."""
-        interviews_file = os.path.join(os.path.dirname(self.file_path), 'exit_interviews.json')
-        handler = JSONHandler(interviews_file)
-        interviews = handler.load_data()
-        
-        for i, interview in enumerate(interviews):
-            if interview["interview_id"] == interview_id:
-                interviews[i].update(updated_data)
-                interviews[i]["updated_at"] = datetime.now().isoformat()
-                break
-        
-        handler.save_data(interviews) 
\ No newline at end of file
+        self.storage.exit_interviews.patch(
+            interview_id, dict(updated_data, updated_at=datetime.now().isoformat())
+        )
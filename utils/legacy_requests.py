@@ -0,0 +1,425 @@
+"""
+Legacy offboarding requests on the workflow engine.
+
+Offboarding requests used to be kept in data/offboarding_requests.json, with
+a flat departments dict ({"hr": {"status": ..., "tasks": [...]}}) whose task
+lists grew by one entry on every update. They are now workflows of the
+EnhancedOffboardingWorkflow engine:
+
+- migrate() (``python -m utils.legacy_requests migrate``) converts the stored
+  requests into workflows with the same request IDs. The request's own
+  fields are kept under "legacy" and its department tasks under
+  "department_tasks", keyed by task name, so a task updated many times is
+  stored once. The legacy record stays in the file, marked "migrated_to".
+- LegacyRequests presents the engine's workflows in the old request shape
+  for the pages and routes written against it, and creates and updates
+  requests through the engine. Requests not migrated yet are still read
+  from and written to the file, so the migration can run while the app is
+  up.
+
+Either way a task's state is stored once per task name, so a request stays
+the same size however often its tasks are updated. The updates themselves
+are kept in task_history.json, capped at the latest TASK_HISTORY_LIMIT per
+request.
+"""
+
+import argparse
+import json
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Optional
+
+from modules.enhanced_workflow import EnhancedOffboardingWorkflow, WorkflowStatus
+from utils.storage import get_storage
+
+# Departments of a legacy request
+LEGACY_DEPARTMENTS = ("hr", "it", "finance", "legal")
+
+# Legacy free-text reasons -> ReasonForLeaving values (anything else counts as a resignation)
+LEGACY_REASONS = {
+    "resignation": "resignation",
+    "retirement": "resignation",
+    "termination": "termination",
+    "end of contract": "non_renewal",
+    "non renewal": "non_renewal",
+    "mutual agreement": "mutual_agreement",
+}
+
+# Workflow statuses as the legacy pages spell them
+STATUS_LABELS = {
+    WorkflowStatus.PENDING.value: "Pending",
+    WorkflowStatus.IN_PROGRESS.value: "In Progress",
+    WorkflowStatus.COMPLETED.value: "Completed",
+    WorkflowStatus.OVERDUE.value: "Overdue",
+    WorkflowStatus.BLOCKED.value: "Blocked",
+}
+
+MIGRATE_BATCH_SIZE = 500
+
+# Task updates kept per request in task_history.json (0 keeps none)
+TASK_HISTORY_LIMIT = 50
+
+
+def compact_departments(departments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Legacy departments with their task lists folded into one entry per task.
+
+    Task updates were appended in order, so the last entry of a task wins.
+    """
+    compacted = {}
+    for department in list(LEGACY_DEPARTMENTS) + [d for d in departments if d not in LEGACY_DEPARTMENTS]:
+        data = departments.get(department) or {}
+        tasks = {}
+        for entry in data.get("tasks") or []:
+            if entry.get("task"):
+                tasks[entry["task"]] = {"status": entry.get("status"), "updated_at": entry.get("updated_at")}
+        compacted[department] = {"status": data.get("status", "Pending"), "tasks": tasks}
+    return compacted
+
+
+def _overall_status(departments: Dict[str, Any]) -> Optional[str]:
+    statuses = {data["status"] for data in departments.values()}
+    if not statuses:
+        return None
+    if statuses == {"Completed"}:
+        return "Completed"
+    if statuses == {"Pending"}:
+        return "Pending"
+    return "In Progress"
+
+
+def _department_view(department_tasks: Dict[str, Any]) -> Dict[str, Any]:
+    """department_tasks in the legacy shape (task lists of {"task", "status", "updated_at"})."""
+    return {
+        department: {
+            "status": data["status"],
+            "tasks": [dict(state, task=task) for task, state in data["tasks"].items()]
+        }
+        for department, data in department_tasks.items()
+    }
+
+
+def _with_summary(request: Dict[str, Any], department_tasks: Dict[str, Any]) -> Dict[str, Any]:
+    """Add the fields the legacy pages show: id, progress and <department>_status."""
+    request["id"] = request["request_id"]
+    if "progress" not in request:
+        total = sum(len(data["tasks"]) for data in department_tasks.values())
+        completed = sum(1 for data in department_tasks.values()
+                        for state in data["tasks"].values() if state["status"] == "Completed")
+        request["progress"] = round(completed * 100 / total) if total else 0
+    for department in LEGACY_DEPARTMENTS:
+        request[f"{department}_status"] = department_tasks.get(department, {}).get("status", "Pending")
+    return request
+
+
+def workflow_view(workflow: Dict[str, Any]) -> Dict[str, Any]:
+    """A workflow in the legacy request shape."""
+    legacy = workflow.get("legacy") or {}
+    employee = workflow["employee_data"]
+    department_tasks = workflow.get("department_tasks") or compact_departments({})
+
+    status = STATUS_LABELS.get(workflow["status"], workflow["status"])
+    if status != "Completed" and workflow.get("department_tasks"):
+        status = _overall_status(department_tasks) or status
+
+    request = {
+        "request_id": workflow["request_id"],
+        "employee_id": employee["employee_id"],
+        "employee_name": employee["name"],
+        "department": employee.get("department"),
+        "last_working_day": employee["last_working_day"],
+        "reason": legacy.get("reason") or employee["reason_for_leaving"].replace("_", " ").title(),
+        "notice_period": legacy.get("notice_period"),
+        "status": status,
+        "created_at": legacy.get("created_at") or workflow["created_date"],
+        "updated_at": legacy.get("updated_at") or workflow["created_date"],
+        "departments": _department_view(department_tasks),
+        "workflow": True,
+    }
+    if not workflow.get("department_tasks"):
+        # Created in the engine: progress of the workflow steps
+        request["progress"] = round(workflow["overall_progress"])
+    return _with_summary(request, department_tasks)
+
+
+def legacy_view(record: Dict[str, Any]) -> Dict[str, Any]:
+    """A request not migrated yet, with the summary fields of workflow_view."""
+    return _with_summary(dict(record, workflow=False), compact_departments(record.get("departments") or {}))
+
+
+def reason_for_leaving(reason: Optional[str]) -> str:
+    """The ReasonForLeaving value of a legacy free-text reason (or of a value already converted)."""
+    reason = (reason or "").strip().lower().replace("_", " ")
+    return LEGACY_REASONS.get(reason, "resignation")
+
+
+def workflow_input(request: Dict[str, Any], employee: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """EnhancedOffboardingWorkflow employee data for a legacy request."""
+    employee = employee or {}
+    data = {
+        "employee_id": request["employee_id"],
+        "name": request.get("employee_name") or employee.get("name", ""),
+        "email": employee.get("email", ""),
+        "last_working_day": request["last_working_day"],
+        "reason_for_leaving": reason_for_leaving(request.get("reason")),
+        "department": request.get("department") or employee.get("department", ""),
+        "position": employee.get("position", ""),
+    }
+    for field in ("line_manager", "location"):
+        if employee.get(field):
+            data[field] = employee[field]
+    return data
+
+
+def legacy_fields(request: Dict[str, Any]) -> Dict[str, Any]:
+    """The workflow fields that keep a legacy request's own data."""
+    return {
+        "legacy": {
+            "reason": request.get("reason"),
+            "notice_period": request.get("notice_period"),
+            "status": request.get("status"),
+            "created_at": request.get("created_at"),
+            "updated_at": request.get("updated_at"),
+        },
+        "department_tasks": compact_departments(request.get("departments") or {}),
+    }
+
+
+def migrate(storage, engine: EnhancedOffboardingWorkflow, dry_run: bool = False,
+            batch_size: int = MIGRATE_BATCH_SIZE) -> Dict[str, Any]:
+    """
+    Convert the requests of offboarding_requests.json into engine workflows.
+
+    Requests already migrated are skipped, so it can be run again. Workflows
+    are created in batches (due dates are computed per batch) and the legacy
+    records are then marked with the workflow they moved to. A request whose
+    workflow exists but whose record was not marked (a run stopped between
+    the two writes) is recognised by the workflow's "legacy" block and only
+    marked.
+
+    Returns:
+        Dict with the number migrated, the requests skipped (ID -> reason)
+        and the number already migrated before
+    """
+    employees = storage.employees.records()
+    workflows = engine.active_workflows
+    pending, unmarked, skipped, already = [], [], {}, 0
+    for request in storage.offboarding_requests.all():
+        request_id = request.get("request_id")
+        if request.get("migrated_to"):
+            already += 1
+        elif not request_id or not request.get("employee_id"):
+            skipped[str(request_id)] = "missing request or employee ID"
+        elif request_id in workflows:
+            if workflows[request_id].get("legacy") == legacy_fields(request)["legacy"]:
+                unmarked.append(request)
+                already += 1
+            else:
+                skipped[request_id] = "a workflow with this ID already exists"
+        else:
+            try:
+                datetime.strptime(request.get("last_working_day") or "", "%Y-%m-%d")
+            except ValueError:
+                skipped[request_id] = f"invalid last working day {request.get('last_working_day')!r}"
+                continue
+            pending.append(request)
+
+    if not dry_run:
+        if unmarked:
+            storage.offboarding_requests.put_many(
+                dict(request, migrated_to=request["request_id"]) for request in unmarked
+            )
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            engine.create_offboarding_requests(
+                [workflow_input(request, employees.get(request["employee_id"])) for request in batch],
+                request_ids=[request["request_id"] for request in batch],
+                extra_fields=[legacy_fields(request) for request in batch]
+            )
+            storage.offboarding_requests.put_many(
+                dict(request, migrated_to=request["request_id"]) for request in batch
+            )
+
+    return {"migrated": len(pending), "skipped": skipped, "already_migrated": already, "dry_run": dry_run}
+
+
+class LegacyRequests:
+    """
+    The offboarding requests of one data partition, in the legacy shape.
+
+    Reads come from the engine's workflows plus the requests not migrated
+    yet. Views are cached per record object (records are replaced, never
+    changed, on write), so a listing only converts what changed since the
+    last one.
+
+    Args:
+        engine: The partition's EnhancedOffboardingWorkflow
+        storage: The partition's StorageService
+        history_limit: Task updates kept per request (0 keeps no history)
+    """
+
+    def __init__(self, engine: EnhancedOffboardingWorkflow, storage, history_limit: int = TASK_HISTORY_LIMIT):
+        self.engine = engine
+        self.storage = storage
+        self.history_limit = history_limit
+        self._views = {}  # request_id -> (record, view)
+        # (workflows, legacy records, all views, views by request ID, views by employee ID),
+        # replaced as a whole so readers never see a half-built listing
+        self._state = None
+        self._lock = threading.Lock()
+
+    def _view(self, request_id: str, record: Dict[str, Any], convert) -> Dict[str, Any]:
+        cached = self._views.get(request_id)
+        if cached is not None and cached[0] is record:
+            return cached[1]
+        view = convert(record)
+        self._views[request_id] = (record, view)
+        return view
+
+    def _sync(self) -> tuple:
+        workflows = self.engine.active_workflows
+        legacy = self.storage.offboarding_requests.all()
+        state = self._state
+        if state is not None and state[0] is workflows and state[1] is legacy:
+            return state
+
+        with self._lock:
+            state = self._state
+            if state is not None and state[0] is workflows and state[1] is legacy:
+                return state
+            self._state = self._rebuild(workflows, legacy)
+            return self._state
+
+    def _rebuild(self, workflows: Dict[str, Dict[str, Any]], legacy: List[Dict[str, Any]]) -> tuple:
+        """Build the listing; the caller holds the lock."""
+        views = [self._view(request_id, workflow, workflow_view) for request_id, workflow in workflows.items()]
+        views.extend(
+            self._view(record["request_id"], record, legacy_view) for record in legacy
+            if not record.get("migrated_to") and record.get("request_id") not in workflows
+        )
+        # Oldest first, like the file the pages used to read
+        views.sort(key=lambda view: view.get("created_at") or "")
+        by_id = {view["request_id"]: view for view in views}
+        by_employee = {view["employee_id"]: view for view in views}
+        for request_id in [key for key in self._views if key not in by_id]:
+            del self._views[request_id]
+        return (workflows, legacy, views, by_id, by_employee)
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Every request, oldest first (read-only)."""
+        return self._sync()[2]
+
+    def get(self, request_id: str) -> Optional[Dict[str, Any]]:
+        """One request (read-only), or None."""
+        return self._sync()[3].get(request_id)
+
+    def for_employee(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """The latest request of an employee (read-only), or None."""
+        return self._sync()[4].get(employee_id)
+
+    def versions(self) -> Dict[str, int]:
+        """Version of each request by request ID; it changes whenever the request is written."""
+        versions = dict(self.storage.offboarding_requests.versions())
+        versions.update(self.engine.workflow_versions())
+        return versions
+
+    def create(self, employee_id: str, request_data: Dict[str, Any]) -> str:
+        """
+        Create a request as an engine workflow and mark the employee Resigned.
+
+        Args:
+            employee_id: Employee ID
+            request_data: last_working_day, reason and notice_period
+
+        Returns:
+            The workflow's request ID
+        """
+        employee = self.storage.employees.get(employee_id, copy=False)
+        if not employee:
+            raise ValueError("Employee not found")
+
+        now = datetime.now().isoformat()
+        request = dict(request_data, employee_id=employee_id, employee_name=employee["name"],
+                       department=employee["department"], status="Pending", created_at=now, updated_at=now)
+        request_id = self.engine.create_offboarding_requests(
+            [workflow_input(request, employee)], extra_fields=[legacy_fields(request)]
+        )[0]
+        self.storage.employees.patch(employee_id, {"status": "Resigned"})
+        return request_id
+
+    def update_task(self, request_id: str, department: str, task: Optional[str], status: str) -> bool:
+        """Set a department's status and optionally one of its tasks; False if the request or department is unknown."""
+        updated_at = datetime.now().isoformat()
+        if request_id in self.engine.active_workflows:
+            updated = department in LEGACY_DEPARTMENTS and self.engine.update_department_task(
+                request_id, department, task, status
+            )
+        else:
+            # Not migrated yet: update the legacy record, one entry per task
+            def apply(request_data):
+                if department not in request_data['departments']:
+                    return False
+                department_data = request_data['departments'][department]
+                department_data['status'] = status
+                if task:
+                    # Also folds the repeated entries older versions appended
+                    latest = {entry['task']: entry for entry in department_data['tasks'] if entry.get('task')}
+                    latest.pop(task, None)
+                    latest[task] = {'task': task, 'status': status, 'updated_at': updated_at}
+                    department_data['tasks'] = list(latest.values())
+                request_data['updated_at'] = updated_at
+                return True
+            updated = bool(self.storage.offboarding_requests.update(request_id, apply))
+
+        if updated:
+            self._record_history(request_id, {
+                "department": department, "task": task, "status": status, "updated_at": updated_at
+            })
+        return updated
+
+    def _record_history(self, request_id: str, entry: Dict[str, Any]):
+        if not self.history_limit:
+            return
+        history = self.storage.task_history
+
+        def apply(record):
+            record["entries"] = (record["entries"] + [entry])[-self.history_limit:]
+            return True
+
+        with history.transaction():
+            if history.update(request_id, apply) is None:
+                history.put({"request_id": request_id, "entries": [entry]})
+
+    def task_history(self, request_id: str) -> List[Dict[str, Any]]:
+        """The latest task updates of a request, oldest first (read-only)."""
+        record = self.storage.task_history.get(request_id, copy=False)
+        return record["entries"] if record else []
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Legacy offboarding requests")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Convert offboarding_requests.json into engine workflows")
+    migrate_parser.add_argument("--data-dir", default="data")
+    migrate_parser.add_argument("--tenant", help="Migrate this tenant's requests (see utils.tenants)")
+    migrate_parser.add_argument("--dry-run", action="store_true", help="Only report what would be migrated")
+    migrate_parser.add_argument("--batch-size", type=int, default=MIGRATE_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    if args.tenant:
+        from utils.tenants import TenantRegistry
+        tenant = TenantRegistry(args.data_dir).get(args.tenant)
+        storage, engine = tenant.storage, tenant.engine
+    else:
+        storage = get_storage(args.data_dir)
+        engine = EnhancedOffboardingWorkflow(store=storage.workflows)
+
+    print(json.dumps(migrate(storage, engine, args.dry_run, args.batch_size), indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,77 @@
-from typing import Dict, List, Any
+import itertools
+from typing import Dict, List, Any, Iterable, Optional
 from datetime import datetime
+from utils.storage import MemoryCollection
+
+# Counter fields kept in the tracking data, written back by set_task_status when they change
+_DEPARTMENT_FIELDS = ("status", "completed_date", "completed_tasks", "completed_mask")
+_TRACKING_FIELDS = ("status", "completed_tasks")
+
+# One byte per employee and task in TrackingColumns
+STATUS_CODES = {"Pending": 0, "In Progress": 1, "Completed": 2}
+_COMPLETED = bytes(1 if code == STATUS_CODES["Completed"] else 0 for code in range(256))
+_STARTED = bytes(1 if code else 0 for code in range(256))
+
+
+def _equals(value: int) -> bytes:
+    """Translation table mapping value to 1 and every other byte to 0."""
+    return bytes(1 if code == value else 0 for code in range(256))
+
+
+class TrackingColumns:
+    """
+    Tracking states of many employees, stored column-wise.
+
+    Each task has one status array (a bytearray with one status code per
+    employee, see STATUS_CODES), so OffboardingTracker.get_bulk_progress can
+    work on whole columns instead of per-employee dicts.
+
+    Args:
+        departments: The tracker's departments ({department: {"tasks": [...]}})
+        states: Tracking data of the employees to add
+    """
+
+    def __init__(self, departments: Dict[str, Dict[str, Any]], states: Iterable[Dict[str, Any]] = ()):
+        self.tasks = {dept: list(info["tasks"]) for dept, info in departments.items()}
+        if sum(len(tasks) for tasks in self.tasks.values()) > 255:
+            raise ValueError("TrackingColumns supports at most 255 tasks")
+        self.employee_ids: List[str] = []
+        self.positions: Dict[str, int] = {}
+        self.columns = {dept: {task: bytearray() for task in tasks} for dept, tasks in self.tasks.items()}
+        for tracking_data in states:
+            self.add(tracking_data)
+
+    def __len__(self):
+        return len(self.employee_ids)
+
+    def add(self, tracking_data: Dict[str, Any]):
+        """Append an employee's tracking data (replaces the employee's row if present)."""
+        employee_id = tracking_data["employee_id"]
+        if employee_id not in self.positions:
+            self.positions[employee_id] = len(self.employee_ids)
+            self.employee_ids.append(employee_id)
+            for columns in self.columns.values():
+                for column in columns.values():
+                    column.append(0)
+        for dept, tasks in self.tasks.items():
+            statuses = tracking_data["departments"].get(dept, {}).get("tasks", {})
+            for task in tasks:
+                self.set_status(employee_id, dept, task, statuses.get(task, "Pending"))
+
+    def set_status(self, employee_id: str, department: str, task: str, status: str):
+        """Set one employee's status of one task."""
+        self.columns[department][task][self.positions[employee_id]] = STATUS_CODES.get(status, 0)
+
 
 class OffboardingTracker:
-    def __init__(self):
+    def __init__(self, store=None):
+        """
+        Args:
+            store: Collection keyed by employee_id that persists tracking data
+                (e.g. StorageService.offboarding_tracking); tracking is only
+                kept in memory when omitted
+        """
+        self._store = store if store is not None else MemoryCollection("employee_id")
         self.departments = {
             "HR": {
                 "tasks": [
@@ -45,13 +114,27 @@ class OffboardingTracker:
                 ]
             }
         }
+        # Bit of each task in its department's completed_mask
+        self._task_bits = {
+            dept: {task: 1 << position for position, task in enumerate(info["tasks"])}
+            for dept, info in self.departments.items()
+        }
 
     def initialize_employee_tracking(self, employee_id: str) -> Dict[str, Any]:
-        """Initialize tracking for a new employee offboarding process."""
+        """
+        Initialize tracking for a new employee offboarding process.
+
+        Besides the task statuses, the tracking data keeps completed/total
+        task counters per department and overall, and a bitmask of the
+        completed tasks per department, so updates and progress reads do
+        not scan the tasks.
+        """
         tracking_data = {
             "employee_id": employee_id,
             "start_date": datetime.now().strftime("%Y-%m-%d"),
             "status": "In Progress",
+            "completed_tasks": 0,
+            "total_tasks": 0,
             "departments": {}
         }
 
@@ -59,40 +142,138 @@ class OffboardingTracker:
             tracking_data["departments"][dept] = {
                 "status": "Pending",
                 "tasks": {task: "Pending" for task in info["tasks"]},
-                "completed_date": None
+                "completed_date": None,
+                "completed_tasks": 0,
+                "total_tasks": len(info["tasks"]),
+                "completed_mask": 0
             }
+            tracking_data["total_tasks"] += len(info["tasks"])
 
         return tracking_data
 
+    def _add_counters(self, tracking_data: Dict[str, Any]):
+        """Add the counters to tracking data created before they existed."""
+        tracking_data["completed_tasks"] = 0
+        tracking_data["total_tasks"] = 0
+        for dept, dept_data in tracking_data["departments"].items():
+            bits = self._task_bits.get(dept, {})
+            completed = [task for task, status in dept_data["tasks"].items() if status == "Completed"]
+            dept_data["completed_tasks"] = len(completed)
+            dept_data["total_tasks"] = len(dept_data["tasks"])
+            dept_data["completed_mask"] = sum(bits.get(task, 0) for task in completed)
+            tracking_data["completed_tasks"] += len(completed)
+            tracking_data["total_tasks"] += len(dept_data["tasks"])
+
+    def get_tracking(self, employee_id: str) -> Optional[Dict[str, Any]]:
+        """Stored tracking data of an employee (read-only), or None if offboarding has not started."""
+        return self._store.get(employee_id, copy=False)
+
+    def start_tracking(self, employee_id: str) -> Dict[str, Any]:
+        """Start tracking an employee's offboarding; tracking that already exists is kept."""
+        with self._store.transaction():
+            tracking_data = self._store.get(employee_id, copy=False)
+            if tracking_data is None:
+                tracking_data = self.initialize_employee_tracking(employee_id)
+                self._store.put(tracking_data)
+            return tracking_data
+
+    def set_task_status(self, employee_id: str, department: str, task: str,
+                        status: str = "Completed") -> Optional[Dict[str, Any]]:
+        """
+        Update and store the status of one task of an employee.
+
+        Only the task and the department/overall fields it changes are
+        written. Returns the updated tracking data, or None if offboarding has
+        not started for the employee.
+
+        Raises:
+            KeyError: If the employee's tracking has no such department or task
+        """
+        with self._store.transaction():
+            tracking_data = self._store.get(employee_id)
+            if tracking_data is None:
+                return None
+            if task not in tracking_data["departments"].get(department, {}).get("tasks", {}):
+                raise KeyError(f"Unknown task {task!r} of department {department!r}")
+            if "completed_tasks" not in tracking_data:
+                # Stored before the counters existed: write it whole once
+                self.update_task_status(tracking_data, department, task, status)
+                self._store.put(tracking_data)
+                return tracking_data
+
+            dept_data = tracking_data["departments"][department]
+            before_dept = {field: dept_data.get(field) for field in _DEPARTMENT_FIELDS}
+            before = {field: tracking_data.get(field) for field in _TRACKING_FIELDS}
+            self.update_task_status(tracking_data, department, task, status)
+
+            changes = [(("departments", department, "tasks", task), status)]
+            changes.extend(
+                (("departments", department, field), dept_data[field])
+                for field, value in before_dept.items() if dept_data[field] != value
+            )
+            changes.extend(
+                ((field,), tracking_data[field])
+                for field, value in before.items() if tracking_data[field] != value
+            )
+            self._store.patch_paths(employee_id, changes)
+            return tracking_data
+
     def update_task_status(self, tracking_data: Dict[str, Any], department: str, task: str, status: str = "Completed"):
-        """Update the status of a specific task for a department."""
-        if department in tracking_data["departments"] and task in tracking_data["departments"][department]["tasks"]:
-            tracking_data["departments"][department]["tasks"][task] = status
-            
-            # Check if all tasks in department are completed
-            all_completed = all(task_status == "Completed" 
-                              for task_status in tracking_data["departments"][department]["tasks"].values())
-            
-            if all_completed:
-                tracking_data["departments"][department]["status"] = "Completed"
-                tracking_data["departments"][department]["completed_date"] = datetime.now().strftime("%Y-%m-%d")
-            
-            # Check if all departments are completed
-            all_depts_completed = all(dept["status"] == "Completed" 
-                                    for dept in tracking_data["departments"].values())
-            
-            if all_depts_completed:
-                tracking_data["status"] = "Completed"
+        """Update the status of a specific task for a department (constant time)."""
+        departments = tracking_data["departments"]
+        if department not in departments or task not in departments[department]["tasks"]:
+            return tracking_data
+        if "completed_tasks" not in tracking_data:
+            self._add_counters(tracking_data)
+
+        dept_data = departments[department]
+        was_completed = dept_data["tasks"][task] == "Completed"
+        dept_data["tasks"][task] = status
+        completed = status == "Completed"
+        if completed == was_completed:
+            return tracking_data
+
+        step = 1 if completed else -1
+        dept_data["completed_mask"] ^= self._task_bits.get(department, {}).get(task, 0)
+        dept_data["completed_tasks"] += step
+        tracking_data["completed_tasks"] += step
+
+        # Department is completed when all its tasks are
+        if dept_data["completed_tasks"] == dept_data["total_tasks"]:
+            dept_data["status"] = "Completed"
+            dept_data["completed_date"] = datetime.now().strftime("%Y-%m-%d")
+        elif dept_data["status"] == "Completed":
+            dept_data["status"] = "Pending"
+            dept_data["completed_date"] = None
+
+        # Offboarding is completed when all departments are
+        if tracking_data["completed_tasks"] == tracking_data["total_tasks"]:
+            tracking_data["status"] = "Completed"
+        elif tracking_data["status"] == "Completed":
+            tracking_data["status"] = "In Progress"
 
         return tracking_data
 
+    def is_task_completed(self, tracking_data: Dict[str, Any], department: str, task: str) -> bool:
+        """Whether a task is completed, read from the department's bitmask."""
+        dept_data = tracking_data["departments"].get(department)
+        if dept_data is None:
+            return False
+        if "completed_mask" not in dept_data:
+            return dept_data["tasks"].get(task) == "Completed"
+        return bool(dept_data["completed_mask"] & self._task_bits.get(department, {}).get(task, 0))
+
     def get_department_progress(self, tracking_data: Dict[str, Any], department: str) -> Dict[str, Any]:
         """Get the progress of a specific department."""
         if department in tracking_data["departments"]:
             dept_data = tracking_data["departments"][department]
-            total_tasks = len(dept_data["tasks"])
-            completed_tasks = sum(1 for status in dept_data["tasks"].values() if status == "Completed")
-            
+            if "completed_tasks" in dept_data:
+                completed_tasks = dept_data["completed_tasks"]
+                total_tasks = dept_data["total_tasks"]
+            else:
+                total_tasks = len(dept_data["tasks"])
+                completed_tasks = sum(1 for status in dept_data["tasks"].values() if status == "Completed")
+
             return {
                 "status": dept_data["status"],
                 "completed_tasks": completed_tasks,
@@ -102,21 +283,113 @@ class OffboardingTracker:
             }
         return {}
 
+    def get_completion(self, tracking_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Status and completed/total task counts without the per-department detail, for listing many employees."""
+        if "completed_tasks" in tracking_data:
+            completed_tasks = tracking_data["completed_tasks"]
+            total_tasks = tracking_data["total_tasks"]
+        else:
+            total_tasks = sum(len(dept["tasks"]) for dept in self.departments.values())
+            completed_tasks = sum(
+                sum(1 for task_status in dept_data["tasks"].values() if task_status == "Completed")
+                for dept_data in tracking_data["departments"].values()
+            )
+        return {
+            "status": tracking_data["status"],
+            "completed_tasks": completed_tasks,
+            "total_tasks": total_tasks
+        }
+
     def get_overall_progress(self, tracking_data: Dict[str, Any]) -> Dict[str, Any]:
         """Get the overall progress of the offboarding process."""
-        total_tasks = sum(len(dept["tasks"]) for dept in self.departments.values())
-        completed_tasks = sum(
-            sum(1 for task_status in dept_data["tasks"].values() if task_status == "Completed")
-            for dept_data in tracking_data["departments"].values()
-        )
+        progress = self.get_completion(tracking_data)
+        progress["start_date"] = tracking_data["start_date"]
+        progress["departments"] = {
+            dept: self.get_department_progress(tracking_data, dept)
+            for dept in self.departments.keys()
+        }
+        return progress
+
+    def get_columns(self) -> TrackingColumns:
+        """The stored tracking data of every employee, column-wise."""
+        return TrackingColumns(self.departments, self._store.records().values())
+
+    def get_bulk_progress(self, columns: TrackingColumns) -> Dict[str, Any]:
+        """
+        Progress of every employee in columns, computed a column at a time.
+
+        The task columns of a department are added as big integers with one
+        byte lane per employee, so every employee's completed-task count is
+        produced by a handful of integer additions rather than a loop over
+        employees.
+
+        Returns:
+            employee_ids: Row order of the vectors below
+            completed_tasks: bytes, completed task count per employee
+            total_tasks: Tasks per employee
+            completed: bytes, 1 per employee whose offboarding is completed
+            departments: Per department, "completed_tasks" (bytes, count per
+                employee), "completed" (bytes, 1 when all its tasks are
+                completed), "total_tasks" and "funnel" (number of employees
+                whose department is pending, in progress or completed)
+            funnel: Employees by number of completed departments
+                (index k = k departments completed), plus overall
+                pending/in progress/completed counts
+        """
+        count = len(columns)
+        departments = {}
+        completed_sum = 0
+        started_sum = 0
+        departments_completed = 0
+        total_tasks = 0
+
+        for dept, tasks in columns.tasks.items():
+            dept_columns = columns.columns[dept]
+            completed = sum(int.from_bytes(dept_columns[task].translate(_COMPLETED), "little") for task in tasks)
+            started = sum(int.from_bytes(dept_columns[task].translate(_STARTED), "little") for task in tasks)
+            completed_tasks = completed.to_bytes(count, "little")
+            started_tasks = started.to_bytes(count, "little")
+            done = completed_tasks.translate(_equals(len(tasks)))
+            done_count = done.count(1)
+            pending_count = started_tasks.count(0)
+
+            departments[dept] = {
+                "completed_tasks": completed_tasks,
+                "completed": done,
+                "total_tasks": len(tasks),
+                "funnel": {
+                    "pending": pending_count,
+                    "in_progress": count - done_count - pending_count,
+                    "completed": done_count
+                }
+            }
+            completed_sum += completed
+            started_sum += started
+            departments_completed += int.from_bytes(done, "little")
+            total_tasks += len(tasks)
+
+        completed_tasks = completed_sum.to_bytes(count, "little")
+        completed = completed_tasks.translate(_equals(total_tasks))
+        completed_departments = departments_completed.to_bytes(count, "little")
+        done_count = completed.count(1)
+        pending_count = started_sum.to_bytes(count, "little").count(0)
 
         return {
-            "status": tracking_data["status"],
+            "employee_ids": columns.employee_ids,
             "completed_tasks": completed_tasks,
             "total_tasks": total_tasks,
-            "start_date": tracking_data["start_date"],
-            "departments": {
-                dept: self.get_department_progress(tracking_data, dept)
-                for dept in self.departments.keys()
+            "completed": completed,
+            "departments": departments,
+            "funnel": {
+                "departments_completed": [completed_departments.count(k) for k in range(len(departments) + 1)],
+                "pending": pending_count,
+                "in_progress": count - done_count - pending_count,
+                "completed": done_count
             }
-        } 
\ No newline at end of file
+        }
+
+    @staticmethod
+    def blocked_on(progress: Dict[str, Any], department: str) -> List[str]:
+        """Employees of a get_bulk_progress() result whose department tasks are not all completed."""
+        waiting = progress["departments"][department]["completed"].translate(_equals(0))
+        return list(itertools.compress(progress["employee_ids"], waiting))
@@ -0,0 +1,286 @@
+"""
+Opt-in per-request profiling for the Flask app.
+
+When enabled (PROFILING app config or OFFBOARDING_PROFILING=1), every request
+records its total time broken down into storage reads/writes (bytes, I/O and
+JSON parse/serialise time), workflow engine calls and template rendering.
+Aggregates are served from /metrics in Prometheus text format. Sending the
+header ``X-Profile: 1`` additionally dumps a cProfile of that request to
+PROFILE_DIR and returns the file name in ``X-Profile-File``.
+
+When disabled nothing is registered; storage hooks only pay for a
+thread-local lookup that returns None.
+"""
+
+import cProfile
+import functools
+import inspect
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Any, Tuple
+
+PROFILE_HEADER = 'X-Profile'
+DEFAULT_PROFILE_DIR = 'profiles'
+
+# Request duration histogram buckets, in seconds
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_local = threading.local()
+
+
+class RequestMetrics:
+    """Timings collected while handling a single request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        # component -> [seconds, calls]
+        self.components = {}
+        # Components being timed, so a timed call inside another is not counted twice
+        self.active = set()
+        # "read"/"write" -> [bytes, io seconds, parse/serialise seconds]
+        self.storage = {"read": [0, 0.0, 0.0], "write": [0, 0.0, 0.0]}
+
+    def add(self, component: str, seconds: float):
+        entry = self.components.setdefault(component, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def record_storage(self, op: str, nbytes: int, io_seconds: float, codec_seconds: float):
+        """Record one storage read or write."""
+        entry = self.storage[op]
+        entry[0] += nbytes
+        entry[1] += io_seconds
+        entry[2] += codec_seconds
+        self.add(f"storage_{op}", io_seconds + codec_seconds)
+
+
+def current() -> RequestMetrics:
+    """Return the metrics of the request being handled on this thread, if profiled."""
+    return getattr(_local, 'metrics', None)
+
+
+class MetricsRegistry:
+    """Process-wide aggregates of all profiled requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (method, route, status) -> count
+        self.requests = {}
+        # (method, route) -> [bucket counts..., sum, count]
+        self.durations = {}
+        # (route, component) -> [seconds, calls]
+        self.components = {}
+        # (route, op) -> [bytes, io seconds, codec seconds]
+        self.storage = {}
+
+    def observe(self, method: str, route: str, status: int, seconds: float, metrics: RequestMetrics):
+        with self._lock:
+            key = (method, route, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+            histogram = self.durations.setdefault((method, route), [0] * len(DURATION_BUCKETS) + [0.0, 0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += seconds
+            histogram[-1] += 1
+
+            accounted = 0.0
+            for component, (component_seconds, calls) in metrics.components.items():
+                entry = self.components.setdefault((route, component), [0.0, 0])
+                entry[0] += component_seconds
+                entry[1] += calls
+                accounted += component_seconds
+            other = self.components.setdefault((route, "other"), [0.0, 0])
+            other[0] += max(seconds - accounted, 0.0)
+            other[1] += 1
+
+            for op, (nbytes, io_seconds, codec_seconds) in metrics.storage.items():
+                if not nbytes and not io_seconds:
+                    continue
+                entry = self.storage.setdefault((route, op), [0, 0.0, 0.0])
+                entry[0] += nbytes
+                entry[1] += io_seconds
+                entry[2] += codec_seconds
+
+    def render_prometheus(self) -> str:
+        """Render all aggregates in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name: str, metric_type: str, help_text: str, samples: List[Tuple[Dict[str, str], Any]]):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in samples:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        with self._lock:
+            family("offboarding_http_requests_total", "counter", "Profiled requests by route and status.", [
+                ({"method": m, "route": r, "status": s}, count)
+                for (m, r, s), count in sorted(self.requests.items())
+            ])
+
+            samples = []
+            for (method, route), histogram in sorted(self.durations.items()):
+                for i, bound in enumerate(DURATION_BUCKETS):
+                    samples.append(({"method": method, "route": route, "le": str(bound)}, histogram[i]))
+                samples.append(({"method": method, "route": route, "le": "+Inf"}, histogram[-1]))
+            lines.append("# HELP offboarding_http_request_duration_seconds Request duration by route.")
+            lines.append("# TYPE offboarding_http_request_duration_seconds histogram")
+            for labels, value in samples:
+                lines.append(f"offboarding_http_request_duration_seconds_bucket{_format_labels(labels)} {value}")
+            for (method, route), histogram in sorted(self.durations.items()):
+                labels = _format_labels({"method": method, "route": route})
+                lines.append(f"offboarding_http_request_duration_seconds_sum{labels} {histogram[-2]}")
+                lines.append(f"offboarding_http_request_duration_seconds_count{labels} {histogram[-1]}")
+
+            family("offboarding_component_seconds_total", "counter",
+                   "Time spent per component (storage_read, storage_write, workflow, template, other).", [
+                       ({"route": r, "component": c}, entry[0])
+                       for (r, c), entry in sorted(self.components.items())
+                   ])
+            family("offboarding_component_calls_total", "counter", "Calls per component.", [
+                ({"route": r, "component": c}, entry[1])
+                for (r, c), entry in sorted(self.components.items())
+            ])
+            family("offboarding_storage_bytes_total", "counter", "Bytes read from or written to storage.", [
+                ({"route": r, "op": op}, entry[0]) for (r, op), entry in sorted(self.storage.items())
+            ])
+            family("offboarding_storage_io_seconds_total", "counter", "Time spent in storage file I/O.", [
+                ({"route": r, "op": op}, entry[1]) for (r, op), entry in sorted(self.storage.items())
+            ])
+            family("offboarding_storage_codec_seconds_total", "counter",
+                   "Time spent parsing (read) or serialising (write) JSON.", [
+                       ({"route": r, "op": op}, entry[2]) for (r, op), entry in sorted(self.storage.items())
+                   ])
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value: Any) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+def timed(component: str, func):
+    """Wrap func so its calls are recorded under component for profiled requests."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        metrics = current()
+        if metrics is None or component in metrics.active:
+            return func(*args, **kwargs)
+        metrics.active.add(component)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.active.discard(component)
+            metrics.add(component, time.perf_counter() - start)
+    return wrapper
+
+
+def instrument_workflow_engine(engine):
+    """
+    Time the public methods of an EnhancedOffboardingWorkflow instance.
+
+    Every public method is wrapped, so methods added to the engine are timed
+    without being listed here; a method calling another (e.g.
+    create_offboarding_request) is recorded once.
+    """
+    for name, attr in inspect.getmembers(type(engine)):
+        if name.startswith('_') or isinstance(attr, property) or not callable(attr):
+            continue
+        setattr(engine, name, timed("workflow", getattr(engine, name)))
+
+
+def _profiled_template_class(base):
+    class ProfiledTemplate(base):
+        def render(self, *args, **kwargs):
+            metrics = current()
+            if metrics is None:
+                return super().render(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return super().render(*args, **kwargs)
+            finally:
+                metrics.add("template", time.perf_counter() - start)
+    return ProfiledTemplate
+
+
+def is_enabled(app) -> bool:
+    if 'PROFILING' in app.config:
+        return bool(app.config['PROFILING'])
+    return os.environ.get('OFFBOARDING_PROFILING', '').lower() in ('1', 'true', 'yes')
+
+
+def init_app(app, workflow_engine=None) -> MetricsRegistry:
+    """
+    Enable profiling on a Flask app if configured to.
+
+    Args:
+        app: The Flask application
+        workflow_engine: Optional EnhancedOffboardingWorkflow to instrument
+
+    Returns:
+        MetricsRegistry, or None when profiling is disabled
+    """
+    if not is_enabled(app):
+        return None
+
+    from flask import request, Response
+
+    registry = MetricsRegistry()
+    app.extensions['profiling'] = registry
+    profile_dir = app.config.get('PROFILE_DIR', DEFAULT_PROFILE_DIR)
+    app.jinja_env.template_class = _profiled_template_class(app.jinja_env.template_class)
+    if workflow_engine is not None:
+        instrument_workflow_engine(workflow_engine)
+
+    @app.before_request
+    def _start_profiling():
+        _local.metrics = RequestMetrics()
+        _local.profiler = None
+        if request.headers.get(PROFILE_HEADER) == '1':
+            _local.profiler = cProfile.Profile()
+            _local.profiler.enable()
+
+    @app.after_request
+    def _finish_profiling(response):
+        metrics = current()
+        if metrics is None:
+            return response
+        _local.metrics = None
+
+        profiler = getattr(_local, 'profiler', None)
+        if profiler is not None:
+            profiler.disable()
+            _local.profiler = None
+            os.makedirs(profile_dir, exist_ok=True)
+            endpoint = (request.endpoint or 'unknown').replace('.', '_')
+            filename = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{endpoint}.prof"
+            profiler.dump_stats(os.path.join(profile_dir, filename))
+            response.headers['X-Profile-File'] = filename
+
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        registry.observe(request.method, route, response.status_code,
+                         time.perf_counter() - metrics.start, metrics)
+        return response
+
+    @app.teardown_request
+    def _discard_profiling(exc):
+        # Requests that raised never reach after_request
+        profiler = getattr(_local, 'profiler', None)
+        if profiler is not None:
+            profiler.disable()
+        _local.metrics = None
+        _local.profiler = None
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(registry.render_prometheus(), mimetype='text/plain; version=0.0.4')
+
+    return registry
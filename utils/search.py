@@ -0,0 +1,233 @@
+"""
+Full-text search over workflows, workflow and task notes, and exit interview feedback.
+
+An in-memory inverted index maps each term to the documents containing it
+and how often. Like the workflow engine's due-date index it follows the
+store: collections replace a record object whenever it changes, so each
+search first compares record identities and re-indexes only the records
+written since the last search, whichever process wrote them.
+
+Every query term also matches the terms it is a prefix of ("resig" finds
+"resignation"), looked up by bisecting the sorted vocabulary, and all terms
+must match. Results are ranked with BM25; prefix matches count for less than
+exact ones.
+"""
+
+import bisect
+import heapq
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Callable, Iterable, Tuple
+
+TOKEN_PATTERN = re.compile(r"\w+")
+KINDS = ("workflow", "note", "task_note", "feedback")
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Weight of a term that only starts with the query term
+PREFIX_WEIGHT = 0.5
+# Most frequent vocabulary terms a short prefix expands to
+MAX_EXPANSIONS = 64
+SNIPPET_LENGTH = 160
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _workflow_documents(request_id: str, workflow: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any], str]]:
+    employee = workflow.get("employee_data", {})
+    title = f"{employee.get('name', '')} ({employee.get('employee_id', '')})"
+    yield "workflow", {"request_id": request_id, "title": title}, " ".join(
+        str(value) for value in (request_id, employee.get("name"), employee.get("employee_id"),
+                                 employee.get("email"), employee.get("department"), employee.get("position"),
+                                 employee.get("line_manager"), employee.get("reason_for_leaving"),
+                                 employee.get("location"))
+        if value
+    )
+    for note in workflow.get("notes", ()):
+        yield "note", {"request_id": request_id, "title": title, "date": note.get("date"),
+                       "added_by": note.get("added_by")}, note.get("note", "")
+    for step_id, step in workflow.get("steps", {}).items():
+        for task in step.get("tasks", ()):
+            for note in task.get("notes", ()):
+                yield "task_note", {"request_id": request_id, "title": f"{title}: {task['name']}",
+                                    "step_id": step_id, "task_id": task["id"], "date": note.get("date"),
+                                    "added_by": note.get("added_by")}, note.get("note", "")
+
+
+def _interview_documents(interview_id: str, interview: Dict[str, Any]) -> Iterable[Tuple[str, Dict[str, Any], str]]:
+    if interview.get("feedback"):
+        yield "feedback", {"interview_id": interview_id, "employee_id": interview.get("employee_id"),
+                           "title": f"Exit interview ({interview.get('employee_id', '')})",
+                           "date": interview.get("interview_date"),
+                           "added_by": interview.get("interviewer")}, interview["feedback"]
+
+
+def _snippet(text: str, terms: Iterable[str]) -> str:
+    """Part of text around the first matched term."""
+    if len(text) <= SNIPPET_LENGTH:
+        return text
+    lowered = text.lower()
+    positions = [position for position in (lowered.find(term) for term in terms) if position >= 0]
+    start = max(0, min(positions, default=0) - SNIPPET_LENGTH // 3)
+    end = start + SNIPPET_LENGTH
+    return ("..." if start else "") + text[start:end].strip() + ("..." if end < len(text) else "")
+
+
+class SearchIndex:
+    """
+    Inverted index over a tenant's workflows and exit interviews.
+
+    Args:
+        workflows: Collection of workflows keyed by request_id
+        exit_interviews: Collection of exit interviews keyed by interview_id
+    """
+
+    def __init__(self, workflows, exit_interviews):
+        self._sources: List[Tuple[Any, Callable]] = [
+            (workflows, _workflow_documents),
+            (exit_interviews, _interview_documents),
+        ]
+        self._postings: Dict[str, Dict[int, int]] = {}  # term -> {document id: term frequency}
+        self._terms: List[str] = []  # Sorted vocabulary
+        self._new_terms = set()  # Terms added since the vocabulary was last sorted
+        self._documents: Dict[int, tuple] = {}  # document id -> (kind, fields, text, length)
+        self._total_length = 0
+        self._next_id = 0
+        # Per source: record key -> (indexed record, its document ids)
+        self._indexed: List[Dict[Any, tuple]] = [{} for _ in self._sources]
+        self._lock = threading.Lock()
+
+    def _add(self, kind: str, fields: Dict[str, Any], text: str) -> int:
+        document_id = self._next_id
+        self._next_id += 1
+        tokens = tokenize(text)
+        for term, count in Counter(tokens).items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._new_terms.add(term)
+            postings[document_id] = count
+        self._documents[document_id] = (kind, fields, text, len(tokens))
+        self._total_length += len(tokens)
+        return document_id
+
+    def _remove(self, document_id: int):
+        kind, fields, text, length = self._documents.pop(document_id)
+        self._total_length -= length
+        for term in set(tokenize(text)):
+            postings = self._postings[term]
+            del postings[document_id]
+            if not postings:
+                del self._postings[term]
+                if term in self._new_terms:
+                    self._new_terms.discard(term)
+                else:
+                    del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _sync(self):
+        for (collection, documents), indexed in zip(self._sources, self._indexed):
+            records = collection.records()
+            for key in [key for key in indexed if key not in records]:
+                for document_id in indexed.pop(key)[1]:
+                    self._remove(document_id)
+            for key, record in records.items():
+                previous = indexed.get(key)
+                if previous is not None:
+                    if previous[0] is record:
+                        continue
+                    for document_id in previous[1]:
+                        self._remove(document_id)
+                indexed[key] = (record, [self._add(*document) for document in documents(key, record)])
+        if len(self._new_terms) > 1000:
+            self._terms = sorted(self._postings)  # First build or bulk import: sort once
+        else:
+            for term in self._new_terms:
+                bisect.insort(self._terms, term)
+        self._new_terms.clear()
+
+    def sync(self):
+        """Index records written since the last sync."""
+        with self._lock:
+            self._sync()
+
+    def _expand(self, token: str) -> List[Tuple[str, float]]:
+        """Vocabulary terms matching token (itself, then its longer forms) with their weights."""
+        start = bisect.bisect_left(self._terms, token)
+        end = bisect.bisect_left(self._terms, token + "\U0010ffff", start)
+        longer = [term for term in self._terms[start:end] if term != token]
+        if len(longer) > MAX_EXPANSIONS:
+            longer = heapq.nlargest(MAX_EXPANSIONS, longer, key=lambda term: len(self._postings[term]))
+        expansions = [(term, PREFIX_WEIGHT) for term in longer]
+        if token in self._postings:
+            expansions.insert(0, (token, 1.0))
+        return expansions
+
+    def search(self, query: str, limit: int = 20, kinds: Iterable[str] = None) -> List[Dict[str, Any]]:
+        """
+        Documents matching every term of query (as a word or word prefix), best first.
+
+        Args:
+            query: Search text
+            limit: Most results to return
+            kinds: Only these document kinds (see KINDS)
+
+        Returns:
+            List of result dicts: kind, score, snippet and the document's
+            fields (request_id or interview_id, title, date, added_by, ...)
+        """
+        tokens = list(dict.fromkeys(tokenize(query)))
+        if not tokens or limit <= 0:
+            return []
+        kinds = set(kinds) if kinds else None
+
+        with self._lock:
+            self._sync()
+            count = len(self._documents)
+            if not count:
+                return []
+            average_length = self._total_length / count
+
+            expanded = [self._expand(token) for token in tokens]
+            if not all(expanded):
+                return []
+            # Rarest term first, so later terms only score the remaining candidates
+            expanded.sort(key=lambda terms: sum(len(self._postings[term]) for term, _ in terms))
+
+            scores = None
+            for terms in expanded:
+                term_scores = {}
+                for term, weight in terms:
+                    postings = self._postings[term]
+                    idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5)) * weight
+                    if scores is None:
+                        matches = postings.items()
+                    elif len(postings) < len(scores):
+                        matches = [(d, tf) for d, tf in postings.items() if d in scores]
+                    else:
+                        matches = [(d, postings[d]) for d in scores if d in postings]
+                    for document_id, frequency in matches:
+                        length = self._documents[document_id][3]
+                        score = idf * frequency * (K1 + 1) / (frequency + K1 * (1 - B + B * length / average_length))
+                        if score > term_scores.get(document_id, 0):
+                            term_scores[document_id] = score
+                if scores is None:
+                    scores = term_scores
+                else:
+                    scores = {d: scores[d] + score for d, score in term_scores.items()}
+                if not scores:
+                    return []
+
+            if kinds is not None:
+                scores = {d: score for d, score in scores.items() if self._documents[d][0] in kinds}
+            best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            matched_terms = [term for terms in expanded for term, _ in terms]
+            results = []
+            for document_id, score in best:
+                kind, fields, text, _ = self._documents[document_id]
+                results.append(dict(fields, kind=kind, score=round(score, 4), snippet=_snippet(text, matched_terms)))
+            return results
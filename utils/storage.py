@@ -0,0 +1,642 @@
+"""
+Shared storage service for the data directory.
+
+Both entry points (app.py through JSONHandler and the app/ package through
+app/utils/data.py) read and write the data files through this module, so they
+share one schema, one in-process cache per file and one locking protocol.
+
+Each collection is a JSON array snapshot (``employees.json``) plus an
+append-only journal next to it (``employees.json.journal``, one JSON operation
+per line). Small writes append a line to the journal instead of rewriting the
+snapshot; once the journal grows past ``COMPACT_AFTER`` operations it is folded
+back into the snapshot, which is replaced atomically.
+
+Concurrency is single-writer/multi-reader across threads and processes: readers
+take a shared lock on ``<file>.lock`` while catching up, writers take an
+exclusive lock for the whole read-modify-write. A reader catches up by
+re-reading the snapshot when its inode, mtime or size changed and otherwise
+only replaying the journal lines appended since its last look, so a cached read
+costs two stat() calls.
+"""
+
+import itertools
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Any, Iterable, Optional
+
+from utils import profiling
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+COMPACT_AFTER = 1000
+
+# Record versions are unique per process, so a version identifies one state of one record
+_versions = itertools.count(1)
+
+# Canonical key of each data file; unknown files are stored without an index
+COLLECTION_KEYS = {
+    'employees.json': 'employee_id',
+    'offboarding_requests.json': 'request_id',
+    'exit_interviews.json': 'interview_id',
+    'enhanced_workflows.json': 'request_id',
+    'uploads.json': 'sha256',
+    'it_tickets.json': 'ticket_id',
+    'feedback_analytics.json': 'interview_id',
+    'offboarding_tracking.json': 'employee_id',
+    'task_history.json': 'request_id',
+}
+
+# Secondary indexes maintained per data file
+COLLECTION_INDEXES = {
+    'employees.json': ('id', 'department', 'status'),
+    'offboarding_requests.json': ('employee_id',),
+    'exit_interviews.json': ('employee_id',),
+    'it_tickets.json': ('request_id',),
+}
+
+
+def journal_path(path: str) -> str:
+    """Return the journal file that belongs to a snapshot file."""
+    return path + '.journal'
+
+
+def _lock_path(path: str) -> str:
+    return path + '.lock'
+
+
+def _deepcopy(record: Dict[str, Any]) -> Dict[str, Any]:
+    # Records are plain JSON values, for which a JSON round trip is the fastest deep copy
+    return json.loads(json.dumps(record))
+
+
+def copy_records(records: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Return deep copies of records, for callers that may change what they were given."""
+    return json.loads(json.dumps(list(records)))
+
+
+def _set_paths(record: Dict[str, Any], changes: Iterable) -> Dict[str, Any]:
+    """Return a copy of record with each (path, value) of changes set; only the dicts on the paths are copied."""
+    record = dict(record)
+    copied = set()
+    for path, value in changes:
+        node = record
+        for depth in range(len(path) - 1):
+            prefix = tuple(path[:depth + 1])
+            if prefix not in copied:
+                node[path[depth]] = dict(node.get(path[depth]) or {})
+                copied.add(prefix)
+            node = node[path[depth]]
+        node[path[-1]] = value
+    return record
+
+
+class _FileLock:
+    """Reentrant shared/exclusive lock on a lock file, also serialising threads."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._thread_lock = threading.RLock()
+        self._depth = 0
+        self._exclusive = False
+
+    @contextmanager
+    def hold(self, exclusive: bool):
+        with self._thread_lock:
+            if self._depth:
+                if exclusive and not self._exclusive:
+                    raise RuntimeError("Cannot upgrade a shared storage lock to exclusive")
+                self._depth += 1
+                try:
+                    yield
+                finally:
+                    self._depth -= 1
+                return
+
+            # A fresh descriptor per acquisition keeps forked workers from sharing one lock
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+                else:
+                    # msvcrt only offers exclusive byte-range locks
+                    msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                self._depth = 1
+                self._exclusive = exclusive
+                yield
+            finally:
+                self._depth = 0
+                self._exclusive = False
+                os.close(fd)
+
+
+class JSONCollection:
+    """
+    One data file: a JSON array snapshot, its journal and an in-memory index.
+
+    Records returned by all(), records() and find() are the cached objects
+    and must be treated as read-only; writes replace cached records rather
+    than changing them, so readers never see a record change under them.
+    get() returns a deep copy. Records are keyed by ``key`` (None for files
+    that are only ever read and written whole).
+    """
+
+    def __init__(self, path: str, key: Optional[str] = None, indexes: Iterable[str] = (),
+                 compact_after: int = COMPACT_AFTER):
+        self.path = path
+        self.key = key
+        self.index_fields = tuple(indexes)
+        self.compact_after = compact_after
+        self.journal_path = journal_path(path)
+        self._lock = _FileLock(_lock_path(path))
+
+        self._records = {}
+        self._list = None
+        self._mapping = None
+        self._versions = {}
+        self._version_mapping = None
+        self._indexes = {field: {} for field in self.index_fields}
+        self._snapshot_signature = None
+        self._journal_offset = 0
+        self._journal_entries = 0
+        self._unkeyed = itertools.count()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if not os.path.exists(path):
+            with self._lock.hold(exclusive=True):
+                if not os.path.exists(path):
+                    self._write_snapshot([])
+
+    # Reading
+
+    @staticmethod
+    def _signature(path: str):
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load_snapshot(self):
+        metrics = profiling.current()
+        start = time.perf_counter()
+        try:
+            with open(self.path, 'rb') as f:
+                raw = f.read()
+        except FileNotFoundError:
+            raw = b''
+        read_done = time.perf_counter()
+        try:
+            records = json.loads(raw) if raw.strip() else []
+        except ValueError as e:
+            # Writers replace the snapshot atomically, so this is real corruption. Serve the
+            # journal alone, as the old handler served [], and keep a copy for recovery
+            # since the next compaction overwrites the file.
+            backup = self.path + '.corrupt'
+            logger.error(f"Unreadable snapshot {self.path} ({e}); serving it as empty, copy kept at {backup}")
+            if not os.path.exists(backup):
+                shutil.copyfile(self.path, backup)
+            records = []
+        if metrics is not None:
+            metrics.record_storage("read", len(raw), read_done - start, time.perf_counter() - read_done)
+
+        self._records = {}
+        self._versions = {}
+        self._indexes = {field: {} for field in self.index_fields}
+        for record in records:
+            self._put_cached(record)
+        self._list = records if self.key is None else None
+
+    def _replay_journal(self):
+        try:
+            size = os.stat(self.journal_path).st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._journal_offset:
+            # Truncated by a compaction we have not seen yet
+            self._snapshot_signature = None
+            return False
+        if size == self._journal_offset:
+            return True
+
+        metrics = profiling.current()
+        start = time.perf_counter()
+        with open(self.journal_path, 'rb') as f:
+            f.seek(self._journal_offset)
+            raw = f.read(size - self._journal_offset)
+        read_done = time.perf_counter()
+        # Only complete lines are applied; a writer that died mid-append leaves a partial tail
+        end = raw.rfind(b'\n') + 1
+        for line in raw[:end].splitlines():
+            if line.strip():
+                self._apply(json.loads(line))
+                self._journal_entries += 1
+        self._journal_offset += end
+        if metrics is not None:
+            metrics.record_storage("read", end, read_done - start, time.perf_counter() - read_done)
+        return True
+
+    def _refresh(self):
+        """Bring the cache up to date; the caller holds the lock."""
+        while True:
+            signature = self._signature(self.path)
+            if signature != self._snapshot_signature:
+                self._load_snapshot()
+                self._snapshot_signature = signature
+                self._journal_offset = 0
+                self._journal_entries = 0
+            if self._replay_journal():
+                return
+
+    # Cache maintenance
+
+    def _put_cached(self, record: Dict[str, Any]):
+        if self.key is None:
+            return
+        record_key = record.get(self.key)
+        if record_key is None:
+            # Keep records that predate the schema instead of collapsing them onto one key
+            record_key = ('unkeyed', next(self._unkeyed))
+        old = self._records.get(record_key)
+        if old is not None:
+            self._unindex(record_key, old)
+        self._records[record_key] = record
+        self._versions[record_key] = next(_versions)
+        for field in self.index_fields:
+            if field in record:
+                self._indexes[field].setdefault(record[field], {})[record_key] = None
+        self._list = None
+        self._mapping = None
+        self._version_mapping = None
+
+    def _unindex(self, record_key, record: Dict[str, Any]):
+        for field in self.index_fields:
+            if field in record:
+                bucket = self._indexes[field].get(record[field])
+                if bucket is not None:
+                    bucket.pop(record_key, None)
+
+    def _apply(self, op: Dict[str, Any]):
+        kind = op["op"]
+        if kind == "put":
+            self._put_cached(op["record"])
+        elif kind == "patch":
+            record = self._records.get(op["key"])
+            if record is not None:
+                # Copy on write so records already handed to readers stay unchanged
+                self._put_cached(dict(record, **op["changes"]))
+        elif kind == "set":
+            record = self._records.get(op["key"])
+            if record is not None:
+                self._put_cached(_set_paths(record, op["changes"]))
+        elif kind == "delete":
+            record = self._records.pop(op["key"], None)
+            if record is not None:
+                self._unindex(op["key"], record)
+                self._versions.pop(op["key"], None)
+                self._list = None
+                self._mapping = None
+                self._version_mapping = None
+
+    # Writing
+
+    def _write_snapshot(self, records: List[Dict[str, Any]]):
+        metrics = profiling.current()
+        start = time.perf_counter()
+        raw = json.dumps(records, indent=4).encode()
+        serialised = time.perf_counter()
+
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(raw)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        # The snapshot now holds everything, so the journal starts over
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, 'wb').close()
+        if metrics is not None:
+            metrics.record_storage("write", len(raw), time.perf_counter() - serialised, serialised - start)
+
+        self._snapshot_signature = self._signature(self.path)
+        self._journal_offset = 0
+        self._journal_entries = 0
+
+    def _append(self, op: Dict[str, Any]):
+        metrics = profiling.current()
+        start = time.perf_counter()
+        line = (json.dumps(op, separators=(',', ':')) + '\n').encode()
+        serialised = time.perf_counter()
+        with open(self.journal_path, 'ab') as f:
+            if f.tell() != self._journal_offset:
+                # Drop a partial line left by a writer that died mid-append
+                f.truncate(self._journal_offset)
+            f.write(line)
+        if metrics is not None:
+            metrics.record_storage("write", len(line), time.perf_counter() - serialised, serialised - start)
+
+        self._journal_offset += len(line)
+        self._journal_entries += 1
+        self._apply(op)
+        if self._journal_entries >= self.compact_after:
+            self.compact()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Hold the exclusive lock across a read-modify-write.
+
+        Inside the block the cache is current and no other thread or process
+        can write; records may be read with get(copy=False), changed and
+        written back with put().
+        """
+        with self._lock.hold(exclusive=True):
+            self._refresh()
+            yield self
+
+    def compact(self):
+        """Fold the journal into a new snapshot."""
+        with self.transaction():
+            self._write_snapshot(self.all())
+
+    # Public API
+
+    def all(self) -> List[Dict[str, Any]]:
+        """Return every record in file order (cached objects; do not mutate)."""
+        with self._lock.hold(exclusive=False):
+            self._refresh()
+            if self._list is None:
+                self._list = list(self._records.values())
+            return self._list
+
+    def records(self) -> Dict[Any, Dict[str, Any]]:
+        """
+        Return a key -> record mapping of the cached records (do not mutate).
+
+        The mapping is rebuilt only after a change, so callers can iterate it
+        while other threads write.
+        """
+        with self._lock.hold(exclusive=False):
+            self._refresh()
+            if self._mapping is None:
+                self._mapping = dict(self._records)
+            return self._mapping
+
+    def versions(self) -> Dict[Any, int]:
+        """
+        Return a key -> version mapping of the cached records (do not mutate).
+
+        A record gets a new version whenever it is written, so a version can
+        key anything derived from the record (e.g. a rendered table row).
+        Versions are unique within the process only; they are not persisted.
+        """
+        with self._lock.hold(exclusive=False):
+            self._refresh()
+            if self._version_mapping is None:
+                self._version_mapping = dict(self._versions)
+            return self._version_mapping
+
+    def get(self, record_key, copy: bool = True) -> Optional[Dict[str, Any]]:
+        """Return a deep copy of the record with this key (the cached object if copy=False), or None."""
+        with self._lock.hold(exclusive=False):
+            self._refresh()
+            record = self._records.get(record_key)
+            if record is None or not copy:
+                return record
+            return _deepcopy(record)
+
+    def find(self, field: str, value) -> List[Dict[str, Any]]:
+        """Return the records whose indexed field equals value (cached objects)."""
+        with self._lock.hold(exclusive=False):
+            self._refresh()
+            if field not in self._indexes:
+                return [r for r in self._records.values() if r.get(field) == value]
+            return [self._records[k] for k in self._indexes[field].get(value, ())]
+
+    def put(self, record: Dict[str, Any]):
+        """Insert or replace a record by its key."""
+        with self.transaction():
+            self._append({"op": "put", "record": record})
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        """Insert or replace several records; a batch that would trigger a compaction is written as one snapshot."""
+        records = list(records)
+        with self.transaction():
+            if self._journal_entries + len(records) < self.compact_after:
+                for record in records:
+                    self._append({"op": "put", "record": record})
+                return
+            for record in records:
+                self._put_cached(record)
+            self._write_snapshot(self.all())
+
+    def patch(self, record_key, changes: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Apply changes to one record; returns a copy of the result or None if missing."""
+        with self.transaction():
+            record = self._records.get(record_key)
+            if record is None:
+                return None
+            changed = {field: value for field, value in changes.items() if record.get(field) != value}
+            if changed:
+                self._append({"op": "patch", "key": record_key, "changes": changed})
+            return _deepcopy(self._records[record_key])
+
+    def patch_paths(self, record_key, changes: Iterable) -> bool:
+        """
+        Set nested values of one record; returns whether the record exists.
+
+        changes holds (path, value) pairs, path being the keys leading to the
+        value (e.g. ("departments", "IT", "tasks", "Backup Files")). Only the
+        changed values are journaled, so small edits to large records stay
+        small writes.
+        """
+        changes = [[list(path), value] for path, value in changes]
+        with self.transaction():
+            if record_key not in self._records:
+                return False
+            if changes:
+                self._append({"op": "set", "key": record_key, "changes": changes})
+            return True
+
+    def update(self, record_key, mutate) -> Any:
+        """
+        Read-modify-write one record under the exclusive lock.
+
+        mutate receives a copy of the record and changes it in place; its
+        return value is passed back. Returns None without writing if the
+        record does not exist or mutate returns False.
+        """
+        with self.transaction():
+            record = self._records.get(record_key)
+            if record is None:
+                return None
+            record = _deepcopy(record)
+            result = mutate(record)
+            if result is not False:
+                self._append({"op": "put", "record": record})
+            return result
+
+    def delete(self, record_key) -> bool:
+        """Remove a record; returns whether it existed."""
+        with self.transaction():
+            if record_key not in self._records:
+                return False
+            self._append({"op": "delete", "key": record_key})
+            return True
+
+    def replace_all(self, records: List[Dict[str, Any]]):
+        """Replace the whole file with copies of records (the caller keeps ownership of its list)."""
+        records = copy_records(records)
+        with self._lock.hold(exclusive=True):
+            self._write_snapshot(records)
+            self._records = {}
+            self._versions = {}
+            self._mapping = None
+            self._version_mapping = None
+            self._indexes = {field: {} for field in self.index_fields}
+            for record in records:
+                self._put_cached(record)
+            self._list = records if self.key is None else None
+
+
+class MemoryCollection:
+    """In-process stand-in for JSONCollection, used when nothing is persisted."""
+
+    def __init__(self, key: str):
+        self.key = key
+        self._records = {}
+        self._versions = {}
+        self._lock = threading.RLock()
+
+    @contextmanager
+    def transaction(self):
+        with self._lock:
+            yield self
+
+    def all(self) -> List[Dict[str, Any]]:
+        return list(self._records.values())
+
+    def records(self) -> Dict[Any, Dict[str, Any]]:
+        return dict(self._records)
+
+    def versions(self) -> Dict[Any, int]:
+        return dict(self._versions)
+
+    def _store(self, record_key, record: Dict[str, Any]):
+        self._records[record_key] = record
+        self._versions[record_key] = next(_versions)
+
+    def get(self, record_key, copy: bool = True) -> Optional[Dict[str, Any]]:
+        record = self._records.get(record_key)
+        if record is None or not copy:
+            return record
+        return _deepcopy(record)
+
+    def put(self, record: Dict[str, Any]):
+        with self._lock:
+            self._store(record[self.key], record)
+
+    def put_many(self, records: Iterable[Dict[str, Any]]):
+        with self._lock:
+            for record in records:
+                self._store(record[self.key], record)
+
+    def patch_paths(self, record_key, changes: Iterable) -> bool:
+        with self._lock:
+            if record_key not in self._records:
+                return False
+            self._store(record_key, _set_paths(self._records[record_key], changes))
+            return True
+
+    def update(self, record_key, mutate) -> Any:
+        with self._lock:
+            record = self._records.get(record_key)
+            if record is None:
+                return None
+            record = _deepcopy(record)
+            result = mutate(record)
+            if result is not False:
+                self._store(record_key, record)
+            return result
+
+
+class StorageService:
+    """The collections of one data directory."""
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def collection(self, filename: str) -> JSONCollection:
+        """Return the shared collection for a file in the data directory."""
+        with self._lock:
+            if filename not in self._collections:
+                self._collections[filename] = JSONCollection(
+                    os.path.join(self.data_dir, filename),
+                    key=COLLECTION_KEYS.get(filename),
+                    indexes=COLLECTION_INDEXES.get(filename, ())
+                )
+            return self._collections[filename]
+
+    @property
+    def employees(self) -> JSONCollection:
+        return self.collection('employees.json')
+
+    @property
+    def offboarding_requests(self) -> JSONCollection:
+        return self.collection('offboarding_requests.json')
+
+    @property
+    def exit_interviews(self) -> JSONCollection:
+        return self.collection('exit_interviews.json')
+
+    @property
+    def workflows(self) -> JSONCollection:
+        return self.collection('enhanced_workflows.json')
+
+    @property
+    def uploads(self) -> JSONCollection:
+        return self.collection('uploads.json')
+
+    @property
+    def offboarding_tracking(self) -> JSONCollection:
+        return self.collection('offboarding_tracking.json')
+
+    @property
+    def task_history(self) -> JSONCollection:
+        return self.collection('task_history.json')
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_storage(data_dir: str) -> StorageService:
+    """Return the process-wide storage service for a data directory."""
+    data_dir = os.path.abspath(data_dir)
+    with _services_lock:
+        if data_dir not in _services:
+            _services[data_dir] = StorageService(data_dir)
+        return _services[data_dir]
+
+
+def get_collection(path: str) -> JSONCollection:
+    """Return the shared collection for a data file path."""
+    return get_storage(os.path.dirname(path) or '.').collection(os.path.basename(path))
@@ -0,0 +1,401 @@
+"""
+Deterministic synthetic data for benchmarks and load tests.
+
+Every generator takes a seed, so the same arguments always produce the
+same records. The command line writes a complete data directory (employees,
+legacy offboarding requests, exit interviews and enhanced workflows):
+
+    python -m utils.synthetic_data --output-dir /tmp/bench-data --employees 100000 \
+        --workflows 10000 --seed 42
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterable, Iterator
+
+from utils import storage
+
+FIRST_NAMES = [
+    "Alice", "Bob", "Carol", "David", "Eve", "Frank", "Grace", "Hassan", "Ines", "Jamal",
+    "Kate", "Liam", "Mona", "Nadia", "Omar", "Priya", "Quinn", "Rania", "Sam", "Tariq",
+    "Uma", "Victor", "Wei", "Ximena", "Yusuf", "Zara",
+]
+
+LAST_NAMES = [
+    "Smith", "Johnson", "Lee", "Garcia", "Khan", "Brown", "Al-Harbi", "Nguyen", "Silva",
+    "Okafor", "Müller", "Rossi", "Tanaka", "Haddad", "Kowalski", "Martin", "Patel", "Cohen",
+]
+
+DEPARTMENTS = {
+    "Engineering": ["Software Engineer", "Senior Software Engineer", "QA Engineer", "Engineering Manager"],
+    "Sales": ["Account Executive", "Sales Manager", "Sales Development Rep"],
+    "Finance": ["Accountant", "Financial Analyst", "Payroll Specialist"],
+    "Marketing": ["Marketing Specialist", "Content Writer", "Marketing Manager"],
+    "HR": ["HR Generalist", "Recruiter", "People Ops Specialist"],
+    "Legal": ["Legal Counsel", "Paralegal"],
+    "Operations": ["Operations Analyst", "Facilities Coordinator", "Office Manager"],
+}
+
+REASONS_FOR_LEAVING = ["resignation", "termination", "non_renewal", "mutual_agreement"]
+
+# Locations in data/business_calendar.json
+LOCATIONS = ["Head Office", "London", "New York", "San Francisco"]
+
+# Department checklist flags stored on each employee record
+EMPLOYEE_FLAGS = [
+    "it_access_revoked", "devices_collected", "files_transferred",
+    "nda_validated", "conf_docs_returned",
+    "access_card_reclaimed", "facility_access_removed",
+    "handover_confirmed", "checklist_approved",
+]
+
+
+def _name(rng: random.Random) -> str:
+    return f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+
+
+def iter_employees(count: int, seed: int = 0, resigned_ratio: float = 0.2) -> Iterator[Dict[str, Any]]:
+    """Yield employee records in the data/employees.json format."""
+    rng = random.Random(seed)
+    base_date = datetime(2018, 1, 1)
+
+    for i in range(1, count + 1):
+        name = _name(rng)
+        department = rng.choice(list(DEPARTMENTS))
+        resigned = rng.random() < resigned_ratio
+        join_date = base_date + timedelta(days=rng.randrange(0, 2500))
+        employee = {
+            "employee_id": f"EMP{i:07d}",
+            "name": name,
+            "email": f"{name.lower().replace(' ', '.')}.{i}@company.com",
+            "department": department,
+            "position": rng.choice(DEPARTMENTS[department]),
+            "status": "Resigned" if resigned else "Active",
+            "join_date": join_date.strftime("%Y-%m-%d"),
+            "resignation_letter": None,
+            "exit_interview": None,
+            "final_salary": None,
+            "loan_balance": None,
+            "payslip": None,
+        }
+        if resigned and rng.random() < 0.7:
+            employee["resignation_letter"] = f"EMP{i:07d}_resignation_letter.pdf"
+        for flag in EMPLOYEE_FLAGS:
+            employee[flag] = resigned and rng.random() < 0.5
+        yield employee
+
+
+def generate_employees(count: int, seed: int = 0, resigned_ratio: float = 0.2) -> List[Dict[str, Any]]:
+    """Generate employee records in the data/employees.json format."""
+    return list(iter_employees(count, seed, resigned_ratio))
+
+
+def generate_workflow_requests(employees: List[Dict[str, Any]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate EnhancedOffboardingWorkflow.create_offboarding_request inputs, one per employee."""
+    rng = random.Random(seed)
+    today = datetime.now()
+    requests = []
+
+    for employee in employees:
+        lwd = today + timedelta(days=rng.randrange(-60, 60))
+        requests.append({
+            "employee_id": employee["employee_id"],
+            "name": employee["name"],
+            "email": employee["email"],
+            "last_working_day": lwd.strftime("%Y-%m-%d"),
+            "reason_for_leaving": rng.choice(REASONS_FOR_LEAVING),
+            "line_manager": _name(rng),
+            "department": employee["department"],
+            "position": employee["position"],
+            "location": rng.choice(LOCATIONS),
+        })
+
+    return requests
+
+
+# Legacy offboarding requests (data/offboarding_requests.json)
+
+LEGACY_REASONS = ["Resignation", "Termination", "End of Contract", "Retirement", "Other"]
+
+LEGACY_DEPARTMENT_TASKS = {
+    "hr": ["Submit Resignation Letter", "Change Status to Resigned", "Schedule Exit Interview"],
+    "it": ["Revoke System Access", "Return Company Device", "Backup Files"],
+    "finance": ["Calculate Settlement", "Check Loans", "Generate Final Payslip"],
+    "legal": ["NDA Status Check", "Document Return", "Dispute Resolution"],
+}
+
+TASK_STATUSES = ["Pending", "In Progress", "Completed"]
+
+
+def _timestamp(rng: random.Random, around: datetime, spread_days: int = 30) -> str:
+    return (around + timedelta(minutes=rng.randrange(-spread_days * 1440, spread_days * 1440))).isoformat()
+
+
+def generate_offboarding_requests(employees: Iterable[Dict[str, Any]], seed: int = 0) -> List[Dict[str, Any]]:
+    """Generate legacy offboarding requests, one per resigned employee."""
+    rng = random.Random(seed)
+    today = datetime.now()
+    requests = []
+
+    for employee in employees:
+        if employee["status"] != "Resigned":
+            continue
+
+        departments = {}
+        for department, tasks in LEGACY_DEPARTMENT_TASKS.items():
+            updates = []
+            for task in tasks:
+                # Task updates are appended on every status change, so repeat some
+                for status in TASK_STATUSES[:rng.randrange(0, len(TASK_STATUSES) + 1)]:
+                    updates.append({"task": task, "status": status, "updated_at": _timestamp(rng, today)})
+            status = updates[-1]["status"] if updates else "Pending"
+            departments[department] = {"status": status, "tasks": updates}
+
+        statuses = {dept["status"] for dept in departments.values()}
+        if statuses == {"Completed"}:
+            overall = "Completed"
+        elif statuses == {"Pending"}:
+            overall = "Pending"
+        else:
+            overall = "In Progress"
+
+        created_at = _timestamp(rng, today, 90)
+        requests.append({
+            "request_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "employee_id": employee["employee_id"],
+            "employee_name": employee["name"],
+            "department": employee["department"],
+            "last_working_day": (today + timedelta(days=rng.randrange(-60, 60))).strftime("%Y-%m-%d"),
+            "reason": rng.choice(LEGACY_REASONS),
+            "notice_period": rng.choice([14, 30, 60, 90]),
+            "status": overall,
+            "created_at": created_at,
+            "updated_at": created_at,
+            "departments": departments
+        })
+
+    return requests
+
+
+# Exit interviews (data/exit_interviews.json)
+
+INTERVIEWERS = ["Hana Yousef", "Mark Evans", "Sara Lopez", "Ken Ito"]
+
+# Feedback fragments grouped by theme; each interview mixes a few of them
+FEEDBACK_FRAGMENTS = {
+    "compensation": [
+        "The salary was below market compared to the offer I received.",
+        "Bonuses were unclear and the pay review process felt unfair.",
+        "Compensation was fair and benefits were generous.",
+    ],
+    "management": [
+        "My manager was supportive and gave helpful feedback.",
+        "Management communication was poor and priorities changed constantly.",
+        "I did not feel recognised by my line manager.",
+    ],
+    "growth": [
+        "There was limited career growth and no clear promotion path.",
+        "I learned a lot and the training budget was excellent.",
+        "I am leaving for a role with more responsibility.",
+    ],
+    "workload": [
+        "The workload was heavy and overtime became normal.",
+        "Deadlines were unrealistic and the team was understaffed.",
+        "Work life balance was good most of the year.",
+    ],
+    "culture": [
+        "The team culture was friendly and collaborative.",
+        "Colleagues were great but the office politics were stressful.",
+        "I felt excluded from decisions that affected my work.",
+    ],
+    "relocation": [
+        "I am relocating to another city for family reasons.",
+        "The commute became too long after the office move.",
+        "I would have stayed if remote work had been allowed.",
+    ],
+}
+
+
+def generate_exit_interviews(employees: Iterable[Dict[str, Any]], seed: int = 0,
+                             ratio: float = 0.6) -> List[Dict[str, Any]]:
+    """Generate exit interviews for a share of the resigned employees."""
+    rng = random.Random(seed)
+    today = datetime.now()
+    themes = list(FEEDBACK_FRAGMENTS)
+    interviews = []
+
+    for employee in employees:
+        if employee["status"] != "Resigned" or rng.random() >= ratio:
+            continue
+
+        completed = rng.random() < 0.7
+        feedback = ""
+        if completed:
+            feedback = " ".join(
+                rng.choice(FEEDBACK_FRAGMENTS[theme]) for theme in rng.sample(themes, rng.randrange(1, 4))
+            )
+
+        created_at = _timestamp(rng, today, 60)
+        interviews.append({
+            "interview_id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "employee_id": employee["employee_id"],
+            "interview_date": (today + timedelta(days=rng.randrange(-60, 30))).strftime("%Y-%m-%d"),
+            "interviewer": rng.choice(INTERVIEWERS),
+            "status": "Completed" if completed else "Scheduled",
+            "feedback": feedback,
+            "created_at": created_at,
+            "updated_at": created_at
+        })
+
+    return interviews
+
+
+# Enhanced workflows
+
+WORKFLOW_PROFILES = ["new", "in_progress", "late", "completed"]
+
+
+def populate_workflows(engine, workflow_requests: Iterable[Dict[str, Any]], seed: int = 0) -> List[str]:
+    """
+    Create workflows in an EnhancedOffboardingWorkflow and advance them to mixed states.
+
+    Profiles: "new" (untouched), "in_progress" (early steps done, one task
+    started), "late" (LWD in the past with later steps still open) and
+    "completed" (every task done).
+    """
+    from modules.enhanced_workflow import WorkflowStatus
+
+    rng = random.Random(seed)
+    profiles, batch = [], []
+
+    for employee_data in workflow_requests:
+        profile = rng.choice(WORKFLOW_PROFILES)
+        if profile == "late":
+            lwd = datetime.now() - timedelta(days=rng.randrange(8, 45))
+            employee_data = dict(employee_data, last_working_day=lwd.strftime("%Y-%m-%d"))
+        profiles.append(profile)
+        batch.append(employee_data)
+
+    # One batch, so due dates are computed together
+    request_ids = engine.create_offboarding_requests(batch)
+
+    for request_id, profile, employee_data in zip(request_ids, profiles, batch):
+        if profile == "new":
+            continue
+
+        steps = list(engine.active_workflows[request_id]["steps"].items())
+        if profile == "completed":
+            done_steps = len(steps)
+        else:
+            done_steps = rng.randrange(1, 4)
+
+        for step_id, step in steps[:done_steps]:
+            for task in step["tasks"]:
+                engine.update_task_status(request_id, step_id, task["id"], WorkflowStatus.COMPLETED,
+                                          employee_data.get("line_manager"))
+
+        if profile != "completed":
+            step_id, step = steps[done_steps]
+            engine.update_task_status(request_id, step_id, step["tasks"][0]["id"], WorkflowStatus.IN_PROGRESS,
+                                      employee_data.get("line_manager"), "Started")
+
+    return request_ids
+
+
+# Writing data sets
+
+def write_json_array(path: str, records: Iterable[Dict[str, Any]]) -> int:
+    """
+    Stream records to a JSON array file in the same layout as json.dump(indent=4).
+
+    A storage journal left next to the file by an earlier data set is removed,
+    so the new file is read as written.
+
+    Returns:
+        int: Number of records written
+    """
+    count = 0
+    if os.path.exists(storage.journal_path(path)):
+        os.remove(storage.journal_path(path))
+    with open(path, 'w') as f:
+        f.write("[")
+        for record in records:
+            f.write(",\n    " if count else "\n    ")
+            f.write(json.dumps(record, indent=4).replace("\n", "\n    "))
+            count += 1
+        f.write("\n]" if count else "]")
+    return count
+
+
+def write_json_dataset(output_dir: str, employee_count: int, workflow_count: int, seed: int = 0) -> Dict[str, int]:
+    """
+    Write a complete JSON data directory.
+
+    Employees are streamed to disk; only the resigned subset used for
+    requests, interviews and workflows is kept in memory.
+    """
+    from modules.enhanced_workflow import EnhancedOffboardingWorkflow
+
+    os.makedirs(output_dir, exist_ok=True)
+    resigned = []
+
+    def employees():
+        for employee in iter_employees(employee_count, seed):
+            if employee["status"] == "Resigned":
+                resigned.append(employee)
+            yield employee
+
+    counts = {"employees": write_json_array(os.path.join(output_dir, 'employees.json'), employees())}
+    counts["offboarding_requests"] = write_json_array(
+        os.path.join(output_dir, 'offboarding_requests.json'), generate_offboarding_requests(resigned, seed)
+    )
+    counts["exit_interviews"] = write_json_array(
+        os.path.join(output_dir, 'exit_interviews.json'), generate_exit_interviews(resigned, seed)
+    )
+
+    engine = EnhancedOffboardingWorkflow()
+    request_ids = populate_workflows(engine, generate_workflow_requests(resigned[:workflow_count], seed), seed)
+    counts["enhanced_workflows"] = write_json_array(
+        os.path.join(output_dir, 'enhanced_workflows.json'),
+        (engine.active_workflows[request_id] for request_id in request_ids)
+    )
+    return counts
+
+
+STORAGE_BACKENDS = {
+    "json": write_json_dataset,
+}
+
+
+def main(argv: List[str] = None) -> int:
+    """Command line entry point."""
+    parser = argparse.ArgumentParser(description="Generate a synthetic offboarding data set")
+    parser.add_argument("--output-dir", required=True, help="Directory to write the data set to")
+    parser.add_argument("--employees", type=int, default=1000, help="Number of employees")
+    parser.add_argument("--workflows", type=int, default=None,
+                        help="Maximum enhanced workflows (default: one per resigned employee)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backend", choices=sorted(STORAGE_BACKENDS), default="json")
+    parser.add_argument("--force", action="store_true", help="Overwrite an existing data set")
+    args = parser.parse_args(argv)
+
+    if os.path.exists(os.path.join(args.output_dir, 'employees.json')) and not args.force:
+        parser.error(f"{args.output_dir} already contains employees.json (use --force to overwrite)")
+
+    logging.getLogger('modules.enhanced_workflow').setLevel(logging.WARNING)
+    workflow_count = args.workflows if args.workflows is not None else args.employees
+    counts = STORAGE_BACKENDS[args.backend](args.output_dir, args.employees, workflow_count, args.seed)
+
+    for name, count in counts.items():
+        print(f"{name}: {count}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
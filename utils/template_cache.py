@@ -0,0 +1,116 @@
+"""
+Template fragment caching and a compiled-template cache for the Flask apps.
+
+Long tables re-render every row on every request although most rows did not
+change since the last one. Wrapping a row in
+
+    {% cache workflow.request_id, workflow.version %} ... {% endcache %}
+
+renders it once per distinct key and serves the stored HTML afterwards. The
+key should hold everything the fragment shows: storage record versions
+(JSONCollection.versions()) change whenever a record is written, so keying a
+row on its record's version keeps it fresh. A key containing None (e.g. a
+record without a version) is rendered uncached.
+
+Compiled templates are kept in a Jinja bytecode cache on disk
+(TEMPLATE_BYTECODE_DIR app config, default: a per-user temp directory), so a
+freshly started worker loads templates without parsing and compiling them.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any
+
+from jinja2 import FileSystemBytecodeCache, nodes
+from jinja2.ext import Extension
+
+# Rendered fragments kept per process
+DEFAULT_FRAGMENT_CACHE_SIZE = 20000
+
+
+class FragmentCache:
+    """Bounded, thread-safe LRU mapping of fragment keys to rendered HTML."""
+
+    def __init__(self, size: int = DEFAULT_FRAGMENT_CACHE_SIZE):
+        self.size = size
+        self._fragments = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key) -> Any:
+        with self._lock:
+            fragment = self._fragments.get(key)
+            if fragment is None:
+                self.misses += 1
+                return None
+            self._fragments.move_to_end(key)
+            self.hits += 1
+            return fragment
+
+    def put(self, key, fragment):
+        with self._lock:
+            self._fragments[key] = fragment
+            self._fragments.move_to_end(key)
+            while len(self._fragments) > self.size:
+                self._fragments.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._fragments.clear()
+
+    def __len__(self):
+        return len(self._fragments)
+
+
+class FragmentCacheExtension(Extension):
+    """The ``{% cache key, ... %}...{% endcache %}`` tag."""
+
+    tags = {"cache"}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache=FragmentCache())
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        # Keys are scoped to the template, so two templates may use the same record keys
+        key = [nodes.Const(parser.name), parser.parse_expression()]
+        while parser.stream.skip_if("comma"):
+            key.append(parser.parse_expression())
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_render", [nodes.Tuple(key, "load")]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render(self, key: tuple, caller):
+        if None in key:
+            return caller()
+        cache = self.environment.fragment_cache
+        fragment = cache.get(key)
+        if fragment is None:
+            fragment = caller()
+            cache.put(key, fragment)
+        return fragment
+
+
+def init_app(app) -> FragmentCache:
+    """
+    Enable fragment caching and the compiled-template cache on a Flask app.
+
+    Args:
+        app: The Flask application
+
+    Returns:
+        The app's FragmentCache
+    """
+    env = app.jinja_env
+    env.add_extension(FragmentCacheExtension)
+    env.fragment_cache.size = app.config.get('FRAGMENT_CACHE_SIZE', DEFAULT_FRAGMENT_CACHE_SIZE)
+    directory = app.config.get('TEMPLATE_BYTECODE_DIR')
+    if directory is not None:
+        os.makedirs(directory, exist_ok=True)
+    env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.extensions['fragment_cache'] = env.fragment_cache
+    return env.fragment_cache
@@ -0,0 +1,277 @@
+"""
+Tenants: the legal entities whose data is kept in separate partitions.
+
+data/tenants.json lists the entities and their data directories (relative
+to the data directory):
+
+    {
+        "default_tenant": "main",
+        "tenants": {
+            "main": {"name": "Head Office", "data_dir": "."},
+            "ksa": {"name": "KSA Entity", "data_dir": "tenants/ksa"}
+        }
+    }
+
+Without the file the whole data directory is a single tenant, "default".
+
+Every tenant has its own storage (employees, requests, workflows and upload
+manifest), workflow engine and due-date index, search index, job queue and upload area
+(static/uploads/tenants/<id>/ for all but the first tenant), created on
+first use. A web request works on the tenant chosen with ?tenant=<id>
+(remembered in the session) or the X-Tenant header, so it only reads that
+tenant's partition. Cross-tenant rollups summarise each partition in a
+separate worker process and add the results up.
+"""
+
+import json
+import os
+import threading
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+from utils.storage import get_storage
+
+DEFAULT_DATA_DIR = os.path.join(os.path.dirname(__file__), '..', 'data')
+DEFAULT_UPLOAD_FOLDER = os.path.join('static', 'uploads')
+DEFAULT_TENANT = "default"
+TENANT_HEADER = 'X-Tenant'
+
+
+class TenantError(ValueError):
+    """Unknown tenant or invalid tenants.json."""
+
+
+class Tenant:
+    """One legal entity's partition and the services bound to it."""
+
+    def __init__(self, registry: "TenantRegistry", tenant_id: str, name: str, data_dir: str, upload_prefix: str):
+        self.registry = registry
+        self.id = tenant_id
+        self.name = name
+        self.data_dir = data_dir
+        self.upload_prefix = upload_prefix
+        self._services = {}
+        # Reentrant: a service's factory may create the services it builds on
+        self._lock = threading.RLock()
+
+    def _service(self, name: str, factory: Callable[[], Any]):
+        service = self._services.get(name)
+        if service is None:
+            with self._lock:
+                if name not in self._services:
+                    self._services[name] = factory()
+                service = self._services[name]
+        return service
+
+    @property
+    def storage(self):
+        return get_storage(self.data_dir)
+
+    @property
+    def json_handler(self):
+        from utils.json_handler import JSONHandler
+        return self._service('json_handler', lambda: JSONHandler(os.path.join(self.data_dir, 'employees.json')))
+
+    @property
+    def engine(self):
+        """This tenant's EnhancedOffboardingWorkflow (workflows and due-date index)."""
+        def create():
+            from modules.enhanced_workflow import EnhancedOffboardingWorkflow
+            engine = EnhancedOffboardingWorkflow(store=self.storage.workflows)
+            for hook in self.registry.engine_hooks:
+                hook(engine)
+            return engine
+        return self._service('engine', create)
+
+    @property
+    def legacy_requests(self):
+        """This tenant's offboarding requests in the legacy shape, backed by its engine."""
+        from utils.legacy_requests import LegacyRequests
+        return self._service('legacy_requests', lambda: LegacyRequests(self.engine, self.storage))
+
+    @property
+    def upload_store(self):
+        from utils.upload_store import UploadStore
+        return self._service('upload_store', lambda: UploadStore(
+            self.registry.upload_folder, self.storage.uploads, prefix=self.upload_prefix
+        ))
+
+    @property
+    def search_index(self):
+        """Full-text index over this tenant's workflows, notes and exit interview feedback."""
+        from utils.search import SearchIndex
+        return self._service('search_index', lambda: SearchIndex(self.storage.workflows, self.storage.exit_interviews))
+
+    @property
+    def job_queue(self):
+        from utils.job_queue import get_job_queue
+        return get_job_queue(self.data_dir)
+
+
+class TenantRegistry:
+    """
+    The tenants of a data directory.
+
+    Args:
+        data_dir: Data directory holding tenants.json
+        upload_folder: Upload folder shared by the tenants' upload areas
+    """
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, upload_folder: str = DEFAULT_UPLOAD_FOLDER):
+        self.data_dir = data_dir
+        self.upload_folder = upload_folder
+        # Called with each tenant's engine when it is created (e.g. profiling instrumentation)
+        self.engine_hooks: List[Callable] = []
+        self.tenants: Dict[str, Tenant] = {}
+
+        path = os.path.join(data_dir, 'tenants.json')
+        if not os.path.exists(path):
+            self.tenants[DEFAULT_TENANT] = Tenant(self, DEFAULT_TENANT, "Default", data_dir, '')
+            self.default = self.tenants[DEFAULT_TENANT]
+            return
+
+        with open(path, 'r') as f:
+            config = json.load(f)
+        for position, (tenant_id, spec) in enumerate(config.get("tenants", {}).items()):
+            if '/' in tenant_id or tenant_id in ('.', '..'):
+                raise TenantError(f"Invalid tenant id: {tenant_id}")
+            data_path = os.path.normpath(os.path.join(data_dir, spec.get("data_dir", os.path.join('tenants', tenant_id))))
+            # The first tenant keeps the upload layout from before tenants existed
+            prefix = '' if position == 0 else f"tenants/{tenant_id}/"
+            self.tenants[tenant_id] = Tenant(self, tenant_id, spec.get("name", tenant_id), data_path, prefix)
+        if not self.tenants:
+            raise TenantError(f"{path} defines no tenants")
+        self.default = self.get(config.get("default_tenant", next(iter(self.tenants))))
+
+    def get(self, tenant_id: str) -> Tenant:
+        try:
+            return self.tenants[tenant_id]
+        except KeyError:
+            raise TenantError(f"Unknown tenant: {tenant_id}")
+
+    def current(self) -> Tenant:
+        """The tenant of the current web request, or the default tenant outside requests."""
+        from flask import g, has_request_context
+        if has_request_context():
+            return getattr(g, 'tenant', None) or self.default
+        return self.default
+
+    def rollup(self, max_workers: int = None) -> Dict[str, Any]:
+        """Summaries of every tenant, computed in parallel, and their total."""
+        data_dirs = {tenant_id: tenant.data_dir for tenant_id, tenant in self.tenants.items()}
+        if len(data_dirs) == 1:
+            summaries = {tenant_id: summarize_partition(data_dir) for tenant_id, data_dir in data_dirs.items()}
+        else:
+            pool = _rollup_pool(max_workers or min(len(data_dirs), os.cpu_count() or 1))
+            futures = {tenant_id: pool.submit(summarize_partition, data_dir)
+                       for tenant_id, data_dir in data_dirs.items()}
+            summaries = {tenant_id: future.result() for tenant_id, future in futures.items()}
+        return {"tenants": summaries, "total": _merge_summaries(summaries.values())}
+
+
+# Cross-tenant rollups
+
+def _count_by(records: List[Dict[str, Any]], field: str) -> Dict[str, int]:
+    counts = {}
+    for record in records:
+        value = record.get(field) or "unknown"
+        counts[value] = counts.get(value, 0) + 1
+    return counts
+
+
+def summarize_partition(data_dir: str) -> Dict[str, Any]:
+    """Counts for one tenant's data directory (runs in a rollup worker process)."""
+    from utils.business_calendar import parse_datetime
+
+    storage = get_storage(data_dir)
+    employees = storage.employees.all()
+    workflows = storage.workflows.all()
+    now = datetime.now().astimezone()
+    overdue_steps = sum(
+        1 for workflow in workflows for step in workflow["steps"].values()
+        if step["status"] != "completed" and step.get("due_date") and parse_datetime(step["due_date"]) < now
+    )
+    return {
+        "employees": len(employees),
+        "employees_by_status": _count_by(employees, "status"),
+        "offboarding_requests": len(storage.offboarding_requests.all()),
+        "workflows": len(workflows),
+        "workflows_by_status": _count_by(workflows, "status"),
+        "overdue_steps": overdue_steps,
+    }
+
+
+def _merge_summaries(summaries) -> Dict[str, Any]:
+    total = {}
+    for summary in summaries:
+        for field, value in summary.items():
+            if isinstance(value, dict):
+                bucket = total.setdefault(field, {})
+                for key, count in value.items():
+                    bucket[key] = bucket.get(key, 0) + count
+            else:
+                total[field] = total.get(field, 0) + value
+    return total
+
+
+_pool: Optional["ProcessPoolExecutor"] = None
+_pool_lock = threading.Lock()
+
+
+def _rollup_pool(max_workers: int) -> "ProcessPoolExecutor":
+    """Long-lived worker processes, so their storage caches stay warm between rollups."""
+    # Imported on first rollup; web workers that never roll up do not load multiprocessing
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # Spawned rather than forked: the web server that asks is multi-threaded
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+# Flask integration
+
+def init_app(app, registry: TenantRegistry) -> TenantRegistry:
+    """Select the request's tenant before each request and expose the tenants to templates."""
+    from flask import abort, g, request, session
+
+    app.extensions['tenants'] = registry
+
+    @app.before_request
+    def _select_tenant():
+        registry = app.extensions['tenants']
+        requested = request.args.get('tenant')
+        if requested is not None:
+            if requested not in registry.tenants:
+                abort(404)
+            session['tenant'] = requested
+        header = request.headers.get(TENANT_HEADER)
+        if requested is None and header and header not in registry.tenants:
+            abort(404)
+        # An explicit ?tenant= wins over the header, so the page shows the tenant the session remembers
+        tenant_id = requested or header or session.get('tenant')
+        if tenant_id is not None and tenant_id not in registry.tenants:
+            session.pop('tenant', None)
+            tenant_id = None
+        g.tenant = registry.tenants[tenant_id] if tenant_id else registry.default
+
+    @app.context_processor
+    def _tenant_context():
+        registry = app.extensions['tenants']
+        return {"tenants": list(registry.tenants.values()), "active_tenant": registry.current()}
+
+    return registry
+
+
+_registries: Dict[tuple, TenantRegistry] = {}
+
+
+def get_tenants(data_dir: str = DEFAULT_DATA_DIR, upload_folder: str = DEFAULT_UPLOAD_FOLDER) -> TenantRegistry:
+    """Shared registry for a data directory, so both web entry points use the same tenant services."""
+    key = (os.path.abspath(data_dir), os.path.abspath(upload_folder))
+    if key not in _registries:
+        _registries[key] = TenantRegistry(data_dir, upload_folder)
+    return _registries[key]
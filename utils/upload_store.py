@@ -0,0 +1,214 @@
+"""
+Content-addressed store for uploaded documents.
+
+Uploads are copied in fixed-size chunks to a temporary file while their
+SHA-256 is computed, so memory use does not depend on the file size and an
+oversized upload is rejected as soon as it crosses the limit. The finished
+file is moved to ``objects/<first two hex digits>/<sha256><ext>`` under the
+upload folder (below ``tenants/<id>/`` for all but the first tenant, see
+utils.tenants); a second upload with the same content reuses that file.
+
+The manifest (``uploads.json`` in the data directory, see utils.storage)
+records every stored file with the employee fields that reference it. A file
+is deleted once nothing references it, and the bytes referenced by one
+employee are limited by a quota.
+
+Attaching an upload to an employee happens under the employees write lock,
+then the manifest lock, so the manifest and the employee record change
+together.
+"""
+
+import hashlib
+import os
+import tempfile
+from datetime import datetime
+from typing import Dict, Any, Optional
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_FILE_SIZE = 10 * 1024 * 1024
+DEFAULT_EMPLOYEE_QUOTA = 50 * 1024 * 1024
+
+
+def _format_size(nbytes: int) -> str:
+    if nbytes >= 1024 * 1024:
+        return f"{nbytes / (1024 * 1024):g} MB"
+    return f"{nbytes / 1024:g} KB"
+
+
+class UploadRejected(ValueError):
+    """The upload was refused (too large, over quota or unknown employee)."""
+
+
+class StagedUpload:
+    """A fully received upload waiting to be committed to the store."""
+
+    def __init__(self, temp_path: str, sha256: str, size: int, extension: str,
+                 original_name: str, content_type: Optional[str], prefix: str = ''):
+        self.temp_path = temp_path
+        self.sha256 = sha256
+        self.size = size
+        self.extension = extension
+        self.original_name = original_name
+        self.content_type = content_type
+        self.prefix = prefix
+
+    @property
+    def relative_path(self) -> str:
+        """Path below the upload folder, as stored in employee records."""
+        return f"{self.prefix}objects/{self.sha256[:2]}/{self.sha256}{self.extension}"
+
+    def discard(self):
+        if self.temp_path and os.path.exists(self.temp_path):
+            os.unlink(self.temp_path)
+        self.temp_path = None
+
+
+class UploadStore:
+    """
+    Chunked, deduplicating document store below an upload folder.
+
+    Args:
+        root: Upload folder (served as /static/uploads)
+        manifest: Collection keyed by sha256 (StorageService.uploads)
+        max_file_size: Largest accepted file in bytes
+        employee_quota: Largest total size of the files one employee references
+        prefix: Directory below root for this tenant's files ('' or 'tenants/<id>/')
+    """
+
+    def __init__(self, root: str, manifest, max_file_size: int = DEFAULT_MAX_FILE_SIZE,
+                 employee_quota: int = DEFAULT_EMPLOYEE_QUOTA, chunk_size: int = CHUNK_SIZE,
+                 prefix: str = ''):
+        self.root = root
+        self.prefix = prefix
+        self.manifest = manifest
+        self.max_file_size = max_file_size
+        self.employee_quota = employee_quota
+        self.chunk_size = chunk_size
+        self.temp_dir = os.path.join(root, 'tmp')
+        os.makedirs(self.temp_dir, exist_ok=True)
+
+    def stage(self, file) -> StagedUpload:
+        """
+        Copy an uploaded file (a Werkzeug FileStorage) to a temporary file, hashing as it goes.
+
+        Raises:
+            UploadRejected: If the file is larger than max_file_size
+        """
+        original_name = secure_filename(file.filename or '')
+        extension = os.path.splitext(original_name)[1].lower()
+        digest = hashlib.sha256()
+        size = 0
+
+        fd, temp_path = tempfile.mkstemp(dir=self.temp_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                while True:
+                    chunk = file.stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > self.max_file_size:
+                        raise UploadRejected(f"File exceeds the {_format_size(self.max_file_size)} upload limit")
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+        return StagedUpload(temp_path, digest.hexdigest(), size, extension,
+                            original_name, getattr(file, 'content_type', None), self.prefix)
+
+    def path_for(self, relative_path: str) -> str:
+        """Absolute file path of a stored reference."""
+        return os.path.join(self.root, *relative_path.split('/'))
+
+    def _employee_usage(self, employee_id: str, ignore_ref: str) -> int:
+        prefix = f"{employee_id}:"
+        return sum(
+            entry["size"] for entry in self.manifest.all()
+            if any(ref.startswith(prefix) and ref != ignore_ref for ref in entry["refs"])
+        )
+
+    def _release(self, relative_path: Optional[str], ref: str):
+        """Drop ref from the stored file at relative_path, deleting the file when unused."""
+        if not relative_path or not relative_path.startswith(self.prefix + 'objects/'):
+            return  # Files saved before the store existed are left alone
+        sha256 = os.path.splitext(os.path.basename(relative_path))[0]
+        entry = self.manifest.get(sha256)
+        if entry is None or ref not in entry["refs"]:
+            return
+        entry["refs"].remove(ref)
+        if entry["refs"]:
+            self.manifest.put(entry)
+            return
+        self.manifest.delete(sha256)
+        try:
+            os.unlink(self.path_for(entry["path"]))
+        except FileNotFoundError:
+            pass
+
+    def _commit(self, staged: StagedUpload, ref: str) -> str:
+        """Move the staged file into place (or reuse an identical one) and reference it."""
+        entry = self.manifest.get(staged.sha256)
+        if entry is None:
+            target = self.path_for(staged.relative_path)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            os.replace(staged.temp_path, target)
+            staged.temp_path = None
+            entry = {
+                "sha256": staged.sha256,
+                "path": staged.relative_path,
+                "size": staged.size,
+                "content_type": staged.content_type,
+                "original_name": staged.original_name,
+                "created_at": datetime.now().isoformat(),
+                "refs": [],
+            }
+        else:
+            staged.discard()
+        if ref not in entry["refs"]:
+            entry["refs"].append(ref)
+        self.manifest.put(entry)
+        return entry["path"]
+
+    def attach(self, employees, employee_id: str, field: str, file,
+               changes: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        Store an upload and point employee[field] at it, together with other changes.
+
+        Args:
+            employees: The employees collection (StorageService.employees)
+            employee_id: Employee to attach the document to
+            field: Employee field holding the reference (e.g. "resignation_letter")
+            file: Uploaded FileStorage
+            changes: Further employee fields to update in the same write
+
+        Returns:
+            Dict: Updated copy of the employee record
+
+        Raises:
+            UploadRejected: If the file is too large, over quota or the employee is unknown
+        """
+        staged = self.stage(file)
+        ref = f"{employee_id}:{field}"
+        try:
+            with employees.transaction():
+                employee = employees.get(employee_id, copy=False)
+                if employee is None:
+                    raise UploadRejected("Employee not found")
+                with self.manifest.transaction():
+                    previous = employee.get(field)
+                    if previous != staged.relative_path:
+                        used = self._employee_usage(employee_id, ignore_ref=ref)
+                        if used + staged.size > self.employee_quota:
+                            raise UploadRejected(
+                                f"Upload quota of {_format_size(self.employee_quota)} for this employee exceeded"
+                            )
+                    relative_path = self._commit(staged, ref)
+                    if previous != relative_path:
+                        self._release(previous, ref)
+                return employees.patch(employee_id, dict(changes or {}, **{field: relative_path}))
+        finally:
+            staged.discard()
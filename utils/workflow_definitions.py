@@ -0,0 +1,271 @@
+"""
+Workflow definitions loaded from files.
+
+Each file in data/workflow_definitions/ (JSON, or YAML when PyYAML is
+installed) defines one version of one workflow template:
+
+    id: termination
+    version: 2
+    name: Termination offboarding
+    applies_to:
+        reasons: [termination]      # ReasonForLeaving values; omitted = any
+        locations: [London]         # business_calendar locations; omitted = any
+    steps:
+      - id: step_1_initial_request
+        name: Initial Request by Line Manager
+        responsible_team: line_manager          # or a list of teams
+        timing: Day 0
+        description: ...
+        due_rule: {anchor: created, offset: 0}  # see utils.business_calendar.DueRule
+        tasks:
+          - id: capture_employee_details
+            name: Capture Employee Details
+            description: ...
+            required_fields: [employee_id, name]    # optional
+            dependencies: [step_1_initial_request]  # task or step IDs, optional
+            responsible_team: it                    # optional, one of the step's teams
+
+Files are validated and compiled once, when the directory is loaded, into
+WorkflowTemplate objects keyed by (id, version). A new workflow uses the
+latest version of the most specific template for its reason for leaving and
+location, and records that id and version; older versions stay loaded so
+running workflows keep the template they were created with.
+"""
+
+import glob
+import json
+import os
+from typing import Dict, List, Any, Optional, Tuple
+
+from utils.business_calendar import CalendarError, DueRule, order_rules
+
+DEFAULT_DEFINITIONS_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'workflow_definitions')
+
+# Workflows created before templates were recorded used this one
+LEGACY_TEMPLATE = ("standard", 1)
+
+TEMPLATE_FIELDS = {"id", "version", "name", "description", "applies_to", "steps"}
+STEP_FIELDS = {"id", "name", "responsible_team", "timing", "description", "due_rule", "tasks"}
+TASK_FIELDS = {"id", "name", "description", "required_fields", "dependencies", "responsible_team"}
+MATCH_FIELDS = {"reasons", "locations"}
+
+
+class DefinitionError(ValueError):
+    """A workflow definition file is invalid."""
+
+
+class WorkflowTemplate:
+    """
+    A validated workflow definition, ready to instantiate.
+
+    Attributes:
+        id, version, name, description: From the definition
+        reasons, locations: Sets the template applies to (empty = any)
+        steps: Initial step state by step ID (JSON-safe; copied per workflow)
+        rules: DueRule by step ID
+    """
+
+    def __init__(self, definition: Dict[str, Any], source: str):
+        self.id = definition["id"]
+        self.version = definition["version"]
+        self.name = definition.get("name", self.id)
+        self.description = definition.get("description", "")
+        self.source = source
+        applies_to = definition.get("applies_to") or {}
+        self.reasons = frozenset(applies_to.get("reasons", ()))
+        self.locations = frozenset(applies_to.get("locations", ()))
+        self.rules = {step["id"]: DueRule.from_dict(step.get("due_rule") or {}) for step in definition["steps"]}
+        self.steps = {step["id"]: self._initial_step(step) for step in definition["steps"]}
+
+    @property
+    def key(self) -> Tuple[str, int]:
+        return self.id, self.version
+
+    @property
+    def specificity(self) -> int:
+        return bool(self.reasons) + bool(self.locations)
+
+    def matches(self, reason: Optional[str], location: Optional[str]) -> bool:
+        return ((not self.reasons or reason in self.reasons)
+                and (not self.locations or location in self.locations))
+
+    def overlaps(self, other: "WorkflowTemplate") -> bool:
+        """Whether some reason and location would match both templates."""
+        return ((not self.reasons or not other.reasons or bool(self.reasons & other.reasons))
+                and (not self.locations or not other.locations or bool(self.locations & other.locations)))
+
+    def _initial_step(self, step: Dict[str, Any]) -> Dict[str, Any]:
+        state = {field: step[field] for field in ("name", "responsible_team", "timing", "description") if field in step}
+        state["due_rule"] = self.rules[step["id"]].to_dict()
+        state["status"] = "pending"
+        state["due_date"] = None
+        state["tasks"] = []
+        for task in step["tasks"]:
+            task_state = dict(task, status="pending", completed_date=None, completed_by=None)
+            task_state["notes"] = []
+            state["tasks"].append(task_state)
+        return state
+
+
+def _load_file(path: str) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        # Imported here so JSON-only deployments never pay for loading PyYAML
+        try:
+            import yaml
+        except ImportError:  # Optional: YAML definitions
+            raise DefinitionError(f"{path}: YAML definitions need PyYAML (pip install pyyaml)")
+        return yaml.safe_load(f)
+
+
+def _check_fields(where: str, data: Any, allowed: set, required: set):
+    if not isinstance(data, dict):
+        raise DefinitionError(f"{where}: expected a mapping")
+    missing = required - set(data)
+    if missing:
+        raise DefinitionError(f"{where}: missing {', '.join(sorted(missing))}")
+    unknown = set(data) - allowed
+    if unknown:
+        raise DefinitionError(f"{where}: unknown fields {', '.join(sorted(unknown))}")
+
+
+def _check_teams(where: str, teams, valid: set) -> List[str]:
+    team_list = teams if isinstance(teams, list) else [teams]
+    if not team_list or any(team not in valid for team in team_list):
+        raise DefinitionError(f"{where}: unknown responsible_team {teams!r}")
+    return team_list
+
+
+def validate_definition(definition: Dict[str, Any], where: str) -> None:
+    """
+    Check a definition's structure, teams, task references and due rules.
+
+    Raises:
+        DefinitionError: With the file and the offending step or task
+    """
+    from modules.enhanced_workflow import ReasonForLeaving, TeamResponsibility
+
+    _check_fields(where, definition, TEMPLATE_FIELDS, {"id", "version", "steps"})
+    if not isinstance(definition["id"], str) or not definition["id"]:
+        raise DefinitionError(f"{where}: id must be a non-empty string")
+    if not isinstance(definition["version"], int) or definition["version"] < 1:
+        raise DefinitionError(f"{where}: version must be a positive integer")
+    where = f"{where} ({definition['id']} v{definition['version']})"
+
+    applies_to = definition.get("applies_to") or {}
+    _check_fields(f"{where} applies_to", applies_to, MATCH_FIELDS, set())
+    valid_reasons = {reason.value for reason in ReasonForLeaving}
+    for reason in applies_to.get("reasons", ()):
+        if reason not in valid_reasons:
+            raise DefinitionError(f"{where}: unknown reason for leaving {reason!r}")
+
+    steps = definition["steps"]
+    if not isinstance(steps, list) or not steps:
+        raise DefinitionError(f"{where}: steps must be a non-empty list")
+    teams = {team.value for team in TeamResponsibility}
+    step_ids, task_ids = set(), set()
+    for step in steps:
+        _check_fields(f"{where} step", step, STEP_FIELDS, {"id", "name", "responsible_team", "tasks"})
+        step_where = f"{where} step {step['id']}"
+        if step["id"] in step_ids:
+            raise DefinitionError(f"{step_where}: duplicate step id")
+        step_ids.add(step["id"])
+        step_teams = _check_teams(step_where, step["responsible_team"], teams)
+        if not isinstance(step["tasks"], list) or not step["tasks"]:
+            raise DefinitionError(f"{step_where}: tasks must be a non-empty list")
+        for task in step["tasks"]:
+            _check_fields(f"{step_where} task", task, TASK_FIELDS, {"id", "name", "description"})
+            if task["id"] in task_ids:
+                raise DefinitionError(f"{step_where}: duplicate task id {task['id']}")
+            task_ids.add(task["id"])
+            if "responsible_team" in task:
+                team = _check_teams(f"{step_where} task {task['id']}", task["responsible_team"], teams)
+                if not set(team) <= set(step_teams):
+                    raise DefinitionError(f"{step_where} task {task['id']}: team is not one of the step's teams")
+
+    for step in steps:
+        for task in step["tasks"]:
+            for dependency in task.get("dependencies", ()):
+                if dependency not in task_ids and dependency not in step_ids:
+                    raise DefinitionError(f"{where} task {task['id']}: unknown dependency {dependency}")
+
+    try:
+        order_rules({step["id"]: DueRule.from_dict(step.get("due_rule") or {}) for step in steps})
+    except CalendarError as e:
+        raise DefinitionError(f"{where}: {e}")
+
+
+class WorkflowDefinitions:
+    """
+    Compiled workflow templates of a definitions directory.
+
+    Args:
+        directory: Directory of *.json / *.yaml / *.yml definition files
+    """
+
+    def __init__(self, directory: str = DEFAULT_DEFINITIONS_DIR):
+        self.directory = directory
+        self._templates: Dict[Tuple[str, int], WorkflowTemplate] = {}
+        self._latest: Dict[str, WorkflowTemplate] = {}
+
+        paths = sorted(path for pattern in ("*.json", "*.yaml", "*.yml")
+                       for path in glob.glob(os.path.join(directory, pattern)))
+        for path in paths:
+            definition = _load_file(path)
+            validate_definition(definition, os.path.basename(path))
+            template = WorkflowTemplate(definition, path)
+            if template.key in self._templates:
+                raise DefinitionError(f"{os.path.basename(path)}: {template.id} v{template.version} "
+                                      f"is also defined in {os.path.basename(self._templates[template.key].source)}")
+            self._templates[template.key] = template
+            if template.id not in self._latest or template.version > self._latest[template.id].version:
+                self._latest[template.id] = template
+
+        if not self._latest:
+            raise DefinitionError(f"No workflow definitions in {directory}")
+        self._check_selection()
+
+    def _check_selection(self):
+        """Reject current templates that could both be the most specific match."""
+        latest = sorted(self._latest.values(), key=lambda t: t.id)
+        for i, first in enumerate(latest):
+            for second in latest[i + 1:]:
+                if first.specificity == second.specificity and first.overlaps(second):
+                    raise DefinitionError(f"Templates {first.id} and {second.id} match the same "
+                                          f"reasons and locations; make one more specific")
+        if not any(not t.reasons and not t.locations for t in latest):
+            raise DefinitionError("One workflow definition must apply to every reason and location")
+
+    def get(self, template_id: str, version: int) -> WorkflowTemplate:
+        """The template a workflow is pinned to."""
+        try:
+            return self._templates[template_id, version]
+        except KeyError:
+            raise DefinitionError(f"Unknown workflow template {template_id} v{version}")
+
+    def latest(self, template_id: str) -> WorkflowTemplate:
+        try:
+            return self._latest[template_id]
+        except KeyError:
+            raise DefinitionError(f"Unknown workflow template {template_id}")
+
+    def select(self, reason: Optional[str], location: Optional[str]) -> WorkflowTemplate:
+        """Latest version of the most specific template for a reason for leaving and location."""
+        matches = [t for t in self._latest.values() if t.matches(reason, location)]
+        return max(matches, key=lambda t: t.specificity)
+
+    def templates(self) -> List[WorkflowTemplate]:
+        """Every loaded template version, by id and version."""
+        return [self._templates[key] for key in sorted(self._templates)]
+
+
+_definitions: Dict[str, WorkflowDefinitions] = {}
+
+
+def get_workflow_definitions(directory: str = DEFAULT_DEFINITIONS_DIR) -> WorkflowDefinitions:
+    """Shared, compiled definitions of a directory, loaded on first use."""
+    directory = os.path.abspath(directory)
+    if directory not in _definitions:
+        _definitions[directory] = WorkflowDefinitions(directory)
+    return _definitions[directory]